@@ -0,0 +1,485 @@
+"""
+dRest asyncio support.  Requires Python 3.5+, and is therefore not imported
+by the top level drest package.
+
+The handlers in this module speak HTTP/1.1 directly over asyncio streams
+(no third party dependencies), keeping idle connections alive per host so
+that many requests can be in flight from a single event loop.
+
+"""
+
+import asyncio
+import socket
+import ssl
+from collections import deque
+from urllib.parse import urlsplit
+
+from . import exc, api, clock, request, resource
+
+class AsyncConnectionPool(object):
+    """
+    A simple per-host pool of keep-alive asyncio stream connections.
+
+    Optional Arguments:
+
+        max_connections
+            The maximum number of concurrent connections per host.
+            Default: 100.
+
+        ignore_ssl_validation
+            Boolean.  Whether or not to ignore ssl validation errors.
+            Default: False
+
+    """
+    def __init__(self, max_connections=100, ignore_ssl_validation=False):
+        self.max_connections = max_connections
+        self.ignore_ssl_validation = ignore_ssl_validation
+        self._idle = {}
+        self._semaphores = {}
+        self._ssl_context = None
+
+    def _get_ssl_context(self):
+        if self._ssl_context is None:
+            context = ssl.create_default_context()
+            if self.ignore_ssl_validation:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            self._ssl_context = context
+        return self._ssl_context
+
+    def _get_semaphore(self, key):
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(self.max_connections)
+        return self._semaphores[key]
+
+    async def _connect(self, key):
+        scheme, host, port = key
+        if scheme == 'https':
+            return await asyncio.open_connection(
+                host, port, ssl=self._get_ssl_context(),
+                server_hostname=host,
+                )
+        return await asyncio.open_connection(host, port)
+
+    async def acquire(self, key):
+        """
+        Return a tuple of (reader, writer, reused) for the host identified by
+        key (a tuple of (scheme, host, port)).  Waits while the host is at
+        max_connections.
+
+        """
+        await self._get_semaphore(key).acquire()
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if reader.at_eof() or writer.is_closing():
+                writer.close()
+                continue
+            return (reader, writer, True)
+
+        try:
+            reader, writer = await self._connect(key)
+        except BaseException:
+            self._get_semaphore(key).release()
+            raise
+        return (reader, writer, False)
+
+    def release(self, key, reader, writer, reuse=True):
+        """
+        Return a connection to the pool.  If reuse is False the connection
+        is closed instead.
+
+        """
+        if reuse and not reader.at_eof() and not writer.is_closing():
+            self._idle.setdefault(key, deque()).append((reader, writer))
+        else:
+            writer.close()
+        self._get_semaphore(key).release()
+
+    def close(self):
+        """Close all idle connections."""
+        for key in list(self._idle.keys()):
+            for reader, writer in self._idle.pop(key):
+                writer.close()
+
+async def _read_response(reader, method, timings=None):
+    """
+    Read an HTTP/1.x response from reader.  Returns a tuple of
+    (headers, content, keep_alive) where headers mimic httplib2 (lowercase
+    keys, and a 'status' key).  If timings (a dictionary) is given, the
+    monotonic timestamp of the status line is recorded as 'first_byte'.
+
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError('Connection closed by remote host')
+    if timings is not None:
+        timings['first_byte'] = clock.now()
+
+    parts = status_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+    version, status = parts[0], int(parts[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, value = line.decode('latin-1').split(':', 1)
+        key = key.strip().lower()
+        value = value.strip()
+        if key in headers:
+            headers[key] = '%s, %s' % (headers[key], value)
+        else:
+            headers[key] = value
+
+    connection = headers.get('connection', '').lower()
+    if version == 'HTTP/1.0':
+        keep_alive = connection == 'keep-alive'
+    else:
+        keep_alive = connection != 'close'
+
+    if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+        content = b''
+    elif 'chunked' in headers.get('transfer-encoding', '').lower():
+        chunks = []
+        while True:
+            line = await reader.readline()
+            try:
+                size = int(line.split(b';')[0].strip(), 16)
+            except ValueError:
+                raise exc.dRestAPIError("Invalid chunk size %r" % line)
+            if size == 0:
+                # discard trailers
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        content = b''.join(chunks)
+    elif 'content-length' in headers:
+        content = await reader.readexactly(int(headers['content-length']))
+    else:
+        content = await reader.read()
+        keep_alive = False
+
+    headers['status'] = str(status)
+    return (headers, content, keep_alive)
+
+class AsyncRequestHandler(request.RequestHandler):
+    """
+    Implements the IRequest interface on top of asyncio streams.
+    make_request() is a coroutine, otherwise all Meta options of
+    :mod:`drest.request.RequestHandler` (serialize, deserialize,
+    trailing_slash, extra headers/params/url params, timeout, etc) behave
+    the same.
+
+    Optional Arguments / Meta:
+
+        max_connections
+            The maximum number of concurrent connections per host.  Requests
+            beyond this wait for a free connection.  Default: 100.
+
+        transport
+            An *instantiated* drest.aio.AsyncConnectionPool used in place
+            of a pool per handler, so that it can be shared between
+            handlers (of the same event loop).  Its own max_connections
+            and ignore_ssl_validation apply, and close() leaves it open.
+            Blocking transports (i.e. drest.transport.ConnectionPool) can
+            not be used and raise exc.dRestAPIError.  Default: None
+
+    Usage:
+
+    .. code-block:: python
+
+        import asyncio
+        from drest.aio import AsyncRequestHandler
+
+        async def main():
+            req = AsyncRequestHandler()
+            response = await req.make_request('GET',
+                                              'http://localhost:8000/api/v0/')
+            await req.close()
+
+        asyncio.get_event_loop().run_until_complete(main())
+
+    """
+    class Meta:
+        max_connections = 100
+
+    def __init__(self, **kw):
+        super(AsyncRequestHandler, self).__init__(**kw)
+        self._pool = None
+        self._async_flights = {}
+
+    def _validate_transport(self, obj):
+        if not isinstance(obj, AsyncConnectionPool):
+            raise exc.dRestAPIError(
+                "AsyncRequestHandler requires a drest.aio.AsyncConnectionPool "
+                "transport, not %s" % obj.__class__.__name__)
+
+    def _get_pool(self):
+        if self._meta.transport is not None:
+            return self._meta.transport
+        if self._pool is None:
+            self._pool = AsyncConnectionPool(
+                max_connections=self._meta.max_connections,
+                ignore_ssl_validation=self._meta.ignore_ssl_validation,
+                )
+        return self._pool
+
+    def _clear_http(self):
+        # connections do not carry credentials, nothing to reset
+        pass
+
+    async def _send(self, pool, key, target, method, payload, headers,
+                    timings=None):
+        reader, writer, reused = await pool.acquire(key)
+        if timings is not None:
+            timings['connected'] = clock.now()
+        keep_alive = False
+        try:
+            lines = ['%s %s HTTP/1.1' % (method, target)]
+            for name, value in headers.items():
+                lines.append('%s: %s' % (name, value))
+            writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+            if payload:
+                writer.write(payload)
+            await writer.drain()
+            res_headers, content, keep_alive = await _read_response(
+                reader, method, timings)
+            return (res_headers, content)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            if reused:
+                # the cached connection went stale, try once more with a
+                # fresh one
+                pool.release(key, reader, writer, reuse=False)
+                reader = None
+                return await self._send(pool, key, target, method, payload,
+                                        headers, timings)
+            raise
+        finally:
+            if reader is not None:
+                pool.release(key, reader, writer, reuse=keep_alive)
+
+    async def _make_request(self, url, method, payload=None, headers=None,
+                            context=None):
+        """
+        A coroutine that sends the request over an asyncio stream.
+
+        Required Arguments:
+
+            url
+                The url of the request.
+
+            method
+                The method of the request. I.e. 'GET', 'PUT', 'POST', 'DELETE'.
+
+        Optional Arguments:
+
+            payload
+                The urlencoded parameters.
+
+            headers
+                Additional headers of the request.
+
+            context
+                The drest.hooks.RequestContext of the request (if any).
+
+        """
+        if payload is None:
+            if self._meta.serialize:
+                payload = self._serialize({})
+            else:
+                payload = ''
+        if headers is None:
+            headers = {}
+        if not isinstance(payload, bytes):
+            payload = payload.encode('utf-8')
+
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        target = parts.path or '/'
+        if parts.query:
+            target = '%s?%s' % (target, parts.query)
+
+        send_headers = {
+            'Host': parts.netloc,
+            'Accept-Encoding': 'identity',
+            'Connection': 'keep-alive',
+            }
+        send_headers.update(headers)
+        if payload or method not in ('GET', 'HEAD', 'DELETE'):
+            send_headers['Content-Length'] = str(len(payload))
+
+        async def send():
+            authorization = self._get_authorization(method, url)
+            if authorization is not None:
+                send_headers['Authorization'] = authorization
+            timings = None
+            if context is not None:
+                timings = context.timings
+            coro = self._send(self._get_pool(), key, target, method, payload,
+                              send_headers, timings)
+            if self._meta.timeout:
+                return await asyncio.wait_for(coro, self._meta.timeout)
+            return await coro
+
+        try:
+            res_headers, data = await send()
+            if self._is_challenged(method, url, res_headers):
+                res_headers, data = await send()
+            return (res_headers, data)
+        except asyncio.TimeoutError as e:
+            raise exc.dRestAPIError('timed out')
+        except socket.gaierror as e:
+            raise exc.dRestAPIError(
+                'Unable to find the server at %s' % parts.hostname)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise exc.dRestAPIError(e)
+
+    async def make_request(self, method, url, params=None, headers=None):
+        """
+        A coroutine that makes a call to a resource based on path, and
+        parameters.  See :mod:`drest.request.RequestHandler.make_request`.
+
+        """
+        return await self._send_request(*self._start_request(
+            method, url, params, headers))
+
+    async def _send_request(self, method, url, payload, headers,
+                            context=None):
+        self._log_request(method, url, payload, headers)
+        if context is None:
+            return await self._send_coalesced(method, url, payload, headers)
+        try:
+            response = await self._send_coalesced(method, url, payload,
+                                                  headers, context)
+        except exc.dRestError as e:
+            self._request_failed(context, e)
+            raise
+        return self._request_done(context, response)
+
+    async def _send_coalesced(self, method, url, payload, headers,
+                              context=None):
+        key = self._get_flight_key(method, url, headers)
+        if key is None:
+            return await self._do_send_request(method, url, payload, headers,
+                                               context)
+
+        flight = self._async_flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(
+                self._do_send_request(method, url, payload, headers, context))
+            self._async_flights[key] = flight
+            flight.add_done_callback(
+                lambda f: self._async_flights.pop(key, None))
+        # a cancelled caller must not cancel the request of the others
+        return await asyncio.shield(flight)
+
+    async def _do_send_request(self, method, url, payload, headers,
+                               context=None):
+        attempts = request._Attempts(self, method, url, headers, context)
+        while True:
+            wait = attempts.get_wait()
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                attempts.start()
+                try:
+                    res_headers, data = await self._make_request(
+                        url, method, payload, headers=headers,
+                        context=context)
+                except exc.dRestAPIError as e:
+                    delay = attempts.failed(e)
+                    if delay is None:
+                        raise
+                else:
+                    delay = attempts.received(res_headers, data)
+                    if delay is None:
+                        return attempts.build_response(res_headers, data)
+            finally:
+                attempts.release()
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        """
+        Close any idle connections held by this handler (but not those of
+        Meta.transport).
+
+        """
+        if self._pool is not None:
+            self._pool.close()
+
+class AsyncRESTResourceHandler(resource.RESTResourceHandler):
+    """
+    The asyncio version of :mod:`drest.resource.RESTResourceHandler`.  All
+    request methods (get(), post(), put(), patch(), delete(), get_many(),
+    etc) are coroutines.
+
+    """
+    async def _request(self, method, path, params, resource_id=None):
+        try:
+            return await self.api.make_request(method, path, params)
+        except exc.dRestRequestError as e:
+            raise self._request_error(e, method, resource_id)
+
+    async def _map_many(self, func, items, concurrency):
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(item):
+            async with semaphore:
+                try:
+                    return await func(item)
+                except exc.dRestError as e:
+                    return e
+
+        return await asyncio.gather(*[run(item) for item in items])
+
+class AsyncAPI(api.API):
+    """
+    The asyncio version of :mod:`drest.api.API`.  Takes the same arguments
+    and Meta options, however make_request() and all resource request
+    methods are coroutines.
+
+    Optional Arguments and Meta:
+
+        max_connections
+            The maximum number of concurrent connections per host.
+            Default: 100.
+
+        transport
+            An *instantiated* drest.aio.AsyncConnectionPool (see
+            AsyncRequestHandler).  Default: None
+
+    Usage:
+
+    .. code-block:: python
+
+        import asyncio
+        from drest.aio import AsyncAPI
+
+        async def main():
+            async with AsyncAPI('http://localhost:8000/api/v0/') as api:
+                api.add_resource('users')
+                responses = await asyncio.gather(
+                    *[api.users.get(pk) for pk in range(1, 1000)]
+                    )
+
+        asyncio.get_event_loop().run_until_complete(main())
+
+    """
+    class Meta:
+        request_handler = AsyncRequestHandler
+        resource_handler = AsyncRESTResourceHandler
+        max_connections = 100
+
+    async def close(self):
+        """Close any idle connections held by the request handler."""
+        await self.request.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
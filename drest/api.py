@@ -2,7 +2,7 @@
 
 import re
 from . import interface, resource, request, serialization, meta, exc
-from . import response
+from . import response, log
 
 class API(meta.MetaMixin):
     """
@@ -19,7 +19,8 @@ class API(meta.MetaMixin):
     Optional Arguments and Meta:
         
         debug
-            Boolean.  Toggle debug console output.  Default: False.
+            Boolean.  Toggle debug console output (the debug log of the
+            'drest' logger).  Default: False.
             
         baseurl
             The base url to the API endpoint.
@@ -74,6 +75,12 @@ class API(meta.MetaMixin):
         timeout
             The amount of seconds where a request should timeout.  Default: 30
 
+        transport
+            An *instantiated* transport object (i.e.
+            drest.transport.ConnectionPool) that is thread safe and can be
+            shared between API objects.  Passed to request_handler.
+            Default: None (one httplib2.Http() object per request handler).
+
     Usage
     
     .. code-block:: python
@@ -166,6 +173,9 @@ class API(meta.MetaMixin):
                 continue
             if hasattr(self.request._meta, meta):
                 setattr(self.request._meta, meta, getattr(self._meta, meta))
+
+        if getattr(self.request._meta, 'debug', False):
+            log.enable_debug()
                 
         for key in self._meta.extra_headers:
             self.request.add_header(key, self._meta.extra_headers[key])
@@ -198,6 +208,25 @@ class API(meta.MetaMixin):
             headers = {}
         url = "%s/%s/" % (self.baseurl.strip('/'), path.strip('/'))
         return self.request.make_request(method, url, params, headers)
+
+    def prepare(self, method, path, params=None, headers=None):
+        """
+        Prepare a request to be made (many times) later.  Returns a
+        drest.request.PreparedRequest, whose execute() makes the request
+        without recomputing the url, headers or payload.  Takes the same
+        arguments as self.make_request().
+
+        Usage:
+
+        .. code-block:: python
+
+            poll = api.prepare('GET', '/jobs/1/')
+            while poll.execute().data['status'] == 'running':
+                time.sleep(1)
+
+        """
+        url = "%s/%s/" % (self.baseurl.strip('/'), path.strip('/'))
+        return self.request.prepare(method, url, params, headers)
         
     @property
     def resources(self):
@@ -290,6 +319,9 @@ class API(meta.MetaMixin):
             # add the actual resource to the chain of nested objects
             setattr(current_obj, last, handler)        
             
+        if hasattr(self.request, 'register_resource'):
+            self.request.register_resource(name, "%s/%s" % (self.baseurl,
+                                                             path))
         self._resources.append(name)
         
 class TastyPieAPI(API):
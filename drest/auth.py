@@ -0,0 +1,262 @@
+"""dRest authentication handlers."""
+
+import os
+import re
+import sys
+import base64
+import hashlib
+import threading
+
+if sys.version_info[0] < 3:
+    from urlparse import urlsplit # pragma: no cover
+else:
+    from urllib.parse import urlsplit # pragma: no cover
+
+from . import interface, meta
+
+def validate(obj):
+    """Validates a handler implementation against the IAuth interface."""
+    members = [
+        'set_credentials',
+        'get_authorization',
+        'handle_challenge',
+        ]
+    interface.validate(IAuth, obj, members)
+
+class IAuth(interface.Interface):
+    """
+    This class defines the Authentication Handler Interface.  Classes that
+    implement this handler must provide the methods and attributes defined
+    below.
+
+    All implementations must provide sane 'default' functionality when
+    instantiated with no arguments.  Meaning, it can and should accept
+    optional parameters that alter how it functions, but can not require
+    any parameters.
+
+    Implementations do *not* subclass from interfaces.
+
+    """
+
+    def set_credentials(user, password):
+        """
+        Set the user and password to authenticate with (called by
+        RequestHandler.set_auth_credentials()).
+
+        """
+
+    def get_authorization(method, url):
+        """
+        Return the Authorization header value for a request, or None to send
+        it without one.
+
+        Required Arguments:
+
+            method
+                The HTTP method of the request.
+
+            url
+                The full url of the request.
+
+        """
+
+    def handle_challenge(method, url, res_headers):
+        """
+        Called with the response headers of a request that was answered
+        with 401 Unauthorized.  Returns True if the request should be sent
+        again (with a new get_authorization()), False otherwise.
+
+        """
+
+def _get_uri(url):
+    parts = urlsplit(url)
+    uri = parts.path or '/'
+    if parts.query:
+        uri = '%s?%s' % (uri, parts.query)
+    return uri
+
+def _get_space(url):
+    parts = urlsplit(url)
+    return (parts.scheme, parts.netloc)
+
+class AuthHandler(meta.MetaMixin):
+    """
+    Generic Authentication Handler.  Should be used to subclass from.
+
+    """
+    def __init__(self, **kw):
+        super(AuthHandler, self).__init__(**kw)
+        self.user = None
+        self.password = None
+
+    def set_credentials(self, user, password):
+        self.user = user
+        self.password = password
+
+    def get_authorization(self, method, url):
+        raise NotImplementedError
+
+    def handle_challenge(self, method, url, res_headers):
+        return False
+
+class BasicAuthHandler(AuthHandler):
+    """
+    This handler implements the IAuth interface with preemptive HTTP Basic
+    authentication: the Authorization header is sent with the first
+    request, rather than after a 401 challenge.
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.auth import BasicAuthHandler
+
+        api = drest.API('https://localhost:8000/api/v1/',
+                        auth_handler=BasicAuthHandler)
+        api.auth('john.doe', 'password')
+
+    """
+    def set_credentials(self, user, password):
+        super(BasicAuthHandler, self).set_credentials(user, password)
+        token = base64.b64encode(('%s:%s' % (user, password)).encode('utf-8'))
+        self._header = 'Basic %s' % token.decode('ascii')
+
+    def get_authorization(self, method, url):
+        if self.user is None:
+            return None
+        return self._header
+
+_CHALLENGE_PARAM = re.compile(r'(\w+)=(?:"((?:[^"\\]|\\.)*)"|([^\s,]*))')
+
+def parse_digest_challenge(value):
+    """
+    Parse the Digest challenge of a WWW-Authenticate header value and
+    return its parameters as a dictionary, or None if there is none.
+
+    """
+    if not value:
+        return None
+    match = re.search(r'(?:^|[\s,])Digest\s+', value, re.IGNORECASE)
+    if match is None:
+        return None
+    rest = value[match.end():]
+    # the parameters end where another scheme starts
+    other = re.search(r',\s*[A-Za-z][\w-]*\s+\w+=', rest)
+    if other is not None:
+        rest = rest[:other.start()]
+    params = {}
+    for key, quoted, token in _CHALLENGE_PARAM.findall(rest):
+        params[key.lower()] = quoted if quoted else token
+    if 'nonce' not in params:
+        return None
+    return params
+
+class _Nonce(object):
+    def __init__(self, challenge):
+        self.challenge = challenge
+        self.count = 0
+
+class DigestAuthHandler(AuthHandler):
+    """
+    This handler implements the IAuth interface with HTTP Digest
+    authentication (RFC 7616, algorithms MD5, MD5-sess, SHA-256 and
+    SHA-256-sess with qop 'auth').  The first request to a host is answered
+    with a challenge, after which the nonce is cached (per scheme and host)
+    and reused with an incrementing nonce count for every later request,
+    until the server rejects it (i.e. with stale=true).
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.auth import DigestAuthHandler
+
+        api = drest.API('http://localhost:8000/api/v1/',
+                        auth_handler=DigestAuthHandler)
+        api.auth('john.doe', 'password')
+
+    """
+    def __init__(self, **kw):
+        super(DigestAuthHandler, self).__init__(**kw)
+        self._nonces = {}
+        self._lock = threading.Lock()
+
+    def set_credentials(self, user, password):
+        super(DigestAuthHandler, self).set_credentials(user, password)
+        with self._lock:
+            self._nonces.clear()
+
+    def _hash(self, algorithm, value):
+        if algorithm.upper().startswith('SHA-256'):
+            func = hashlib.sha256
+        else:
+            func = hashlib.md5
+        return func(value.encode('utf-8')).hexdigest()
+
+    def get_authorization(self, method, url):
+        if self.user is None:
+            return None
+        with self._lock:
+            nonce = self._nonces.get(_get_space(url))
+            if nonce is None:
+                return None
+            nonce.count += 1
+            count = nonce.count
+        challenge = nonce.challenge
+
+        algorithm = challenge.get('algorithm', 'MD5')
+        uri = _get_uri(url)
+        cnonce = hashlib.sha1(os.urandom(16)).hexdigest()[:16]
+        nc = '%08x' % count
+
+        ha1 = self._hash(algorithm, '%s:%s:%s' % \
+                         (self.user, challenge.get('realm', ''),
+                          self.password))
+        if algorithm.lower().endswith('-sess'):
+            ha1 = self._hash(algorithm, '%s:%s:%s' % \
+                             (ha1, challenge['nonce'], cnonce))
+        ha2 = self._hash(algorithm, '%s:%s' % (method, uri))
+
+        qops = [q.strip() for q in challenge.get('qop', '').split(',')]
+        if 'auth' in qops:
+            response = self._hash(algorithm, '%s:%s:%s:%s:auth:%s' % \
+                                  (ha1, challenge['nonce'], nc, cnonce, ha2))
+        else:
+            response = self._hash(algorithm, '%s:%s:%s' % \
+                                  (ha1, challenge['nonce'], ha2))
+
+        parts = [
+            'username="%s"' % self.user,
+            'realm="%s"' % challenge.get('realm', ''),
+            'nonce="%s"' % challenge['nonce'],
+            'uri="%s"' % uri,
+            'algorithm=%s' % algorithm,
+            'response="%s"' % response,
+            ]
+        if 'auth' in qops:
+            parts.extend(['qop=auth', 'nc=%s' % nc, 'cnonce="%s"' % cnonce])
+        if 'opaque' in challenge:
+            parts.append('opaque="%s"' % challenge['opaque'])
+        return 'Digest %s' % ', '.join(parts)
+
+    def handle_challenge(self, method, url, res_headers):
+        if self.user is None:
+            return False
+        challenge = parse_digest_challenge(res_headers.get('www-authenticate'))
+        if challenge is None:
+            return False
+
+        space = _get_space(url)
+        with self._lock:
+            current = self._nonces.get(space)
+            self._nonces[space] = _Nonce(challenge)
+        if current is None:
+            return True
+        # the same nonce rejected without being stale means the credentials
+        # are wrong, there is no point in trying again
+        if current.challenge['nonce'] == challenge['nonce'] and \
+           challenge.get('stale', '').lower() != 'true':
+            return False
+        return True
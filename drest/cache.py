@@ -0,0 +1,183 @@
+"""dRest conditional request (ETag / Last-Modified) cache handlers."""
+
+import threading
+from collections import OrderedDict
+
+from . import interface, meta
+
+def validate(obj):
+    """Validates a handler implementation against the ICache interface."""
+    members = [
+        'get',
+        'set',
+        'invalidate',
+        'clear',
+        ]
+    interface.validate(ICache, obj, members)
+
+class ICache(interface.Interface):
+    """
+    This class defines the Cache Handler Interface.  Classes that
+    implement this handler must provide the methods and attributes defined
+    below.
+
+    All implementations must provide sane 'default' functionality when
+    instantiated with no arguments.  Meaning, it can and should accept
+    optional parameters that alter how it functions, but can not require
+    any parameters.
+
+    Implementations do *not* subclass from interfaces.
+
+    """
+
+    def get(key):
+        """
+        Return the cached response object for key, or None.
+
+        Required Arguments:
+
+            key
+                The cache key (a tuple of (url, authorization header)).
+
+        """
+
+    def set(key, response_object, size):
+        """
+        Cache a (deserialized) response object.
+
+        Required Arguments:
+
+            key
+                The cache key.
+
+            response_object
+                The response object to cache.
+
+            size
+                The size in bytes of the raw response content.
+
+        """
+
+    def invalidate(url):
+        """
+        Remove every entry under the resource path of url (the url itself,
+        its parent collection and anything below it).
+
+        Required Arguments:
+
+            url
+                The url of a PUT, PATCH, POST or DELETE request.
+
+        """
+
+    def clear():
+        """Remove all entries."""
+
+def _get_path(url):
+    return url.split('?', 1)[0].rstrip('/')
+
+class CacheHandler(meta.MetaMixin):
+    """
+    Generic Cache Handler.  Should be used to subclass from.
+
+    """
+    def __init__(self, **kw):
+        super(CacheHandler, self).__init__(**kw)
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, response_object, size):
+        raise NotImplementedError
+
+    def invalidate(self, url):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+class LRUCacheHandler(CacheHandler):
+    """
+    This handler implements the ICache interface as a thread safe, in
+    memory LRU cache bounded by both number of entries and bytes.
+
+    Optional Arguments / Meta:
+
+        max_entries
+            The maximum number of cached responses.  Default: 1000.
+
+        max_bytes
+            The maximum total size (of the raw response content) of all
+            cached responses.  Default: 10485760 (10MB).
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.cache import LRUCacheHandler
+
+        api = drest.API('http://localhost:8000/api/v1/',
+                        cache_handler=LRUCacheHandler,
+                        max_entries=500)
+
+    Note that the same (cached) response object is returned for every 304
+    Not Modified response, and should therefore be treated as read-only.
+
+    """
+    class Meta:
+        max_entries = 1000
+        max_bytes = 10485760
+
+    def __init__(self, **kw):
+        super(LRUCacheHandler, self).__init__(**kw)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """The total size in bytes of all cached responses."""
+        return self._bytes
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            response_object, size = self._entries.pop(key)
+            self._entries[key] = (response_object, size)
+            return response_object
+
+    def _remove(self, key):
+        response_object, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def set(self, key, response_object, size):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self._meta.max_bytes:
+                return
+            self._entries[key] = (response_object, size)
+            self._bytes += size
+            while len(self._entries) > self._meta.max_entries or \
+                  self._bytes > self._meta.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, url):
+        path = _get_path(url)
+        parent = path.rsplit('/', 1)[0]
+        with self._lock:
+            for key in list(self._entries.keys()):
+                key_path = _get_path(key[0])
+                if key_path == path or key_path == parent or \
+                   key_path.startswith(path + '/'):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,298 @@
+"""dRest circuit breaker handlers."""
+
+import threading
+from collections import deque
+
+from . import exc, clock, interface, meta
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+def validate(obj):
+    """Validates a handler implementation against the ICircuitBreaker
+    interface."""
+    members = [
+        'get_key',
+        'before_request',
+        'is_failure',
+        'after_request',
+        'release',
+        ]
+    interface.validate(ICircuitBreaker, obj, members)
+
+class ICircuitBreaker(interface.Interface):
+    """
+    This class defines the Circuit Breaker Handler Interface.  Classes that
+    implement this handler must provide the methods and attributes defined
+    below.
+
+    All implementations must provide sane 'default' functionality when
+    instantiated with no arguments.  Meaning, it can and should accept
+    optional parameters that alter how it functions, but can not require
+    any parameters.
+
+    Implementations do *not* subclass from interfaces.
+
+    """
+
+    def get_key(host, resource=None):
+        """
+        Return the key that a request is tracked under.
+
+        Required Arguments:
+
+            host
+                The host (and port) of the request url.
+
+        Optional Arguments:
+
+            resource
+                The name of the resource the request belongs to, if known.
+
+        """
+
+    def before_request(key):
+        """
+        Called before every request.  Raises exc.dRestCircuitOpenError if
+        the circuit for key is open.
+
+        """
+
+    def is_failure(status=None, error=None):
+        """
+        Returns whether a request counts as a failure.
+
+        Optional Arguments:
+
+            status
+                The response status (an int), if a response was received.
+
+            error
+                The exc.dRestAPIError the request failed with (i.e. a
+                connection error or a timeout), if any.
+
+        """
+
+    def after_request(key, failed, duration):
+        """
+        Called after every request that was let through.
+
+        Required Arguments:
+
+            key
+                The circuit key.
+
+            failed
+                Boolean.  Whether the request failed.
+
+            duration
+                The duration of the request in seconds.
+
+        """
+
+    def release(key):
+        """
+        Called instead of after_request() when a request that was let
+        through by before_request() ended without an outcome (i.e. an
+        unexpected exception, or the caller was interrupted), so that it
+        does not hold on to a half-open probe.
+
+        """
+
+class _Circuit(object):
+    def __init__(self, window_size):
+        self.state = CLOSED
+        self.calls = deque(maxlen=window_size)
+        self.opened_at = None
+        self.probes = 0
+        self.successes = 0
+
+class CircuitBreakerHandler(meta.MetaMixin):
+    """
+    This handler implements the ICircuitBreaker interface.  Every key (host
+    or resource) has its own circuit, which opens when the failure rate or
+    the slow call rate over the last window_size calls reaches its
+    threshold.  While open, requests fail immediately with
+    exc.dRestCircuitOpenError.  After open_timeout the circuit is half-open
+    and lets half_open_max_calls probe requests through: if they succeed
+    the circuit closes, otherwise it opens again.
+
+    Optional Arguments / Meta:
+
+        key_by
+            One of ['host', 'resource'].  Requests to urls that do not
+            belong to a resource added with api.add_resource() fall back to
+            the host.  Default: 'host'.
+
+        window_size
+            The number of most recent calls the rates are computed over.
+            Default: 20.
+
+        minimum_calls
+            The minimum number of calls in the window before the circuit
+            can open.  Default: 10.
+
+        failure_rate_threshold
+            The failure rate (0.0 - 1.0) at which the circuit opens.
+            Default: 0.5.
+
+        failure_statuses
+            A list of response status codes that count as failures
+            (connection errors and timeouts always do).
+            Default: [500, 502, 503, 504].
+
+        slow_call_duration
+            Seconds.  Calls taking longer than this count as slow.
+            Default: None (disabled).
+
+        slow_call_rate_threshold
+            The slow call rate (0.0 - 1.0) at which the circuit opens.
+            Default: 1.0.
+
+        open_timeout
+            Seconds a circuit stays open before it goes half-open.
+            Default: 30.
+
+        half_open_max_calls
+            The number of probe requests let through while half-open.
+            Default: 1.
+
+        state_change_hooks
+            A list of functions called as func(key, old_state, new_state)
+            whenever a circuit changes state.  Default: [].
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.circuit import CircuitBreakerHandler
+
+        def alert(key, old_state, new_state):
+            print("circuit %s is now %s" % (key, new_state))
+
+        api = drest.API('http://localhost:8000/api/v1/',
+                        circuit_breaker_handler=CircuitBreakerHandler,
+                        state_change_hooks=[alert])
+
+    """
+    class Meta:
+        key_by = 'host'
+        window_size = 20
+        minimum_calls = 10
+        failure_rate_threshold = 0.5
+        failure_statuses = [500, 502, 503, 504]
+        slow_call_duration = None
+        slow_call_rate_threshold = 1.0
+        open_timeout = 30
+        half_open_max_calls = 1
+        state_change_hooks = []
+
+    def __init__(self, **kw):
+        super(CircuitBreakerHandler, self).__init__(**kw)
+        self._circuits = {}
+        self._lock = threading.Lock()
+        self._hooks = list(self._meta.state_change_hooks)
+
+    def add_hook(self, func):
+        """
+        Register a function called as func(key, old_state, new_state)
+        whenever a circuit changes state.
+
+        """
+        self._hooks.append(func)
+
+    def get_state(self, key):
+        """Returns the state of the circuit for key."""
+        with self._lock:
+            if key not in self._circuits:
+                return CLOSED
+            return self._circuits[key].state
+
+    def get_key(self, host, resource=None):
+        if self._meta.key_by == 'resource' and resource is not None:
+            return resource
+        return host
+
+    def _get_circuit(self, key):
+        if key not in self._circuits:
+            self._circuits[key] = _Circuit(self._meta.window_size)
+        return self._circuits[key]
+
+    def _set_state(self, key, circuit, state, changes):
+        if circuit.state != state:
+            changes.append((key, circuit.state, state))
+            circuit.state = state
+            circuit.probes = 0
+            circuit.successes = 0
+            circuit.calls.clear()
+            if state == OPEN:
+                circuit.opened_at = clock.now()
+
+    def _run_hooks(self, changes):
+        for change in changes:
+            for func in self._hooks:
+                func(*change)
+
+    def before_request(self, key):
+        changes = []
+        with self._lock:
+            circuit = self._get_circuit(key)
+            if circuit.state == OPEN:
+                waited = clock.now() - circuit.opened_at
+                if waited < self._meta.open_timeout:
+                    raise exc.dRestCircuitOpenError(
+                        "Circuit for '%s' is open" % key, key,
+                        self._meta.open_timeout - waited)
+                self._set_state(key, circuit, HALF_OPEN, changes)
+
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self._meta.half_open_max_calls:
+                    raise exc.dRestCircuitOpenError(
+                        "Circuit for '%s' is half-open" % key, key, 0)
+                circuit.probes += 1
+        self._run_hooks(changes)
+
+    def is_failure(self, status=None, error=None):
+        """
+        Returns whether a request that ended with status (or error) counts
+        as a failure.
+
+        """
+        if error is not None:
+            return True
+        return status in self._meta.failure_statuses
+
+    def after_request(self, key, failed, duration):
+        slow = self._meta.slow_call_duration is not None and \
+               duration > self._meta.slow_call_duration
+        changes = []
+        with self._lock:
+            circuit = self._get_circuit(key)
+            if circuit.state == HALF_OPEN:
+                if failed or slow:
+                    self._set_state(key, circuit, OPEN, changes)
+                else:
+                    circuit.successes += 1
+                    if circuit.successes >= self._meta.half_open_max_calls:
+                        self._set_state(key, circuit, CLOSED, changes)
+
+            elif circuit.state == CLOSED:
+                circuit.calls.append((failed, slow))
+                total = len(circuit.calls)
+                if total >= self._meta.minimum_calls:
+                    failures = len([c for c in circuit.calls if c[0]])
+                    slows = len([c for c in circuit.calls if c[1]])
+                    if failures >= total * self._meta.failure_rate_threshold \
+                       or slows >= total * \
+                                   self._meta.slow_call_rate_threshold:
+                        self._set_state(key, circuit, OPEN, changes)
+        self._run_hooks(changes)
+
+    def release(self, key):
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is not None and circuit.state == HALF_OPEN and \
+               circuit.probes > 0:
+                circuit.probes -= 1
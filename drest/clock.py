@@ -0,0 +1,12 @@
+"""dRest clock."""
+
+import time
+
+# time.monotonic() is not available before Python 3.3
+now = getattr(time, 'monotonic', time.time)
+"""
+Returns the current time of a monotonic clock (seconds), used for every
+duration, deadline and timing measured by dRest.  Falls back to
+time.time() before Python 3.3.
+
+"""
@@ -0,0 +1,248 @@
+"""dRest columnar (dict of arrays / NumPy) collection builders."""
+
+import re
+import array
+
+try:
+    array.array('q')
+    _INT_TYPECODE = 'q'
+except ValueError: # pragma: no cover
+    _INT_TYPECODE = 'l' # pragma: no cover
+
+# TastyPie field types stored in typed buffers, everything else is kept in
+# lists (or object arrays)
+_TYPECODES = {
+    'integer': _INT_TYPECODE,
+    'float': 'd',
+    'decimal': 'd',
+    'boolean': 'b',
+    }
+
+_DTYPES = {
+    'integer': 'i8',
+    'float': 'f8',
+    'decimal': 'f8',
+    'boolean': '?',
+    'datetime': 'datetime64[us]',
+    'date': 'datetime64[D]',
+    }
+
+_TZ_OFFSET = re.compile(r'(Z|([+-])(\d{2}):?(\d{2}))$')
+
+def _to_float(value):
+    # TastyPie serializes decimals as strings
+    if value is None:
+        return value
+    return float(value)
+
+def _to_bool(value):
+    # numpy would silently store None as False
+    if value is None:
+        raise TypeError("None in a boolean column")
+    return value
+
+def _get_datetime_converter(numpy):
+    def to_datetime64(value):
+        """
+        Convert an ISO 8601 timestamp (with or without a timezone) to a
+        timezone naive UTC numpy.datetime64.
+
+        """
+        if value is None:
+            return numpy.datetime64('NaT', 'us')
+        match = _TZ_OFFSET.search(value)
+        if match is None:
+            return numpy.datetime64(value, 'us')
+        result = numpy.datetime64(value[:match.start()], 'us')
+        if match.group(2):
+            minutes = int(match.group(3)) * 60 + int(match.group(4))
+            if match.group(2) == '+':
+                minutes = -minutes
+            result = result + numpy.timedelta64(minutes, 'm')
+        return result
+    return to_datetime64
+
+class ColumnBuilder(object):
+    """
+    Accumulates the objects of a collection into one buffer per field,
+    without keeping the objects themselves.  Buffers are preallocated for
+    'capacity' rows and doubled when full.  Without numpy, numeric and
+    boolean fields are stored in array.array buffers and other fields in
+    lists.  With numpy, the buffers are numpy arrays with dtypes derived
+    from the schema, and timestamps with a timezone are converted to
+    (timezone naive) UTC.  A value that does not fit its buffer (i.e. a
+    None in an integer or boolean field) turns that column into a list (or
+    object array).
+
+    Required Arguments:
+
+        schema
+            The TastyPie schema of the resource (a dictionary with a
+            'fields' key), or just its 'fields' dictionary.
+
+    Optional Arguments:
+
+        fields
+            A list of the fields to collect.  Default: every field of the
+            schema.
+
+        capacity
+            The number of rows to preallocate.  Default: 1024.
+
+        numpy
+            Boolean.  Whether or not to use numpy arrays (requires numpy).
+            Default: False.
+
+    Usage:
+
+    .. code-block:: python
+
+        from drest.columnar import ColumnBuilder
+
+        builder = ColumnBuilder(api.users.schema, ['id', 'username'])
+        for user in api.users.iterate():
+            builder.append(user)
+        columns = builder.to_dict()
+
+    """
+    def __init__(self, schema, fields=None, capacity=1024, numpy=False):
+        schema_fields = schema.get('fields', schema)
+        if fields is None:
+            fields = sorted(schema_fields.keys())
+        self.names = list(fields)
+        self.types = []
+        self.nullable = []
+        for name in self.names:
+            field = schema_fields.get(name) or {}
+            self.types.append(field.get('type'))
+            self.nullable.append(field.get('nullable', False))
+
+        self.length = 0
+        self.capacity = max(1, int(capacity))
+        self._np = None
+        if numpy:
+            import numpy
+            self._np = numpy
+
+        self._columns = [self._new_column(i) for i in range(len(self.names))]
+        self._converters = [None] * len(self.names)
+        for i, field_type in enumerate(self.types):
+            if self._np is None:
+                if field_type == 'decimal':
+                    self._converters[i] = _to_float
+            elif field_type == 'boolean':
+                self._converters[i] = _to_bool
+            elif field_type == 'datetime':
+                self._converters[i] = _get_datetime_converter(self._np)
+
+    def __len__(self):
+        return self.length
+
+    def get_dtype(self, index):
+        """Returns the numpy dtype of the column at index."""
+        field_type = self.types[index]
+        if self.nullable[index]:
+            # numpy would silently turn None into False, and ints can not
+            # hold None at all
+            if field_type == 'integer':
+                return 'f8'
+            if field_type == 'boolean':
+                return 'O'
+        return _DTYPES.get(field_type, 'O')
+
+    def _new_column(self, index):
+        if self._np is not None:
+            return self._np.empty(self.capacity, dtype=self.get_dtype(index))
+        typecode = _TYPECODES.get(self.types[index])
+        if typecode is not None and not self.nullable[index]:
+            return array.array(typecode, [0]) * self.capacity
+        return [None] * self.capacity
+
+    def _grow(self):
+        extra = self.capacity
+        self.capacity += extra
+        for index, column in enumerate(self._columns):
+            if self._np is not None:
+                new = self._np.empty(self.capacity, dtype=column.dtype)
+                new[:self.length] = column[:self.length]
+                self._columns[index] = new
+            elif isinstance(column, array.array):
+                column.extend(array.array(column.typecode, [0]) * extra)
+            else:
+                column.extend([None] * extra)
+
+    def _promote(self, index):
+        column = self._columns[index]
+        if self._np is not None:
+            new = self._np.empty(self.capacity, dtype=object)
+            new[:self.length] = column[:self.length]
+        else:
+            new = list(column[:self.length])
+            new.extend([None] * (self.capacity - self.length))
+        self._columns[index] = new
+
+    def append(self, obj):
+        """
+        Add a row.  obj is a dictionary (or a drest.record.Record).
+
+        """
+        if self.length == self.capacity:
+            self._grow()
+        if isinstance(obj, dict):
+            get = obj.get
+        else:
+            get = obj._get
+
+        row = self.length
+        columns = self._columns
+        converters = self._converters
+        for index, name in enumerate(self.names):
+            value = get(name)
+            converter = converters[index]
+            if converter is not None:
+                try:
+                    value = converter(value)
+                except (TypeError, ValueError):
+                    # values are stored as they are from now on
+                    converters[index] = None
+                    self._promote(index)
+            try:
+                columns[index][row] = value
+            except (TypeError, ValueError, OverflowError):
+                # only the buffer is promoted, values are still converted
+                self._promote(index)
+                columns[index][row] = value
+        self.length += 1
+
+    def _trimmed(self, index):
+        column = self._columns[index]
+        if len(column) == self.length:
+            return column
+        if self._np is not None:
+            return column[:self.length].copy()
+        del column[self.length:]
+        self.capacity = self.length
+        return column
+
+    def to_dict(self):
+        """
+        Returns a dictionary of field name -> column (an array.array, list
+        or numpy array of length self.length).
+
+        """
+        return dict([(name, self._trimmed(index)) \
+                     for index, name in enumerate(self.names)])
+
+    def to_structured(self):
+        """Returns the rows as a numpy structured array (requires numpy)."""
+        if self._np is None:
+            import numpy
+            self._np = numpy
+        columns = [self._np.asarray(self._columns[i][:self.length]) \
+                   for i in range(len(self.names))]
+        dtype = [(str(name), columns[i].dtype) \
+                 for i, name in enumerate(self.names)]
+        result = self._np.empty(self.length, dtype=dtype)
+        for i, name in enumerate(self.names):
+            result[str(name)] = columns[i]
+        return result
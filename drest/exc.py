@@ -45,4 +45,26 @@ class dRestAPIError(dRestError):
     
     def __repr__(self):
         return "dRestAPIError: %s" % self.msg
-        
\ No newline at end of file
+
+class dRestCircuitOpenError(dRestError):
+    """dRest Circuit Breaker Errors (raised while a circuit is open)."""
+
+    def __init__(self, msg, key, retry_after):
+        super(dRestCircuitOpenError, self).__init__(msg)
+        self.key = key
+        self.retry_after = retry_after
+
+    def __repr__(self):
+        return "dRestCircuitOpenError: %s" % self.msg
+
+class dRestRateLimitError(dRestError):
+    """dRest Rate Limit Errors (raised instead of sending a request that
+    would exceed a rate limit)."""
+
+    def __init__(self, msg, key, retry_after):
+        super(dRestRateLimitError, self).__init__(msg)
+        self.key = key
+        self.retry_after = retry_after
+
+    def __repr__(self):
+        return "dRestRateLimitError: %s" % self.msg
@@ -0,0 +1,173 @@
+"""dRest request lifecycle hooks."""
+
+from . import clock
+
+HOOKS = [
+    'pre_request',
+    'post_serialize',
+    'pre_send',
+    'post_receive',
+    'post_deserialize',
+    'post_request',
+    'on_error',
+    ]
+"""
+The request lifecycle hooks, in the order they run.  Every hook function
+is called with a RequestContext.
+
+    pre_request
+        Before the url is built and the params are serialized.  Hooks can
+        still change context.method, context.url, context.params and
+        context.headers.
+
+    post_serialize
+        After the complete url and the payload were built.
+
+    pre_send
+        Before every attempt of sending the request (i.e. once more per
+        retry).  Headers added to context.headers are sent.
+
+    post_receive
+        After the raw response of an attempt was received
+        (context.res_headers and context.content).
+
+    post_deserialize
+        After the response content was deserialized.  With
+        Meta.lazy_deserialize that is on first access of response.data,
+        which might never happen.
+
+    post_request
+        After the response object passed handle_response()
+        (context.response).
+
+    on_error
+        When the request fails with an exc.dRestError (context.error), i.e.
+        a connection error or an error status raised by handle_response().
+
+"""
+
+def _duration(timings, start, end):
+    if start in timings and end in timings:
+        return timings[end] - timings[start]
+    return None
+
+class RequestContext(object):
+    """
+    The state of a single request, passed to every hook.  Only created when
+    hooks are registered.
+
+    Required Arguments:
+
+        method
+            The HTTP method of the request.
+
+        url
+            The url of the request (the complete url with query string once
+            post_serialize ran).
+
+    Optional Arguments:
+
+        params
+            Dictionary of the (one-time) parameters of the request.
+
+        headers
+            Dictionary of the headers of the request.
+
+    Besides these, a context has the following attributes, which are set
+    as the request progresses: payload, attempt, res_headers, content,
+    response, error, spans (the drest.tracing spans of the request by name)
+    and timings.  timings is a dictionary of monotonic timestamps (seconds)
+    by name, of which there are:
+
+        start
+            The request was made.
+
+        serialized
+            The url and payload were built.
+
+        send
+            The current attempt started sending.
+
+        connected
+            A connection was established (or checked out of a pool).
+
+        first_byte
+            The status line of the response was received.
+
+        received
+            The whole response was received.
+
+        deserialize_start / deserialized
+            The content was deserialized.
+
+    'connected' and 'first_byte' are recorded by
+    drest.transport.ConnectionPool and drest.aio.AsyncRequestHandler, but
+    not by the default httplib2 transport.  See self.phases for durations.
+
+    """
+    def __init__(self, method, url, params=None, headers=None):
+        self.method = method
+        self.url = url
+        self.params = params
+        self.headers = headers
+        self.payload = None
+        self.attempt = 0
+        self.res_headers = None
+        self.content = None
+        self.response = None
+        self.error = None
+        self.spans = {}
+        self.timings = {}
+        self.mark('start')
+
+    def mark(self, name):
+        """Record the monotonic timestamp of 'name' in self.timings."""
+        self.timings[name] = clock.now()
+
+    @property
+    def phases(self):
+        """
+        A dictionary of the duration (seconds, or None if unknown) of every
+        phase of the request:
+
+            serialize
+                Building the url and the payload.
+
+            connect
+                Establishing (or checking out) a connection.
+
+            ttfb
+                Time to first byte, from being connected (or sending if
+                unknown) to receiving the status line.
+
+            transfer
+                From the first byte to the whole response.
+
+            http
+                From sending to the whole response (all of the above but
+                serialize).
+
+            deserialize
+                Deserializing the content.
+
+            total
+                From start to the last timestamp recorded.
+
+        Retried requests only report the phases of the last attempt.
+
+        """
+        timings = self.timings
+        ttfb_start = 'connected' if 'connected' in timings else 'send'
+        return dict(
+            serialize=_duration(timings, 'start', 'serialized'),
+            connect=_duration(timings, 'send', 'connected'),
+            ttfb=_duration(timings, ttfb_start, 'first_byte'),
+            transfer=_duration(timings, 'first_byte', 'received'),
+            http=_duration(timings, 'send', 'received'),
+            deserialize=_duration(timings, 'deserialize_start',
+                                  'deserialized'),
+            total=max(timings.values()) - timings['start'],
+            )
+
+    def __repr__(self):
+        return '<RequestContext %s %s>' % (self.method, self.url)
@@ -0,0 +1,69 @@
+"""dRest debug logging."""
+
+import sys
+import logging
+
+LOG = logging.getLogger('drest')
+
+# the logger of request handlers with Meta.debug set, a child of LOG so that
+# enabling it does not turn on the debug log of every other request handler
+DEBUG_LOG = logging.getLogger('drest.debug')
+
+REDACTED = '<redacted>'
+
+class _StdoutHandler(logging.StreamHandler):
+    # looks up sys.stdout on every record, so that it follows redirection
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+def enable_debug(stream=None):
+    """
+    Enable the debug log of the 'drest.debug' logger (used by request
+    handlers with Meta.debug set, or DREST_DEBUG=1 in the environment) and
+    send it to stream (default: sys.stdout), unless the application already
+    configured a handler for the 'drest' logger.  The level of the 'drest'
+    logger itself, which the other request handlers log to, is not changed.
+
+    """
+    if not LOG.handlers and not DEBUG_LOG.handlers:
+        if stream is None:
+            handler = _StdoutHandler()
+        else:
+            handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('DREST_DEBUG: %(message)s'))
+        LOG.addHandler(handler)
+    if not DEBUG_LOG.isEnabledFor(logging.DEBUG):
+        DEBUG_LOG.setLevel(logging.DEBUG)
+
+def redact_headers(headers, names):
+    """
+    Returns a copy of headers (a dictionary) with the values of the headers
+    in names (compared case insensitively) replaced by '<redacted>'.
+
+    """
+    names = set([n.lower() for n in names])
+    return dict([(k, REDACTED if k.lower() in names else v) \
+                 for k, v in headers.items()])
+
+def truncate(payload, max_length=None):
+    """
+    Returns payload (a str or bytes) as text of at most max_length
+    characters, noting the size of what was cut off.
+
+    """
+    if payload is None:
+        return ''
+    size = len(payload)
+    if max_length is not None and size > max_length:
+        payload = payload[:max_length]
+    else:
+        max_length = None
+    if isinstance(payload, bytes) and not isinstance(payload, str):
+        payload = payload.decode('utf-8', 'replace')
+    if max_length is not None:
+        payload = '%s... (%d bytes)' % (payload, size)
+    return payload
@@ -13,7 +13,61 @@ class Meta(object):
     def _merge(self, dict_obj):
         for key, value in dict_obj.items():
             setattr(self, key, value)
-            
+
+    def __repr__(self):
+        return '<Meta %s>' % ' '.join(['%s=%r' % item for item in \
+                                       sorted(self.__dict__.items())])
+
+# merged Meta defaults by class, see get_class_meta()
+_class_metas = {}
+
+def get_class_meta(cls):
+    """
+    Returns the merged Meta defaults of cls (a dictionary), which are
+    computed on first use and cached per class.  Meta classes are therefore
+    read only once: changing their attributes afterwards has no effect on
+    new instances until clear_meta_cache() is called.
+
+    """
+    try:
+        return _class_metas[cls]
+    except KeyError:
+        pass
+
+    # Get a List of all the Classes we in our MRO, find any attribute named
+    #     Meta on them, and then merge them together in order of MRO
+    metas = reversed([x.Meta for x in cls.mro() if hasattr(x, "Meta")])
+    final_meta = {}
+
+    # Merge the Meta classes into one dict
+    for meta in metas:
+        final_meta.update(dict([x for x in list(meta.__dict__.items()) \
+                                   if not x[0].startswith("_")]))
+
+    _class_metas[cls] = final_meta
+    return final_meta
+
+def clear_meta_cache(cls=None):
+    """
+    Drop the cached Meta defaults of cls (and of its subclasses), or of
+    every class if cls is None.  Call this after changing the attributes of
+    a Meta class at runtime, so that new instances pick the change up.
+
+    Usage:
+
+    .. code-block:: python
+
+        drest.request.RequestHandler.Meta.timeout = 30
+        drest.meta.clear_meta_cache(drest.request.RequestHandler)
+
+    """
+    if cls is None:
+        _class_metas.clear()
+        return
+    for key in list(_class_metas.keys()):
+        if issubclass(key, cls):
+            _class_metas.pop(key, None)
+
 class MetaMixin(object):
     """
     Mixin that provides the Meta class support to add settings to instances
@@ -22,23 +76,15 @@ class MetaMixin(object):
     """
 
     def __init__(self, *args, **kw):
-        # Get a List of all the Classes we in our MRO, find any attribute named
-        #     Meta on them, and then merge them together in order of MRO
-        metas = reversed([x.Meta for x in self.__class__.mro() \
-                                  if hasattr(x, "Meta")])
-        final_meta = {}
-
-        # Merge the Meta classes into one dict
-        for meta in metas:
-            final_meta.update(dict([x for x in list(meta.__dict__.items()) \
-                                       if not x[0].startswith("_")]))
+        final_meta = dict(get_class_meta(self.__class__))
 
         # Update the final Meta with any kw passed in
-        for key in list(final_meta.keys()):
-            if key in kw:
-                final_meta[key] = kw.pop(key)
+        for key in kw:
+            if key in final_meta:
+                final_meta[key] = kw[key]
 
-        self._meta = Meta(**final_meta)
+        self._meta = Meta.__new__(Meta)
+        self._meta.__dict__.update(final_meta)
 
         # FIX ME: object.__init__() doesn't take params without exception
-        super(MetaMixin, self).__init__()
\ No newline at end of file
+        super(MetaMixin, self).__init__()
@@ -0,0 +1,380 @@
+"""dRest in-process request metrics."""
+
+import sys
+import bisect
+import threading
+
+if sys.version_info[0] < 3:
+    from urlparse import urlsplit # pragma: no cover
+else:
+    from urllib.parse import urlsplit # pragma: no cover
+
+from . import exc
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+
+DURATION_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                    10.0]
+"""Default buckets (seconds) of the request duration histogram."""
+
+SIZE_BUCKETS = [100, 1000, 10000, 100000, 1000000, 10000000]
+"""Default buckets (bytes) of the request and response size histograms."""
+
+REQUEST_LABELS = ('api', 'resource', 'method')
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+                     .replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = ['%s="%s"' % (n, _escape(v)) for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append('%s="%s"' % extra)
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join(pairs)
+
+def _format_value(value):
+    if isinstance(value, float):
+        if value == int(value) and abs(value) < 1e15:
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+class _Metric(object):
+    def __init__(self, kind, name, help, labels, buckets=None):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = list(buckets or [])
+
+class MetricsRegistry(object):
+    """
+    A thread safe, in-process registry of counters and fixed bucket
+    histograms.  Every thread records into its own shard without taking a
+    lock, and shards are only merged when the metrics are read (snapshot()
+    or render()).  A single registry can be shared by any number of
+    threads and API/RequestHandler objects.
+
+    Out of the box it defines the request metrics recorded by request
+    handlers that have it set as Meta.metrics_registry:
+
+        drest_requests_total{api,resource,method,status}
+            Counter of the HTTP requests made (every attempt).
+
+        drest_request_errors_total{api,resource,method,status}
+            Counter of failed requests, where status is the HTTP status
+            (400 and above) or the name of the exception if no response
+            was received.
+
+        drest_request_duration_seconds{api,resource,method}
+            Histogram of the time from sending a request to having received
+            the whole response.
+
+        drest_request_size_bytes{api,resource,method}
+            Histogram of the size of request bodies.
+
+        drest_response_size_bytes{api,resource,method}
+            Histogram of the size of response bodies.
+
+    'api' is the host of the request url (or Meta.metrics_api_name), and
+    'resource' the name of the resource added with api.add_resource() (or
+    an empty string).
+
+    Optional Arguments:
+
+        duration_buckets
+            The upper bounds (seconds) of the duration histogram buckets.
+            Default: drest.metrics.DURATION_BUCKETS.
+
+        size_buckets
+            The upper bounds (bytes) of the size histogram buckets.
+            Default: drest.metrics.SIZE_BUCKETS.
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.metrics import MetricsRegistry
+
+        metrics = MetricsRegistry()
+        api = drest.API('http://localhost:8000/api/v1/',
+                        metrics_registry=metrics)
+        api.add_resource('users')
+        api.users.get()
+
+        # i.e. served on /metrics for Prometheus to scrape
+        print(metrics.render())
+
+    """
+    def __init__(self, duration_buckets=None, size_buckets=None):
+        if duration_buckets is None:
+            duration_buckets = DURATION_BUCKETS
+        if size_buckets is None:
+            size_buckets = SIZE_BUCKETS
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+        self._merged = {}
+        # bumped by reset(), shards of older generations are dropped
+        self._generation = 0
+
+        self.register_counter('drest_requests_total',
+                              'HTTP requests made.',
+                              REQUEST_LABELS + ('status',))
+        self.register_counter('drest_request_errors_total',
+                              'HTTP requests that failed.',
+                              REQUEST_LABELS + ('status',))
+        self.register_histogram('drest_request_duration_seconds',
+                                'Duration of HTTP requests.',
+                                REQUEST_LABELS, duration_buckets)
+        self.register_histogram('drest_request_size_bytes',
+                                'Size of HTTP request bodies.',
+                                REQUEST_LABELS, size_buckets)
+        self.register_histogram('drest_response_size_bytes',
+                                'Size of HTTP response bodies.',
+                                REQUEST_LABELS, size_buckets)
+
+    def register_counter(self, name, help, labels=()):
+        """
+        Define a counter.
+
+        Required Arguments:
+
+            name
+                The metric name.
+
+            help
+                A description of the metric.
+
+        Optional Arguments:
+
+            labels
+                A tuple of label names.
+
+        """
+        self._metrics[name] = _Metric(COUNTER, name, help, labels)
+
+    def register_histogram(self, name, help, labels=(), buckets=None):
+        """
+        Define a histogram with fixed buckets.  Takes the same arguments as
+        register_counter(), plus buckets (a sorted list of upper bounds,
+        default: drest.metrics.DURATION_BUCKETS).
+
+        """
+        if buckets is None:
+            buckets = DURATION_BUCKETS
+        self._metrics[name] = _Metric(HISTOGRAM, name, help, labels,
+                                      sorted(buckets))
+
+    def _get_shard(self):
+        local = self._local
+        if getattr(local, 'generation', None) == self._generation:
+            return local.shard
+        shard = {}
+        with self._lock:
+            generation = self._generation
+            self._shards.append((threading.current_thread(), shard))
+        local.shard = shard
+        local.generation = generation
+        return shard
+
+    def _get_metric(self, name, kind):
+        metric = self._metrics.get(name)
+        if metric is None or metric.kind != kind:
+            raise exc.dRestAPIError("Unknown %s '%s'" % (kind, name))
+        return metric
+
+    def inc(self, name, labels=(), value=1):
+        """
+        Increment a counter.
+
+        Required Arguments:
+
+            name
+                The counter name.
+
+        Optional Arguments:
+
+            labels
+                A tuple of label values (in the order of the label names).
+
+            value
+                The amount to increment by.  Default: 1.
+
+        """
+        self._get_metric(name, COUNTER)
+        shard = self._get_shard()
+        key = (name, tuple(labels))
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name, labels=(), value=0):
+        """
+        Record a value in a histogram.  Takes the same arguments as inc().
+
+        """
+        metric = self._get_metric(name, HISTOGRAM)
+        shard = self._get_shard()
+        key = (name, tuple(labels))
+        counts = shard.get(key)
+        if counts is None:
+            # a count per bucket, then +Inf, sum and count
+            counts = shard[key] = [0] * (len(metric.buckets) + 1) + [0, 0]
+        counts[bisect.bisect_left(metric.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    def _merge_into(self, target, shard):
+        for key, value in list(shard.items()):
+            if isinstance(value, list):
+                if key in target:
+                    target[key] = [a + b for a, b in zip(target[key], value)]
+                else:
+                    target[key] = list(value)
+            else:
+                target[key] = target.get(key, 0) + value
+
+    def _collect(self):
+        with self._lock:
+            # shards of threads that are gone can not change anymore
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    self._merge_into(self._merged, shard)
+            self._shards = alive
+            merged = {}
+            self._merge_into(merged, self._merged)
+            for thread, shard in alive:
+                self._merge_into(merged, dict(shard))
+        return merged
+
+    def snapshot(self):
+        """
+        Returns the current value of every metric as a dictionary of
+        metric name -> list of samples.  Counter samples are dictionaries
+        with 'labels' and 'value', histogram samples have 'labels',
+        'buckets' (a list of [upper bound, cumulative count], the last one
+        being float('inf')), 'sum' and 'count'.
+
+        """
+        merged = self._collect()
+        result = dict([(name, []) for name in self._metrics])
+        for (name, values), value in sorted(merged.items(),
+                                            key=lambda item: item[0]):
+            metric = self._metrics[name]
+            labels = dict(zip(metric.labels, values))
+            if metric.kind == COUNTER:
+                result[name].append(dict(labels=labels, value=value))
+                continue
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(metric.buckets + [float('inf')],
+                                    value[:-2]):
+                cumulative += count
+                buckets.append([bound, cumulative])
+            result[name].append(dict(labels=labels, buckets=buckets,
+                                     sum=value[-2], count=value[-1]))
+        return result
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        for name in sorted(snapshot.keys()):
+            metric = self._metrics[name]
+            lines.append('# HELP %s %s' % (name, metric.help))
+            lines.append('# TYPE %s %s' % (name, metric.kind))
+            for sample in snapshot[name]:
+                values = [sample['labels'][n] for n in metric.labels]
+                if metric.kind == COUNTER:
+                    lines.append('%s%s %s' % (
+                        name, _format_labels(metric.labels, values),
+                        _format_value(sample['value'])))
+                    continue
+                for bound, count in sample['buckets']:
+                    if bound == float('inf'):
+                        le = '+Inf'
+                    else:
+                        le = _format_value(bound)
+                    lines.append('%s_bucket%s %s' % (
+                        name, _format_labels(metric.labels, values,
+                                             ('le', le)),
+                        count))
+                labels = _format_labels(metric.labels, values)
+                lines.append('%s_sum%s %s' % (name, labels,
+                                              _format_value(sample['sum'])))
+                lines.append('%s_count%s %s' % (name, labels,
+                                                sample['count']))
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """
+        Drop all recorded values.  The shards of other threads are not
+        touched (they might be writing to them), but replaced: every thread
+        starts a new shard on its next update.
+
+        """
+        with self._lock:
+            self._generation += 1
+            self._shards = []
+            self._merged = {}
+
+    def instrument(self, request_handler, api_name=None):
+        """
+        Record the request metrics of every request made by
+        request_handler (called by request handlers that have
+        Meta.metrics_registry set).  Uses the lifecycle hooks of the request
+        handler.
+
+        Required Arguments:
+
+            request_handler
+                The (instantiated) request handler.
+
+        Optional Arguments:
+
+            api_name
+                The value of the 'api' label.  Default: the host of the
+                request url.
+
+        """
+        def get_labels(context):
+            api = api_name
+            if api is None:
+                api = urlsplit(context.url).netloc
+            resource = request_handler.get_resource_name(context.url)
+            return (api, resource or '', context.method)
+
+        def post_receive(context):
+            labels = get_labels(context)
+            status = context.res_headers['status']
+            self.inc('drest_requests_total', labels + (status,))
+            if int(status) >= 400:
+                self.inc('drest_request_errors_total', labels + (status,))
+            timings = context.timings
+            self.observe('drest_request_duration_seconds', labels,
+                         timings['received'] - timings['send'])
+            self.observe('drest_request_size_bytes', labels,
+                         len(context.payload or ''))
+            content = context.content
+            if hasattr(content, 'read'):
+                size = int(context.res_headers.get('content-length', 0))
+            else:
+                size = len(content or '')
+            self.observe('drest_response_size_bytes', labels, size)
+
+        def on_error(context):
+            # error responses were counted by post_receive already
+            if isinstance(context.error, exc.dRestRequestError):
+                return
+            self.inc('drest_request_errors_total',
+                     get_labels(context) + (type(context.error).__name__,))
+
+        request_handler.add_hook('post_receive', post_receive)
+        request_handler.add_hook('on_error', on_error)
@@ -0,0 +1,276 @@
+"""dRest client side rate limit handlers."""
+
+import time
+import threading
+
+from . import exc, clock, interface, meta
+from .retry import parse_retry_after
+
+def validate(obj):
+    """Validates a handler implementation against the IRateLimit
+    interface."""
+    members = [
+        'get_key',
+        'acquire',
+        'update',
+        ]
+    interface.validate(IRateLimit, obj, members)
+
+class IRateLimit(interface.Interface):
+    """
+    This class defines the Rate Limit Handler Interface.  Classes that
+    implement this handler must provide the methods and attributes defined
+    below.
+
+    All implementations must provide sane 'default' functionality when
+    instantiated with no arguments.  Meaning, it can and should accept
+    optional parameters that alter how it functions, but can not require
+    any parameters.
+
+    Implementations do *not* subclass from interfaces.
+
+    """
+
+    def get_key(host, resource=None):
+        """
+        Return the key that a request is limited under.
+
+        Required Arguments:
+
+            host
+                The host (and port) of the request url.
+
+        Optional Arguments:
+
+            resource
+                The name of the resource the request belongs to, if known.
+
+        """
+
+    def acquire(key):
+        """
+        Called before every attempt of a request.  Reserves a slot for the
+        request and returns the seconds the caller must wait before sending
+        it (0 to send it right away).  Raises exc.dRestRateLimitError
+        instead if the request should not be sent at all.  Must not block,
+        so that the caller can wait without blocking an event loop.
+
+        """
+
+    def update(key, status, res_headers):
+        """
+        Called with the status and headers of every response, so that the
+        limits can adapt to what the server reports.
+
+        """
+
+def _parse_number(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+class _Bucket(object):
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = clock.now()
+        self.blocked_until = None
+        self.remaining = None
+        self.reset_at = None
+
+class RateLimitHandler(meta.MetaMixin):
+    """
+    This handler implements the IRateLimit interface with a token bucket
+    per key (host or resource): every request takes a token, and tokens are
+    refilled at 'rate' per second up to 'burst'.  On top of that it honors
+    what the server reports:
+
+        * a Retry-After header on a 429 or 503 response holds back every
+          request under the key until it has passed.
+        * X-RateLimit-Remaining / X-RateLimit-Reset headers are tracked, and
+          once the remaining quota is used up requests are held back until
+          the reset (either epoch seconds or seconds from now).
+
+    Requests that have to wait either wait (block), or fail fast with
+    exc.dRestRateLimitError before anything is sent.
+
+    Optional Arguments / Meta:
+
+        rate
+            The number of requests per second (per key).  Default: None (no
+            client side limit, only the server headers are honored).
+
+        burst
+            The number of requests that can be made at once after being
+            idle.  Default: None (the rate, but at least 1).
+
+        key_by
+            One of ['host', 'resource'].  Requests to urls that do not
+            belong to a resource added with api.add_resource() fall back to
+            the host.  Default: 'host'.
+
+        resource_rates
+            A dictionary of resource name -> requests per second.  Requests
+            of these resources are limited by their own bucket, regardless
+            of key_by.  Default: {}.
+
+        block
+            Boolean.  Whether or not to wait when a request is limited.  If
+            False, exc.dRestRateLimitError is raised instead.  Default: True.
+
+        max_wait
+            Seconds.  A request that would have to wait longer than this
+            raises exc.dRestRateLimitError instead.  Default: None (no
+            limit).
+
+        honor_headers
+            Boolean.  Whether or not to adapt to the rate limit headers of
+            responses.  Default: True.
+
+        remaining_header
+            The (lowercase) name of the header holding the remaining quota.
+            Default: 'x-ratelimit-remaining'.
+
+        reset_header
+            The (lowercase) name of the header holding when the quota is
+            reset.  Default: 'x-ratelimit-reset'.
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.ratelimit import RateLimitHandler
+
+        api = drest.API('http://localhost:8000/api/v1/',
+                        rate_limit_handler=RateLimitHandler,
+                        rate=10, resource_rates=dict(search=1))
+
+    """
+    class Meta:
+        rate = None
+        burst = None
+        key_by = 'host'
+        resource_rates = {}
+        block = True
+        max_wait = None
+        honor_headers = True
+        remaining_header = 'x-ratelimit-remaining'
+        reset_header = 'x-ratelimit-reset'
+
+    def __init__(self, **kw):
+        super(RateLimitHandler, self).__init__(**kw)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def get_key(self, host, resource=None):
+        if resource is not None and \
+           (self._meta.key_by == 'resource' or \
+            resource in self._meta.resource_rates):
+            return resource
+        return host
+
+    def _get_bucket(self, key):
+        if key not in self._buckets:
+            rate = self._meta.resource_rates.get(key, self._meta.rate)
+            burst = self._meta.burst
+            if burst is None:
+                burst = max(1, rate or 0)
+            self._buckets[key] = _Bucket(rate, burst)
+        return self._buckets[key]
+
+    def get_wait(self, key):
+        """
+        Returns the seconds a request under key would have to wait now,
+        without reserving anything.
+
+        """
+        with self._lock:
+            return self._get_wait(self._get_bucket(key), clock.now())[0]
+
+    def _get_wait(self, bucket, now):
+        wait = 0.0
+        if bucket.blocked_until is not None:
+            if now < bucket.blocked_until:
+                wait = bucket.blocked_until - now
+            else:
+                bucket.blocked_until = None
+
+        if bucket.remaining is not None:
+            if now >= bucket.reset_at:
+                bucket.remaining = None
+                bucket.reset_at = None
+            elif bucket.remaining <= 0:
+                wait = max(wait, bucket.reset_at - now)
+
+        tokens = bucket.tokens
+        if bucket.rate:
+            elapsed = now - bucket.updated
+            tokens = min(bucket.burst, tokens + elapsed * bucket.rate)
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) / bucket.rate)
+        return (wait, tokens)
+
+    def acquire(self, key):
+        with self._lock:
+            bucket = self._get_bucket(key)
+            now = clock.now()
+            wait, tokens = self._get_wait(bucket, now)
+            if wait > 0 and (not self._meta.block or \
+                             (self._meta.max_wait is not None and \
+                              wait > self._meta.max_wait)):
+                raise exc.dRestRateLimitError(
+                    "Rate limit for '%s' exceeded" % key, key, wait)
+
+            # reserve the slot, later callers queue up behind it
+            if bucket.rate:
+                bucket.tokens = tokens - 1
+                bucket.updated = now
+            if bucket.remaining is not None:
+                bucket.remaining -= 1
+            return wait
+
+    def _get_reset(self, value):
+        reset = _parse_number(value)
+        if reset is None:
+            return None
+        if reset > 1000000000:
+            # epoch seconds rather than seconds from now
+            reset = reset - time.time()
+        return max(0.0, reset)
+
+    def update(self, key, status, res_headers):
+        if not self._meta.honor_headers:
+            return
+
+        retry_after = None
+        if status in (429, 503):
+            retry_after = parse_retry_after(res_headers.get('retry-after'))
+        remaining = _parse_number(res_headers.get(self._meta.remaining_header))
+        reset = self._get_reset(res_headers.get(self._meta.reset_header))
+        if retry_after is None and (remaining is None or reset is None):
+            return
+
+        with self._lock:
+            bucket = self._get_bucket(key)
+            now = clock.now()
+            if retry_after is not None:
+                blocked_until = now + retry_after
+                if bucket.blocked_until is None or \
+                   blocked_until > bucket.blocked_until:
+                    bucket.blocked_until = blocked_until
+
+            if remaining is not None and reset is not None:
+                reset_at = now + reset
+                if bucket.reset_at is None or reset_at > bucket.reset_at + 1:
+                    # a new quota window
+                    bucket.remaining = remaining
+                    bucket.reset_at = reset_at
+                else:
+                    # responses of concurrent requests arrive out of order,
+                    # and requests in flight already took from the quota
+                    bucket.remaining = min(bucket.remaining, remaining)
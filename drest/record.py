@@ -0,0 +1,159 @@
+"""dRest compact record objects generated from TastyPie schemas."""
+
+import re
+import keyword
+
+_IDENTIFIER = re.compile(r'^[A-Za-z][A-Za-z0-9_]*$')
+
+class Record(object):
+    """
+    Base class of the record classes created by make_record_class().  A
+    record holds the fields of the schema in __slots__ (so rows cost a
+    fraction of the memory of a dict) and every other field of the object
+    it was created from in '_extra' (None if there are none).
+
+    Fields are accessed as attributes, or by key like a dict:
+
+    .. code-block:: python
+
+        user.username
+        user['username']
+        user._get('nickname', 'n/a')
+        user._asdict()
+
+    Fields missing from the object are None.
+
+    """
+    __slots__ = ('_extra',)
+
+    _fields = ()
+    """The names of the schema fields (in __slots__ order)."""
+
+    _field_types = {}
+    """Dictionary of the schema type (i.e. 'integer') of every field."""
+
+    _field_set = frozenset()
+
+    def __init__(self, **kw):
+        self._extra = None
+        for name in self._fields:
+            setattr(self, name, kw.pop(name, None))
+        if kw:
+            self._extra = kw
+
+    @classmethod
+    def _from_dict(cls, dict_obj):
+        """Create a record from a (deserialized) dictionary."""
+        obj = cls.__new__(cls)
+        get = dict_obj.get
+        for name in cls._fields:
+            setattr(obj, name, get(name))
+        if cls._field_set.issuperset(dict_obj):
+            obj._extra = None
+        else:
+            obj._extra = dict([(k, v) for k, v in dict_obj.items() \
+                               if k not in cls._field_set])
+        return obj
+
+    def __getattr__(self, name):
+        # only called for attributes that are not slots (unknown fields)
+        extra = object.__getattribute__(self, '_extra')
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError("'%s' object has no attribute '%s'" % \
+                             (self.__class__.__name__, name))
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            return getattr(self, key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._field_set or \
+               (self._extra is not None and key in self._extra)
+
+    def _get(self, key, default=None):
+        """Like dict.get()."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def _asdict(self):
+        """Returns the record as a dictionary."""
+        dict_obj = dict([(name, getattr(self, name)) \
+                         for name in self._fields])
+        if self._extra is not None:
+            dict_obj.update(self._extra)
+        return dict_obj
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other._asdict()
+        return self._asdict() == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__,
+                           ', '.join(['%s=%r' % item for item in \
+                                      sorted(self._asdict().items())]))
+
+def _is_slot_name(name):
+    return bool(_IDENTIFIER.match(name)) and not hasattr(Record, name) \
+           and not keyword.iskeyword(name)
+
+def make_record_class(name, schema):
+    """
+    Create a Record subclass with a slot for every field of a TastyPie
+    schema.  Fields whose names can not be attributes (i.e. they are not
+    identifiers or clash with Record methods) end up in '_extra', as do
+    fields that are not part of the schema.
+
+    Required Arguments:
+
+        name
+            The name of the class (i.e. the resource name).
+
+        schema
+            The TastyPie schema of the resource (a dictionary with a
+            'fields' key), or just its 'fields' dictionary.
+
+    Usage:
+
+    .. code-block:: python
+
+        from drest.record import make_record_class
+
+        User = make_record_class('User', api.users.schema)
+        users = [User._from_dict(u) for u in response.data['objects']]
+
+    """
+    fields = schema.get('fields', schema)
+    names = sorted([n for n in fields if _is_slot_name(n)])
+    field_types = dict([(n, fields[n].get('type') \
+                         if isinstance(fields[n], dict) else None) \
+                        for n in names])
+
+    attrs = dict(
+        __slots__=tuple(names),
+        _fields=tuple(names),
+        _field_types=field_types,
+        _field_set=frozenset(names),
+        )
+    return type(str(name), (Record,), attrs)
+
+def to_records(record_class, objects):
+    """
+    Convert a list of dictionaries to a list of record_class records
+    (objects that already are records are kept as is).
+
+    """
+    from_dict = record_class._from_dict
+    return [obj if isinstance(obj, Record) else from_dict(obj) \
+            for obj in objects]
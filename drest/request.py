@@ -5,17 +5,23 @@ import sys
 if sys.version_info[0] < 3:
     import httplib # pragma: no cover
     from urllib import urlencode # pragma: no cover
+    from urlparse import urlsplit # pragma: no cover
     from urllib2 import urlopen # pragma: no cover
 
 else:
     from http import client as httplib # pragma: no cover
-    from urllib.parse import urlencode # pragma: no cover
+    from urllib.parse import urlencode, urlsplit # pragma: no cover
     from urllib.request import urlopen # pragma: no cover
 
+import time
+import random
 import socket
+import logging
+import threading
 from httplib2 import Http, ServerNotFoundError
 
-from . import exc, interface, meta, serialization, response
+from . import exc, interface, meta, serialization, response, transport
+from . import auth, cache, retry, circuit, ratelimit, hooks, log, clock
 
 def validate(obj):
     """Validates a handler implementation against the IRequest interface."""
@@ -144,7 +150,26 @@ class RequestHandler(meta.MetaMixin):
     Optional Arguments / Meta:
 
         debug
-            Boolean.  Toggle debug console output.  Default: False.
+            Boolean.  Toggle debug console output, by sending the debug log
+            of this request handler (the 'drest.debug' logger) to stdout
+            (see drest.log.enable_debug()).  Other request handlers are not
+            affected.  Setting DREST_DEBUG=1 in the environment does the
+            same.  The log of every request handler can also be enabled
+            with the logging configuration of the application instead (the
+            DEBUG level of the 'drest' logger).  Default: False.
+
+        debug_sample_rate
+            The fraction (0.0 - 1.0) of requests that are logged.
+            Default: 1.0.
+
+        debug_max_payload
+            The maximum number of characters of a request payload that are
+            logged (None for no limit).  Default: 1024.
+
+        debug_redact_headers
+            A list of header names whose values are logged as
+            '<redacted>'.  Default: ['Authorization', 'Proxy-Authorization',
+            'Cookie', 'X-Api-Key'].
 
         ignore_ssl_validation
             Boolean.  Whether or not to ignore ssl validation errors.
@@ -159,6 +184,17 @@ class RequestHandler(meta.MetaMixin):
             serialize/deserialize data.
             Default: drest.serialization.JsonSerializationHandler.
 
+        accept_serialization_handlers
+            A list of un-instantiated Serialization Handler classes (i.e.
+            drest.serialization.MsgPackSerializationHandler) whose formats
+            are preferred for responses.  Their media types are sent in the
+            Accept header ahead of the one of serialization_handler, and
+            every response is deserialized by the handler matching its
+            Content-Type (falling back to serialization_handler when the
+            server does not support any of them).  Handlers whose library
+            is not installed are skipped.  Request bodies are always
+            serialized with serialization_handler.  Default: []
+
         serialize
             Boolean.  Whether or not to serialize data before sending
             requests.  Default: False.
@@ -167,6 +203,18 @@ class RequestHandler(meta.MetaMixin):
             Boolean.  Whether or not to deserialize data before returning
             the Response object.  Default: True.
 
+        lazy_deserialize
+            Boolean.  Whether or not to defer deserialization until the
+            'data' attribute of the response is first accessed, so that
+            callers only checking 'status' or 'headers' never parse the
+            body.  Deserialization errors are then raised on that access
+            rather than by make_request(), and the post_deserialize hooks
+            run after post_request.  Default: False.
+
+        release_raw_content
+            Boolean.  Whether or not a lazily deserialized response drops
+            its raw content (response.raw) once parsed.  Default: True.
+
         trailing_slash
             Boolean.  Whether or not to append a trailing slash to the
             request url.  Default: True.
@@ -175,29 +223,146 @@ class RequestHandler(meta.MetaMixin):
             The amount of seconds where a request should timeout.
             Default: None
 
+        transport
+            An *instantiated* transport object implementing the ITransport
+            interface (i.e. drest.transport.ConnectionPool) used in place of
+            the default per handler httplib2.Http() object.  Unlike
+            httplib2.Http(), transports can be shared between threads and
+            request handlers.  Credentials set with set_auth_credentials()
+            are sent as HTTP Basic Authorization.  Default: None
+
+        cache_handler
+            An un-instantiated Cache Handler class (i.e.
+            drest.cache.LRUCacheHandler) used to cache deserialized GET
+            responses that carry an ETag or Last-Modified header.  Later GETs
+            of the same url send If-None-Match / If-Modified-Since, and a 304
+            Not Modified returns the cached response object without
+            re-parsing.  PUT, PATCH, POST and DELETE requests invalidate
+            cached entries under the same resource path.  Default: None
+
+        retry_handler
+            An un-instantiated Retry Handler class (i.e.
+            drest.retry.RetryHandler) that decides whether, and after how
+            long, a request that failed with a connection error, a timeout
+            or a retryable status code is attempted again.  Default: None
+            (no retries).
+
+        circuit_breaker_handler
+            An un-instantiated Circuit Breaker Handler class (i.e.
+            drest.circuit.CircuitBreakerHandler) that tracks failures per
+            host (or resource) and fails fast with
+            exc.dRestCircuitOpenError while the circuit is open.
+            Default: None
+
+        auth_handler
+            An un-instantiated Authentication Handler class (i.e.
+            drest.auth.BasicAuthHandler or drest.auth.DigestAuthHandler)
+            that builds the Authorization header from the credentials set
+            with set_auth_credentials(), without waiting for a 401
+            challenge first.  By default httplib2 authenticates after a
+            challenge, and transports send HTTP Basic.  Default: None
+
+        coalesce_requests
+            Boolean.  Whether or not identical GET requests (same url,
+            query and headers, including authorization) made concurrently
+            share a single in-flight HTTP request.  The first caller makes
+            the request, and every caller waiting on it gets the same
+            response object (or exception).  Default: False
+
+        rate_limit_handler
+            An un-instantiated Rate Limit Handler class (i.e.
+            drest.ratelimit.RateLimitHandler) that throttles requests per
+            host (or resource) before they are sent, and adapts to the rate
+            limit headers of responses.  Requests wait, or fail with
+            exc.dRestRateLimitError.  Default: None
+
+        hooks
+            A dictionary of hook name -> list of functions, registered with
+            add_hook().  See drest.hooks.HOOKS for the hook names.
+            Default: {}
+
+        metrics_registry
+            An *instantiated* drest.metrics.MetricsRegistry that request
+            counts, errors, latencies and sizes of every request are
+            recorded in (labelled by api, resource and method).  Like
+            transports, a registry can be shared between threads and
+            request handlers.  Default: None
+
+        metrics_api_name
+            The value of the 'api' label of the request metrics.
+            Default: None (the host of the request url).
+
+        tracer
+            An *instantiated* drest.tracing.Tracer that creates a span (with
+            serialize, transport and deserialize child spans) for every
+            sampled request, and sends the W3C traceparent and tracestate
+            headers along with it.  Default: None
+
+        slow_request_log
+            An *instantiated* drest.slowlog.SlowRequestLog that requests
+            exceeding its threshold (or among its top N slowest) are
+            recorded in, along with their phase timings.  Default: None
+
     """
     class Meta:
         debug = False
+        debug_sample_rate = 1.0
+        debug_max_payload = 1024
+        debug_redact_headers = ['Authorization', 'Proxy-Authorization',
+                                'Cookie', 'X-Api-Key']
         ignore_ssl_validation = False
         response_handler = response.ResponseHandler
         serialization_handler = serialization.JsonSerializationHandler
+        accept_serialization_handlers = []
         serialize = False
         deserialize = True
+        lazy_deserialize = False
+        release_raw_content = True
         trailing_slash = True
         allow_get_body = False
         timeout = None
+        transport = None
+        cache_handler = None
+        retry_handler = None
+        circuit_breaker_handler = None
+        auth_handler = None
+        coalesce_requests = False
+        rate_limit_handler = None
+        hooks = {}
+        metrics_registry = None
+        metrics_api_name = None
+        tracer = None
+        slow_request_log = None
 
     def __init__(self, **kw):
         super(RequestHandler, self).__init__(**kw)
         self._extra_params = {}
         self._extra_url_params = {}
         self._extra_headers = {}
+        self._extra_version = 0
         self._auth_credentials = ()
-        self._http = None
+        self._resources = {}
+        self._http_local = threading.local()
+        self._http_generation = 0
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._hooks = {}
+        for name in self._meta.hooks:
+            for func in self._meta.hooks[name]:
+                self.add_hook(name, func)
+        if self._meta.metrics_registry is not None:
+            self._meta.metrics_registry.instrument(
+                self, self._meta.metrics_api_name)
+        if self._meta.tracer is not None:
+            self._meta.tracer.instrument(self)
+        if self._meta.slow_request_log is not None:
+            self._meta.slow_request_log.instrument(self)
 
         if 'DREST_DEBUG' in os.environ and \
            os.environ['DREST_DEBUG'] in [1, '1']:
             self._meta.debug = True
+        if self._meta.debug:
+            log.enable_debug()
 
         response.validate(self._meta.response_handler)
         if self._meta.serialization_handler:
@@ -210,15 +375,81 @@ class RequestHandler(meta.MetaMixin):
             self._meta.serialize = False
             self._meta.deserialize = False
 
+        self._accept_serialization = []
+        if self._meta.deserialize:
+            self._setup_accept_serialization(**kw)
+
+        if self._meta.transport is not None:
+            self._validate_transport(self._meta.transport)
+
+        self._cache = None
+        if self._meta.cache_handler:
+            cache.validate(self._meta.cache_handler)
+            self._cache = self._meta.cache_handler(**kw)
+
+        self._retry = None
+        if self._meta.retry_handler:
+            retry.validate(self._meta.retry_handler)
+            self._retry = self._meta.retry_handler(**kw)
+
+        self._breaker = None
+        if self._meta.circuit_breaker_handler:
+            circuit.validate(self._meta.circuit_breaker_handler)
+            self._breaker = self._meta.circuit_breaker_handler(**kw)
+
+        self._auth = None
+        if self._meta.auth_handler:
+            auth.validate(self._meta.auth_handler)
+            self._auth = self._meta.auth_handler(**kw)
+
+        # sends the credentials as HTTP Basic with a transport, when there is
+        # no auth handler (see set_auth_credentials())
+        self._basic_auth = None
+
+        self._limiter = None
+        if self._meta.rate_limit_handler:
+            ratelimit.validate(self._meta.rate_limit_handler)
+            self._limiter = self._meta.rate_limit_handler(**kw)
+
+    def _validate_transport(self, obj):
+        transport.validate(obj)
+
+    def _setup_accept_serialization(self, **kw):
+        for handler in self._meta.accept_serialization_handlers:
+            serialization.validate(handler)
+            try:
+                self._accept_serialization.append(handler(**kw))
+            except ImportError as e:
+                self._get_log().debug("skipping %s (%s)", handler.__name__, e)
+
+        if not self._accept_serialization:
+            return
+
+        # most preferred first, with decreasing quality
+        content_types = [h.content_type for h in self._accept_serialization]
+        content_types.append(getattr(self._serialization, 'content_type',
+                                     None) or '*/*')
+        accept = [content_types[0]]
+        for i, content_type in enumerate(content_types[1:]):
+            quality = max(0.1, 0.9 - i * 0.1)
+            accept.append('%s;q=%.1f' % (content_type, quality))
+        self.add_header('Accept', ', '.join(accept))
+
     def _serialize(self, data):
         if self._meta.serialize:
             return self._serialization.serialize(data)
         else:
             return data
 
-    def _deserialize(self, data):
+    def _get_deserializer(self, content_type=None):
+        for handler in self._accept_serialization:
+            if handler.accepts(content_type):
+                return handler
+        return self._serialization
+
+    def _deserialize(self, data, content_type=None):
         if self._meta.deserialize:
-            return self._serialization.deserialize(data)
+            return self._get_deserializer(content_type).deserialize(data)
         else:
             return data
 
@@ -237,6 +468,11 @@ class RequestHandler(meta.MetaMixin):
 
         """
         self._auth_credentials = (user, password)
+        if self._auth is not None:
+            self._auth.set_credentials(user, password)
+        else:
+            self._basic_auth = auth.BasicAuthHandler()
+            self._basic_auth.set_credentials(user, password)
         self._clear_http()
 
     def add_param(self, key, value):
@@ -254,6 +490,7 @@ class RequestHandler(meta.MetaMixin):
 
         """
         self._extra_params[key] = value
+        self._extra_version += 1
 
     def add_url_param(self, key, value):
         """
@@ -270,6 +507,7 @@ class RequestHandler(meta.MetaMixin):
 
         """
         self._extra_url_params[key] = value
+        self._extra_version += 1
 
     def add_header(self, key, value):
         """
@@ -286,29 +524,210 @@ class RequestHandler(meta.MetaMixin):
 
         """
         self._extra_headers[key] = value
+        self._extra_version += 1
+
+    def add_hook(self, name, func):
+        """
+        Register a function called as func(context) at a point of the
+        lifecycle of every request, with a drest.hooks.RequestContext that
+        holds the request, the response (or error) and the monotonic
+        timestamps of every phase.  Requests are not instrumented at all
+        while no hooks are registered.
+
+        Required Arguments:
+
+            name
+                One of drest.hooks.HOOKS (i.e. 'pre_send').
+
+            func
+                The function to call.
+
+        Usage:
+
+        .. code-block:: python
+
+            def log_timing(context):
+                print(context.url, context.phases)
+
+            api.request.add_hook('post_receive', log_timing)
+
+        """
+        if name not in hooks.HOOKS:
+            raise exc.dRestAPIError("Unknown hook '%s'" % name)
+        self._hooks.setdefault(name, []).append(func)
+
+    def _run_hooks(self, name, context):
+        for func in self._hooks.get(name, ()):
+            func(context)
+
+    def _new_context(self, method, url, params, headers):
+        """
+        Returns a new drest.hooks.RequestContext after running the
+        pre_request hooks, or None if no hooks are registered.
+
+        """
+        if not self._hooks:
+            return None
+        context = hooks.RequestContext(method, url, params, headers)
+        self._run_hooks('pre_request', context)
+        return context
+
+    def _serialized(self, context, url, payload, headers):
+        context.mark('serialized')
+        context.url = url
+        context.payload = payload
+        context.headers = headers
+        self._run_hooks('post_serialize', context)
+
+    def _start_request(self, method, url, params=None, headers=None):
+        """
+        Run the pre_request hooks, build the complete url and the payload
+        (see self._prepare_request()) and run the post_serialize hooks.
+        Returns a tuple of (method, url, payload, headers, context), the
+        arguments of self._send_request().
+
+        """
+        context = self._new_context(method, url, params, headers)
+        if context is not None:
+            method, url = context.method, context.url
+            params, headers = context.params, context.headers
+        url, payload, headers = self._prepare_request(method, url, params,
+                                                      headers)
+        if context is not None:
+            self._serialized(context, url, payload, headers)
+        return (method, url, payload, headers, context)
+
+    def _request_failed(self, context, error):
+        context.error = error
+        self._run_hooks('on_error', context)
+
+    def _request_done(self, context, response):
+        context.response = response
+        self._run_hooks('post_request', context)
+        return response
+
+    def register_resource(self, name, url):
+        """
+        Associate every request under url with the resource 'name'.  Called
+        by api.add_resource().
+
+        Required Arguments:
+
+            name
+                The name of the resource.
+
+            url
+                The full url of the resource.
+
+        """
+        self._resources[url.rstrip('/')] = name
+
+    def get_resource_name(self, url):
+        """
+        Returns the name of the registered resource that url belongs to, or
+        None.
+
+        Required Arguments:
+
+            url
+                The url of a request.
+
+        """
+        if not self._resources:
+            return None
+        path = url.split('?', 1)[0].rstrip('/')
+        while path:
+            if path in self._resources:
+                return self._resources[path]
+            path = path.rpartition('/')[0]
+        return None
 
     def _get_http(self):
         """
-        Returns either the existing (cached) httplib2.Http() object, or
-        a new instance of one.
+        Returns either the Meta.transport object, the existing (cached)
+        httplib2.Http() object, or a new instance of one.  httplib2.Http()
+        is not thread safe, so one is cached per thread.
 
         """
-        if self._http == None:
+        if self._meta.transport is not None:
+            return self._meta.transport
+
+        local = self._http_local
+        if getattr(local, 'generation', None) != self._http_generation:
             if self._meta.ignore_ssl_validation:
-                self._http = Http(disable_ssl_certificate_validation=True,
+                local.http = Http(disable_ssl_certificate_validation=True,
                                   timeout=self._meta.timeout)
             else:
-                self._http = Http(timeout=self._meta.timeout)
+                local.http = Http(timeout=self._meta.timeout)
 
-            if self._auth_credentials:
-                self._http.add_credentials(self._auth_credentials[0],
+            if self._auth_credentials and self._auth is None:
+                local.http.add_credentials(self._auth_credentials[0],
                                            self._auth_credentials[1])
-        return self._http
+            local.generation = self._http_generation
+        return local.http
 
     def _clear_http(self):
-        self._http = None
+        # invalidates the cached httplib2.Http() of every thread
+        self._http_generation += 1
+
+    def _get_authorization(self, method, url):
+        """
+        Returns the Authorization header value to send with a request (or
+        None), from the auth handler if there is one or else HTTP Basic.
 
-    def _make_request(self, url, method, payload=None, headers=None):
+        """
+        if not self._auth_credentials:
+            return None
+        if self._auth is not None:
+            return self._auth.get_authorization(method, url)
+        return self._basic_auth.get_authorization(method, url)
+
+    def _send(self, http, url, method, payload, headers, context=None):
+        if self._meta.transport is None:
+            if self._auth is not None and self._auth_credentials:
+                authorization = self._auth.get_authorization(method, url)
+                if authorization is not None:
+                    headers = dict(headers, Authorization=authorization)
+            return http.request(url, method, payload, headers=headers)
+
+        authorization = self._get_authorization(method, url)
+        if authorization is not None:
+            headers = dict(headers, Authorization=authorization)
+        if context is not None and \
+           isinstance(http, transport.ConnectionPool):
+            return http.request(url, method, payload, headers=headers,
+                                timeout=self._meta.timeout,
+                                timings=context.timings)
+        return http.request(url, method, payload, headers=headers,
+                            timeout=self._meta.timeout)
+
+    def _is_challenged(self, method, url, res_headers):
+        """
+        Returns whether a request is to be sent once more because the auth
+        handler answered the 401 challenge of its response.
+
+        """
+        return self._auth is not None and self._auth_credentials and \
+               res_headers['status'] == '401' and \
+               self._auth.handle_challenge(method, url, res_headers)
+
+    def _send_authenticated(self, http, url, method, payload, headers,
+                            context=None):
+        """
+        Send a request, and send it once more if the auth handler answers
+        a 401 challenge (i.e. with a new Digest nonce).
+
+        """
+        res_headers, data = self._send(http, url, method, payload, headers,
+                                       context)
+        if self._is_challenged(method, url, res_headers):
+            self._discard_content(data)
+            res_headers, data = self._send(http, url, method, payload,
+                                           headers, context)
+        return (res_headers, data)
+
+    def _make_request(self, url, method, payload=None, headers=None,
+                      context=None):
         """
         A wrapper around httplib2.Http.request.
 
@@ -328,6 +747,9 @@ class RequestHandler(meta.MetaMixin):
             headers
                 Additional headers of the request.
 
+            context
+                The drest.hooks.RequestContext of the request (if any).
+
         """
         if payload is None:
             if self._meta.serialize:
@@ -339,20 +761,25 @@ class RequestHandler(meta.MetaMixin):
 
         try:
             http = self._get_http()
-            return http.request(url, method, payload, headers=headers)
+            return self._send_authenticated(http, url, method, payload,
+                                            headers, context)
 
         except socket.error as e:
             # Try again just in case there was an issue with the cached _http
             try:
                 self._clear_http()
-                return self._get_http().request(url, method, payload,
-                                                headers=headers)
+                return self._send_authenticated(self._get_http(), url, method,
+                                                payload, headers, context)
             except socket.error as e:
                 raise exc.dRestAPIError(e)
 
         except ServerNotFoundError as e:
             raise exc.dRestAPIError(e.args[0])
 
+        except httplib.HTTPException as e:
+            # i.e. BadStatusLine or RemoteDisconnected
+            raise exc.dRestAPIError("%s: %s" % (e.__class__.__name__, e))
+
     def _get_complete_url(self, method, url, params):
         url = "%s%s" % (url.strip('/'), '/' if self._meta.trailing_slash else '')
 
@@ -389,6 +816,157 @@ class RequestHandler(meta.MetaMixin):
             headers
                 Dictionary of additional (one-time) headers of the request.
 
+        """
+        return self._send_request(*self._start_request(method, url, params,
+                                                       headers))
+
+    def prepare(self, method, url, params=None, headers=None):
+        """
+        Prepare a request to be made (many times) later.  The complete url,
+        the merged headers and the encoded payload are computed once, so
+        that executing the returned drest.request.PreparedRequest only does
+        the I/O and parses the response.  Takes the same arguments as
+        self.make_request().
+
+        Usage:
+
+        .. code-block:: python
+
+            poll = req.prepare('GET', 'http://localhost:8000/api/v1/jobs/1/')
+            while poll.execute().data['status'] == 'running':
+                time.sleep(1)
+
+        """
+        return PreparedRequest(self, method, url, params, headers)
+
+    def _get_flight_key(self, method, url, headers):
+        """
+        Returns the key under which concurrent identical requests are
+        coalesced, or None if the request is not to be coalesced.
+
+        """
+        if method != 'GET' or not self._meta.coalesce_requests:
+            return None
+        # credentials are per handler, and therefore the same for every
+        # request of it
+        return (url, tuple(sorted(headers.items())))
+
+    def _send_request(self, method, url, payload, headers, context=None):
+        """
+        Make a prepared request (see self._prepare_request()) and return
+        the response object.  Runs the on_error hooks if it fails.
+
+        """
+        self._log_request(method, url, payload, headers)
+        if context is None:
+            return self._send_coalesced(method, url, payload, headers)
+        try:
+            response = self._send_coalesced(method, url, payload, headers,
+                                            context)
+        except exc.dRestError as e:
+            self._request_failed(context, e)
+            raise
+        return self._request_done(context, response)
+
+    def _get_log(self):
+        # checked on every use, as the API object sets Meta.debug after the
+        # request handler is created
+        if self._meta.debug:
+            return log.DEBUG_LOG
+        return log.LOG
+
+    def _log_request(self, method, url, payload, headers):
+        """
+        Log a request at DEBUG level (if enabled, and sampled), with the
+        payload truncated and sensitive headers redacted.  The fields are
+        also passed as 'drest_*' attributes of the log record, for
+        structured (i.e. JSON) log formatters.
+
+        """
+        logger = self._get_log()
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        rate = self._meta.debug_sample_rate
+        if rate < 1 and random.random() >= rate:
+            return
+        headers = log.redact_headers(headers,
+                                     self._meta.debug_redact_headers)
+        payload = log.truncate(payload, self._meta.debug_max_payload)
+        logger.debug('method=%s url=%s params=%s headers=%s',
+                     method, url, payload, headers,
+                     extra=dict(drest_event='request', drest_method=method,
+                                drest_url=url, drest_params=payload,
+                                drest_headers=headers))
+
+    def _send_coalesced(self, method, url, payload, headers, context=None):
+        """
+        Make a prepared request, or wait for the identical request that is
+        already in flight (see Meta.coalesce_requests), and return the
+        response object.
+
+        """
+        key = self._get_flight_key(method, url, headers)
+        if key is None:
+            return self._do_send_request(method, url, payload, headers,
+                                         context)
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                leader = False
+            else:
+                leader = True
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            return flight.wait()
+
+        try:
+            flight.response = self._do_send_request(method, url, payload,
+                                                    headers, context)
+            return flight.response
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _do_send_request(self, method, url, payload, headers, context=None):
+        """
+        Make a prepared request through the cache, circuit breaker and retry
+        handlers, and return the response object.
+
+        """
+        attempts = _Attempts(self, method, url, headers, context)
+        while True:
+            wait = attempts.get_wait()
+            if wait:
+                time.sleep(wait)
+            try:
+                attempts.start()
+                try:
+                    res_headers, data = self._make_request(
+                        url, method, payload, headers=headers,
+                        context=context)
+                except exc.dRestAPIError as e:
+                    delay = attempts.failed(e)
+                    if delay is None:
+                        raise
+                else:
+                    delay = attempts.received(res_headers, data)
+                    if delay is None:
+                        return attempts.build_response(res_headers, data)
+            finally:
+                attempts.release()
+            time.sleep(delay)
+
+    def _prepare_request(self, method, url, params=None, headers=None):
+        """
+        Merge the extra params/headers, build the complete url and encode
+        the payload.  Returns a tuple of (url, payload, headers).
+
         """
         if params is None:
             params = {}
@@ -403,29 +981,128 @@ class RequestHandler(meta.MetaMixin):
         else:
             payload = urlencode(params)
 
-        if self._meta.debug:
-            print('DREST_DEBUG: method=%s url=%s params=%s headers=%s' % \
-                   (method, url, payload, headers))
+        if method == 'GET' and not self._meta.allow_get_body:
+            payload = ''
 
+        return (url, payload, headers)
 
-        if method is 'GET' and not self._meta.allow_get_body:
-            payload = ''
-            if self._meta.debug:
-                print("DREST_DEBUG: supressing body for GET request")
+    def _get_circuit_key(self, url):
+        if self._breaker is None:
+            return None
+        return self._breaker.get_key(urlsplit(url).netloc,
+                                     self.get_resource_name(url))
+
+    def _get_rate_limit_key(self, url):
+        if self._limiter is None:
+            return None
+        return self._limiter.get_key(urlsplit(url).netloc,
+                                     self.get_resource_name(url))
+
+    def _get_rate_limit_wait(self, rate_limit_key):
+        """
+        Returns the seconds to wait before the next attempt of a request
+        because of the rate limit handler (which raises
+        exc.dRestRateLimitError if the request is not to be made).
+
+        """
+        if rate_limit_key is None:
+            return 0
+        wait = self._limiter.acquire(rate_limit_key)
+        if wait:
+            self._get_log().debug("rate limited, waiting %.2f seconds",
+                                  wait, extra=dict(drest_event='rate_limit',
+                                                   drest_delay=wait))
+        return wait
+
+    def _discard_content(self, data):
+        """Called with the content of a response that is being retried."""
+        pass
+
+    def _get_retry_delay(self, method, attempt, headers, res_headers=None,
+                         error=None):
+        if self._retry is None:
+            return None
+        delay = self._retry.get_delay(method, attempt, headers,
+                                      res_headers=res_headers, error=error)
+        if delay is not None:
+            self._get_log().debug("retrying request in %.2f seconds", delay,
+                                  extra=dict(drest_event='retry',
+                                             drest_delay=delay,
+                                             drest_attempt=attempt))
+        return delay
+
+    def _get_cache_key(self, url, headers):
+        return (url, headers.get('Authorization'))
+
+    def _get_cached_response(self, method, url, headers):
+        """
+        Returns the cached response object for a GET request (if any), and
+        adds its validators to headers.
+
+        """
+        if self._cache is None or method != 'GET':
+            return None
+
+        cached = self._cache.get(self._get_cache_key(url, headers))
+        if cached is not None:
+            if 'etag' in cached.headers:
+                headers['If-None-Match'] = cached.headers['etag']
+            if 'last-modified' in cached.headers:
+                headers['If-Modified-Since'] = cached.headers['last-modified']
+        return cached
+
+    def _get_timed_deserializer(self, deserializer, context):
+        """
+        Wrap deserializer to record its timing in context and run the
+        post_deserialize hooks.
+
+        """
+        def deserialize(data):
+            context.mark('deserialize_start')
+            data = deserializer(data)
+            context.mark('deserialized')
+            self._run_hooks('post_deserialize', context)
+            return data
+        return deserialize
 
-        res_headers, data = self._make_request(url, method, payload,
-                                               headers=headers)
-        unserialized_data = data
-        serialized_data = None
+    def _build_response(self, res_headers, data, method=None, url=None,
+                        headers=None, cached=None, context=None):
+        """
+        Deserialize the raw response content (if configured to), wrap it in
+        a response object and pass it through handle_response().
+
+        """
+        status = int(res_headers['status'])
+        if self._cache is not None and method is not None:
+            if method not in ('GET', 'HEAD'):
+                self._cache.invalidate(url)
+            elif cached is not None and status == 304:
+                return self.handle_response(cached)
+
+        size = len(data or '')
+        deserializer = None
         if self._meta.deserialize:
-            serialized_data = data
-            data = self._deserialize(data)
+            content_type = res_headers.get('content-type')
+            deserializer = self._get_deserializer(content_type).deserialize
+            if context is not None:
+                deserializer = self._get_timed_deserializer(deserializer,
+                                                            context)
+            if not self._meta.lazy_deserialize:
+                data = deserializer(data)
+                deserializer = None
 
         return_response = response.ResponseHandler(
-            int(res_headers['status']), data, res_headers,
+            status, data, res_headers, deserializer,
+            self._meta.release_raw_content,
             )
+        return_response = self.handle_response(return_response)
 
-        return self.handle_response(return_response)
+        if self._cache is not None and method == 'GET' and status == 200 \
+           and ('etag' in res_headers or 'last-modified' in res_headers):
+            key = self._get_cache_key(url, headers)
+            self._cache.set(key, return_response, size)
+
+        return return_response
 
     def handle_response(self, response_object):
         """
@@ -447,6 +1124,233 @@ class RequestHandler(meta.MetaMixin):
             raise exc.dRestRequestError(msg, response=response)
         return response
 
+class _Flight(object):
+    """A request in flight, that concurrent identical requests wait on."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+class _Attempts(object):
+    """
+    The attempts of a single request through the cache, rate limit, circuit
+    breaker and retry handlers (and the lifecycle hooks).  Shared by the
+    blocking and the asyncio request handlers, which only do the waiting
+    and the sending:
+
+    .. code-block:: python
+
+        attempts = _Attempts(request_handler, method, url, headers, context)
+        while True:
+            sleep(attempts.get_wait())
+            try:
+                attempts.start()
+                try:
+                    res_headers, data = send()
+                except exc.dRestAPIError as e:
+                    delay = attempts.failed(e)
+                    if delay is None:
+                        raise
+                else:
+                    delay = attempts.received(res_headers, data)
+                    if delay is None:
+                        return attempts.build_response(res_headers, data)
+            finally:
+                attempts.release()
+            sleep(delay)
+
+    """
+    def __init__(self, request_handler, method, url, headers, context=None):
+        self.request_handler = request_handler
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.context = context
+        self.attempt = 0
+        self.cached = request_handler._get_cached_response(method, url,
+                                                           headers)
+        self.circuit_key = request_handler._get_circuit_key(url)
+        self.rate_limit_key = request_handler._get_rate_limit_key(url)
+        self._started = None
+        self._pending = False
+
+    def get_wait(self):
+        """
+        Returns the seconds to wait before the next attempt (see
+        RequestHandler._get_rate_limit_wait()).
+
+        """
+        return self.request_handler._get_rate_limit_wait(self.rate_limit_key)
+
+    def start(self):
+        """
+        Start the next attempt.  Raises exc.dRestCircuitOpenError if the
+        circuit breaker does not let it through.
+
+        """
+        self.attempt += 1
+        if self.circuit_key is not None:
+            self.request_handler._breaker.before_request(self.circuit_key)
+            self._pending = True
+        self._started = clock.now()
+        context = self.context
+        if context is not None:
+            context.attempt = self.attempt
+            for name in ('connected', 'first_byte', 'received'):
+                context.timings.pop(name, None)
+            context.mark('send')
+            self.request_handler._run_hooks('pre_send', context)
+
+    def _finish(self, res_headers=None, error=None):
+        # record the outcome with the circuit breaker and the rate limit
+        # handler, and return the seconds to wait before the next attempt
+        # (or None to not retry)
+        request_handler = self.request_handler
+        status = None
+        if res_headers is not None:
+            status = int(res_headers['status'])
+            if self.rate_limit_key is not None:
+                request_handler._limiter.update(self.rate_limit_key, status,
+                                                res_headers)
+        if self.circuit_key is not None:
+            self._pending = False
+            breaker = request_handler._breaker
+            breaker.after_request(self.circuit_key,
+                                  breaker.is_failure(status, error),
+                                  clock.now() - self._started)
+        return request_handler._get_retry_delay(self.method, self.attempt,
+                                                self.headers,
+                                                res_headers=res_headers,
+                                                error=error)
+
+    def failed(self, error):
+        """
+        The attempt failed with error (an exc.dRestAPIError).  Returns the
+        seconds to wait before retrying, or None to give up.
+
+        """
+        return self._finish(error=error)
+
+    def received(self, res_headers, data):
+        """
+        The attempt received a response.  Returns the seconds to wait before
+        retrying (the content is discarded), or None if the response is
+        final.
+
+        """
+        request_handler = self.request_handler
+        context = self.context
+        if context is not None:
+            context.mark('received')
+            context.res_headers = res_headers
+            context.content = data
+            request_handler._run_hooks('post_receive', context)
+        delay = self._finish(res_headers=res_headers)
+        if delay is not None:
+            request_handler._discard_content(data)
+        return delay
+
+    def release(self):
+        """
+        End the attempt.  If its outcome was not recorded (it ended with an
+        unexpected exception), the circuit breaker is told to release it.
+
+        """
+        if self._pending:
+            self._pending = False
+            self.request_handler._breaker.release(self.circuit_key)
+
+    def build_response(self, res_headers, data):
+        """Returns the response object of the final response."""
+        return self.request_handler._build_response(
+            res_headers, data, self.method, self.url, self.headers,
+            self.cached, self.context)
+
+class PreparedRequest(object):
+    """
+    A request prepared by RequestHandler.prepare() (or API.prepare()).  The
+    url (with the encoded query string), headers and serialized payload
+    are computed once and reused by every execute().  They are computed
+    again when the extra params, url params or headers of the request
+    handler change (add_param(), add_url_param(), add_header()), and for a
+    single execute() when a pre_request hook changes the method, url,
+    params or headers of its context.
+
+    Required Arguments:
+
+        request_handler
+            The (instantiated) request handler that makes the request.
+
+        method
+            One of HEAD, GET, POST, PUT, PATCH, DELETE, etc.
+
+        url
+            The full url of the request (without any parameters).
+
+    Optional Arguments:
+
+        params
+            Dictionary of additional keyword arguments for the request.
+
+        headers
+            Dictionary of additional headers of the request.
+
+    """
+    def __init__(self, request_handler, method, url, params=None,
+                 headers=None):
+        self.request_handler = request_handler
+        self.method = method
+        self._url = url
+        self._params = dict(params or {})
+        self._headers = dict(headers or {})
+        self._version = None
+        self._prepare()
+
+    def _prepare(self):
+        request_handler = self.request_handler
+        self.url, self.payload, self.headers = \
+            request_handler._prepare_request(self.method, self._url,
+                                             self._params, self._headers)
+        self._version = request_handler._extra_version
+
+    def execute(self):
+        """
+        Make the request and return the response object (with
+        drest.aio.AsyncRequestHandler, a coroutine to await).
+
+        """
+        request_handler = self.request_handler
+        if self._version != request_handler._extra_version:
+            self._prepare()
+        method, url, payload = self.method, self.url, self.payload
+        headers = self.headers
+        context = request_handler._new_context(method, self._url,
+                                               dict(self._params),
+                                               dict(self._headers))
+        if context is not None:
+            if (context.method, context.url, context.params,
+                context.headers) != (method, self._url, self._params,
+                                     self._headers):
+                # changed by a pre_request hook, prepared again for this
+                # request only
+                method = context.method
+                url, payload, headers = request_handler._prepare_request(
+                    method, context.url, context.params, context.headers)
+            else:
+                headers = dict(headers)
+            request_handler._serialized(context, url, payload, headers)
+        elif request_handler._cache is not None:
+            # the cache adds validators to the headers of a request
+            headers = dict(headers)
+        return request_handler._send_request(method, url, payload, headers,
+                                             context)
+
 class TastyPieRequestHandler(RequestHandler):
     """
     This class implements the IRequest interface, specifically tailored for
@@ -462,3 +1366,118 @@ class TastyPieRequestHandler(RequestHandler):
 
     def __init__(self, **kw):
         super(TastyPieRequestHandler, self).__init__(**kw)
+
+class StreamingRequestHandler(RequestHandler):
+    """
+    A request handler that never buffers the response body.  make_request()
+    returns a :mod:`drest.response.StreamingResponseHandler` whose data is
+    a file-like object reading from the connection on demand, so large
+    payloads can be piped to disk or an incremental parser in constant
+    memory.  Error responses (those raising exc.dRestRequestError) are
+    read and deserialized as usual.
+
+    Requests are made over Meta.transport, which must support stream()
+    (i.e. drest.transport.ConnectionPool).  If no transport is set, the
+    handler creates its own pool.  Response caching does not apply to
+    streamed responses.
+
+    See :mod:`drest.request.RequestHandler` for Meta options.
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.request import StreamingRequestHandler
+
+        api = drest.API('http://localhost:8000/api/v1/',
+                        request_handler=StreamingRequestHandler)
+        with api.make_request('GET', '/export/') as response:
+            for chunk in response.iter_content(65536):
+                out_file.write(chunk)
+
+    """
+    def __init__(self, **kw):
+        super(StreamingRequestHandler, self).__init__(**kw)
+        self._pool = None
+
+    @classmethod
+    def from_handler(cls, request_handler):
+        """
+        Create a streaming handler with the same Meta options and
+        credentials as request_handler, that shares its extra params, url
+        params, headers, registered resources, hooks and its cache, retry,
+        circuit breaker and rate limit handlers (so that streamed requests
+        count towards the same rate limits and circuits).
+
+        Required Arguments:
+
+            request_handler
+                The (instantiated) request handler to copy.
+
+        """
+        kw = dict(vars(request_handler._meta))
+        handler = cls(**kw)
+        handler._extra_params = request_handler._extra_params
+        handler._extra_url_params = request_handler._extra_url_params
+        handler._extra_headers = request_handler._extra_headers
+        handler._resources = request_handler._resources
+        handler._auth_credentials = request_handler._auth_credentials
+        handler._auth = request_handler._auth
+        handler._basic_auth = request_handler._basic_auth
+        handler._hooks = request_handler._hooks
+        handler._cache = request_handler._cache
+        handler._retry = request_handler._retry
+        handler._breaker = request_handler._breaker
+        handler._limiter = request_handler._limiter
+        return handler
+
+    def _get_http(self):
+        if self._meta.transport is not None:
+            return self._meta.transport
+        if self._pool is None:
+            self._pool = transport.ConnectionPool(
+                timeout=self._meta.timeout,
+                ignore_ssl_validation=self._meta.ignore_ssl_validation,
+                )
+        return self._pool
+
+    def _send(self, http, url, method, payload, headers, context=None):
+        authorization = self._get_authorization(method, url)
+        if authorization is not None:
+            headers = dict(headers, Authorization=authorization)
+        if context is not None and \
+           isinstance(http, transport.ConnectionPool):
+            return http.stream(url, method, payload, headers=headers,
+                               timeout=self._meta.timeout,
+                               timings=context.timings)
+        return http.stream(url, method, payload, headers=headers,
+                           timeout=self._meta.timeout)
+
+    def _get_flight_key(self, method, url, headers):
+        # a stream can only be read by one caller
+        return None
+
+    def _get_cached_response(self, method, url, headers):
+        return None
+
+    def _discard_content(self, data):
+        data.close()
+
+    def _build_response(self, res_headers, data, method=None, url=None,
+                        headers=None, cached=None, context=None):
+        status = int(res_headers['status'])
+        if (400 <= status <= 499) or (status == 500):
+            # error bodies are small, read them for the exception
+            with data:
+                content = data.read()
+            return super(StreamingRequestHandler, self)._build_response(
+                res_headers, content, method, url, headers, cached, context)
+
+        if self._cache is not None and method not in (None, 'GET', 'HEAD'):
+            self._cache.invalidate(url)
+
+        return_response = response.StreamingResponseHandler(
+            status, data, res_headers,
+            )
+        return self.handle_response(return_response)
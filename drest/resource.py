@@ -1,6 +1,139 @@
 
 import re
-from . import interface, exc, meta, request
+import sys
+import threading
+
+if sys.version_info[0] < 3:
+    import Queue as queue # pragma: no cover
+    from urlparse import urlsplit, parse_qsl # pragma: no cover
+else:
+    import queue # pragma: no cover
+    from urllib.parse import urlsplit, parse_qsl # pragma: no cover
+
+from . import interface, exc, meta, request, record, columnar
+
+def _map_concurrent(func, items, concurrency=10):
+    """
+    Call func(item) for every item using at most 'concurrency' worker
+    threads.  Returns the results in the order of items.  A dRestError
+    raised for an item is collected in place of its result, any other
+    exception is re-raised once all workers have finished.
+
+    """
+    items = list(items)
+    results = [None] * len(items)
+    unexpected = []
+    work = queue.Queue()
+    for index, item in enumerate(items):
+        work.put((index, item))
+
+    def worker():
+        while not unexpected:
+            try:
+                index, item = work.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[index] = func(item)
+            except exc.dRestError as e:
+                results[index] = e
+            except Exception as e:
+                unexpected.append(e)
+
+    threads = [threading.Thread(target=worker) \
+               for i in range(max(1, min(concurrency, len(items))))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if unexpected:
+        raise unexpected[0]
+    return results
+
+def _imap_concurrent(func, items, concurrency=10, ordered=False):
+    """
+    Like _map_concurrent(), but a generator yielding (index, result) tuples
+    as soon as each call finishes, or in the order of items if ordered.
+    Any exception raised by func(item) is yielded in place of its result.
+
+    At most 'concurrency' items are outstanding (being called, or finished
+    but not yielded yet) at any time.  The next item is only handed to a
+    worker when the consumer asks for the next result, so a slow consumer
+    (or, if ordered, a slow early item) holds the workers back rather than
+    having every result buffered in memory.  Closing the generator stops
+    the workers.
+
+    """
+    items = list(items)
+    concurrency = max(1, min(concurrency, len(items)))
+    work = queue.Queue()
+    done = queue.Queue(maxsize=concurrency)
+
+    def worker():
+        while True:
+            task = work.get()
+            if task is None:
+                return
+            index, item = task
+            try:
+                result = func(item)
+            except Exception as e:
+                result = e
+            done.put((index, result))
+
+    threads = [threading.Thread(target=worker) for i in range(concurrency)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    submitted = 0
+    buffered = {}
+    next_index = 0
+    try:
+        for i in range(len(items)):
+            # keep 'concurrency' items outstanding
+            while submitted < len(items) and \
+                  submitted - i < concurrency:
+                work.put((submitted, items[submitted]))
+                submitted += 1
+            if not ordered:
+                yield done.get()
+                continue
+            while next_index not in buffered:
+                index, result = done.get()
+                buffered[index] = result
+            yield next_index, buffered.pop(next_index)
+            next_index += 1
+    finally:
+        for thread in threads:
+            work.put(None)
+
+class _Prefetch(object):
+    """
+    Call func(*args) on a background thread.  result() waits for it and
+    returns its return value (or re-raises its exception).
+
+    """
+    def __init__(self, func, *args):
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(func, args))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, func, args):
+        try:
+            self._result = func(*args)
+        except Exception as e:
+            self._error = e
+
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
 
 def validate(obj):
     """Validates a handler implementation against the IResource interface."""
@@ -89,6 +222,35 @@ class RESTResourceHandler(ResourceHandler):
     def __init__(self, api_obj, name, path, **kw):
         super(RESTResourceHandler, self).__init__(api_obj, name, path, **kw)
 
+    def _request(self, method, path, params, resource_id=None):
+        """
+        Make the request of a resource method, adding the resource (and id)
+        to the message of a dRestRequestError.  Overridden by
+        drest.aio.AsyncRESTResourceHandler (as a coroutine), which shares
+        everything else.
+
+        """
+        try:
+            return self.api.make_request(method, path, params)
+        except exc.dRestRequestError as e:
+            raise self._request_error(e, method, resource_id)
+
+    def _request_error(self, error, method, resource_id=None):
+        if method == 'POST':
+            msg = "%s (resource: %s)" % (error.msg, self.name)
+        else:
+            msg = "%s (resource: %s, id: %s)" % (error.msg, self.name,
+                                                 resource_id)
+        return exc.dRestRequestError(msg, error.response)
+
+    def _map_many(self, func, items, concurrency):
+        """
+        Call func(item) for every item concurrently (see get_many()).
+        Overridden by drest.aio.AsyncRESTResourceHandler (as a coroutine).
+
+        """
+        return _map_concurrent(func, items, concurrency)
+
     def get(self, resource_id=None, params=None):
         """
         Get all records for a resource, or a single resource record.
@@ -109,15 +271,7 @@ class RESTResourceHandler(ResourceHandler):
         else:
             path = '/%s' % self.path
 
-        try:
-            response = self.api.make_request('GET', path,
-                                             params=self.filter(params))
-        except exc.dRestRequestError as e:
-            msg = "%s (resource: %s, id: %s)" % (e.msg, self.name,
-                                                 resource_id)
-            raise exc.dRestRequestError(msg, e.response)
-
-        return response
+        return self._request('GET', path, self.filter(params), resource_id)
 
     def create(self, params=None):
         """A synonym for self.post()."""
@@ -139,16 +293,8 @@ class RESTResourceHandler(ResourceHandler):
         if params is None:
             params = {} # pragma: no cover
 
-        params = self.filter(params)
         path = '/%s' % self.path
-
-        try:
-            response = self.api.make_request('POST', path, self.filter(params))
-        except exc.dRestRequestError as e:
-            msg = "%s (resource: %s)" % (e.msg, self.name)
-            raise exc.dRestRequestError(msg, e.response)
-
-        return response
+        return self._request('POST', path, self.filter(params))
 
     def update(self, resource_id, params=None):
         """A synonym for self.put()."""
@@ -173,17 +319,8 @@ class RESTResourceHandler(ResourceHandler):
         if params is None:
             params = {} # pragma: no cover
 
-        params = self.filter(params)
         path = '/%s/%s' % (self.path, resource_id)
-
-        try:
-            response = self.api.make_request('PUT', path, params)
-        except exc.dRestRequestError as e:
-            msg = "%s (resource: %s, id: %s)" % (e.msg, self.name,
-                                                 resource_id)
-            raise exc.dRestRequestError(msg, e.response)
-
-        return response
+        return self._request('PUT', path, self.filter(params), resource_id)
 
     def patch(self, resource_id, params=None):
         """
@@ -201,17 +338,8 @@ class RESTResourceHandler(ResourceHandler):
         if params is None:
             params = {} # pragma: no cover
 
-        params = self.filter(params)
         path = '/%s/%s' % (self.path, resource_id)
-
-        try:
-            response = self.api.make_request('PATCH', path, params)
-        except exc.dRestRequestError as e:
-            msg = "%s (resource: %s, id: %s)" % (e.msg, self.name,
-                                                 resource_id)
-            raise exc.dRestRequestError(msg, e.response)
-
-        return response
+        return self._request('PATCH', path, self.filter(params), resource_id)
 
     def delete(self, resource_id, params=None):
         """
@@ -234,14 +362,91 @@ class RESTResourceHandler(ResourceHandler):
         if params is None:
             params = {} # pragma: no cover
         path = '/%s/%s' % (self.path, resource_id)
-        try:
-            response = self.api.make_request('DELETE', path, params)
-        except exc.dRestRequestError as e:
-            msg = "%s (resource: %s, id: %s)" % (e.msg, self.name,
-                                                 resource_id)
-            raise exc.dRestRequestError(msg, e.response)
+        return self._request('DELETE', path, params, resource_id)
 
-        return response
+    def get_many(self, resource_ids, params=None, concurrency=10):
+        """
+        Get many resource records concurrently, by way of self.get().
+
+        Required Arguments:
+
+            resource_ids
+                A list of resource ids.
+
+        Optional Arguments:
+
+            params
+                Additional request parameters to pass along with every
+                request.
+
+            concurrency
+                The maximum number of requests in flight.  Default: 10.
+
+        Returns: A list in the order of resource_ids.  Each item is either
+        the response object, or the dRestError (i.e. dRestRequestError with
+        resource/id context) raised for that id.
+
+        Usage:
+
+        .. code-block:: python
+
+            responses = api.users.get_many([1, 2, 3], concurrency=3)
+            for response in responses:
+                if isinstance(response, drest.exc.dRestError):
+                    print(response.msg)
+
+        """
+        if params is None:
+            params = {}
+        return self._map_many(lambda pk: self.get(pk, dict(params)),
+                              resource_ids, concurrency)
+
+    def post_many(self, params_list, concurrency=10):
+        """
+        Create many resources concurrently, by way of self.post().
+
+        Required Arguments:
+
+            params_list
+                A list of parameter dictionaries, one per resource.
+
+        Optional Arguments:
+
+            concurrency
+                The maximum number of requests in flight.  Default: 10.
+
+        Returns: A list in the order of params_list.  Each item is either
+        the response object, or the dRestError raised for that item.
+
+        """
+        return self._map_many(self.post, params_list, concurrency)
+
+    def delete_many(self, resource_ids, params=None, concurrency=10):
+        """
+        Delete many resource records concurrently, by way of self.delete().
+
+        Required Arguments:
+
+            resource_ids
+                A list of resource ids.
+
+        Optional Arguments:
+
+            params
+                Additional request parameters to pass along with every
+                request.
+
+            concurrency
+                The maximum number of requests in flight.  Default: 10.
+
+        Returns: A list in the order of resource_ids.  Each item is either
+        the response object, or the dRestError raised for that id.
+
+        """
+        if params is None:
+            params = {}
+        return self._map_many(lambda pk: self.delete(pk, dict(params)),
+                              resource_ids, concurrency)
 
 class TastyPieResourceHandler(RESTResourceHandler):
     """
@@ -262,9 +467,362 @@ class TastyPieResourceHandler(RESTResourceHandler):
         collection_name = 'objects'
         """The name of the collection.  Default: objects"""
 
+        records = False
+        """Whether or not the objects of collections (from get(), stream(),
+           iterate(), etc) are returned as compact records built from the
+           resource schema (see self.record_class) rather than
+           dictionaries.  Default: False."""
+
     def __init__(self, api_obj, name, path, **kw):
         super(TastyPieResourceHandler, self).__init__(api_obj, name, path, **kw)
         self._schema = None
+        self._streaming_request = None
+        self._record_class = None
+
+    @property
+    def record_class(self):
+        """
+        A drest.record.Record class with a slot for every field of the
+        resource schema (requested once, on first access).  Records use a
+        fraction of the memory of a dictionary per object, which pays off
+        for the objects an application keeps.  get() (and iterate(), etc)
+        convert the objects once the whole page was deserialized, so the
+        peak memory per page is not lower; stream() converts every object
+        as it is parsed.
+
+        Usage:
+
+        .. code-block:: python
+
+            api.users._meta.records = True
+            for user in api.users.iterate():
+                print(user.username)
+
+        """
+        if self._record_class is None:
+            name = ''.join([p.capitalize() for p in \
+                            re.split('[^A-Za-z0-9]', self.name) if p])
+            self._record_class = record.make_record_class(
+                '%sRecord' % name, self.schema)
+        return self._record_class
+
+    def _to_records(self, data):
+        if isinstance(data, dict) and \
+           isinstance(data.get(self._meta.collection_name), list):
+            data[self._meta.collection_name] = record.to_records(
+                self.record_class, data[self._meta.collection_name])
+        return data
+
+    def get(self, resource_id=None, params=None):
+        """
+        Get all records for a resource, or a single resource record.  If
+        Meta.records is True, the objects of the collection are returned
+        as records (see self.record_class).
+
+        Optional Arguments:
+
+            resource_id
+                The resource id (may also be a label in some environments).
+
+            params
+                Additional request parameters to pass along.
+
+        """
+        response = super(TastyPieResourceHandler, self).get(resource_id,
+                                                             params)
+        if self._meta.records and not resource_id:
+            # request the schema now rather than on first access of the data
+            self.record_class
+            response.transform(self._to_records)
+        return response
+
+    def _get_streaming_request(self):
+        api_request = self.api.request
+        if isinstance(api_request, request.StreamingRequestHandler):
+            return api_request
+        if self._streaming_request is None:
+            self._streaming_request = \
+                request.StreamingRequestHandler.from_handler(api_request)
+        if self._streaming_request._auth_credentials != \
+           api_request._auth_credentials:
+            self._streaming_request.set_auth_credentials(
+                *api_request._auth_credentials)
+        return self._streaming_request
+
+    def stream(self, params=None):
+        """
+        Like self.get(), but the collection is downloaded and deserialized
+        incrementally.  Returns an iterable collection object (i.e. a
+        drest.serialization.JsonCollectionStream) that yields the items of
+        the collection one at a time as they arrive, and exposes every
+        other top level key (i.e. 'meta') as a dictionary in its 'meta'
+        attribute.  Close it (or use it as a context manager) to release
+        the connection.
+
+        Requires a serialization handler with a deserialize_stream()
+        method (i.e. JsonSerializationHandler).
+
+        :param params: Additional request parameters to pass along.
+
+        Usage:
+
+        .. code-block:: python
+
+            with api.users.stream(params=dict(limit=10000)) as users:
+                for user in users:
+                    print(user['username'])
+                print(users.meta['total_count'])
+
+        """
+        if params is None:
+            params = {}
+        req = self._get_streaming_request()
+        url = "%s/%s/" % (self.api.baseurl, self.path)
+        # only the serialization handler can deserialize incrementally
+        headers = {}
+        content_type = getattr(req._serialization, 'content_type', None)
+        if content_type is not None:
+            headers['Accept'] = content_type
+        try:
+            response = req.make_request('GET', url, self.filter(params),
+                                        headers)
+        except exc.dRestRequestError as e:
+            msg = "%s (resource: %s)" % (e.msg, self.name)
+            raise exc.dRestRequestError(msg, e.response)
+
+        item_factory = None
+        if self._meta.records:
+            item_factory = self.record_class._from_dict
+        return req._serialization.deserialize_stream(
+            response, self._meta.collection_name, item_factory=item_factory)
+
+    def _get_next_params(self, next_uri):
+        return dict(parse_qsl(urlsplit(next_uri).query))
+
+    def _iterate_pages(self, params=None, page_size=None, max_items=None,
+                       prefetch=True):
+        """
+        A generator yielding the response of every page of the collection
+        (following 'meta.next'), fetching the next page in the background
+        while the current one is processed.  Stops once the pages hold
+        max_items objects.
+
+        """
+        if params is None:
+            params = {}
+        params = dict(params)
+        if page_size is not None:
+            params['limit'] = page_size
+
+        count = 0
+        response = self.get(params=params)
+        while True:
+            objects = response.data[self._meta.collection_name]
+            next_uri = response.data.get('meta', {}).get('next')
+            count += len(objects)
+            done = not next_uri or not objects or \
+                   (max_items is not None and count >= max_items)
+
+            pending = None
+            if not done and prefetch:
+                pending = _Prefetch(self.get, None,
+                                    self._get_next_params(next_uri))
+
+            yield response
+
+            if done:
+                return
+            if pending is not None:
+                response = pending.result()
+            else:
+                response = self.get(params=self._get_next_params(next_uri))
+
+    def iterate(self, params=None, page_size=None, max_items=None,
+                prefetch=True):
+        """
+        A generator yielding every object of the collection, following
+        'meta.next' from page to page.  While the objects of one page are
+        being processed, the next page is fetched on a background thread.
+
+        :param params: Additional request parameters to pass along (with
+         the first request, TastyPie carries them over to meta.next).
+        :param page_size: The number of objects per page (the 'limit'
+         parameter).  Default: the API's default limit.
+        :param max_items: Stop after this many objects.  Default: None
+         (iterate the complete collection).
+        :param prefetch: Boolean.  Whether or not to fetch the next page in
+         the background.  Default: True.
+
+        Usage:
+
+        .. code-block:: python
+
+            for user in api.users.iterate(page_size=100):
+                print(user['username'])
+
+        """
+        if max_items is not None and max_items <= 0:
+            return
+
+        count = 0
+        for response in self._iterate_pages(params, page_size, max_items,
+                                            prefetch):
+            for obj in response.data[self._meta.collection_name]:
+                yield obj
+                count += 1
+                if max_items is not None and count >= max_items:
+                    return
+
+    def iterate_parallel(self, params=None, page_size=None, concurrency=10,
+                         ordered=True):
+        """
+        A generator yielding every object of the collection, like
+        self.iterate(), but every page after the first is requested
+        concurrently.  The offsets of the remaining pages are computed from
+        'meta.total_count' and 'meta.limit' of the first page.
+
+        Collections that change size during the scan are handled as well
+        as offset pagination allows: pages past the end simply come back
+        empty, the pages added after the first request are followed via
+        'meta.next' of the last page, and objects shifted onto a page that
+        was already seen are yielded only once (by 'resource_uri').
+
+        :param params: Additional request parameters to pass along.
+        :param page_size: The number of objects per page (the 'limit'
+         parameter).  Default: the API's default limit.
+        :param concurrency: The maximum number of pages outstanding (being
+         fetched, or fetched but not yielded yet).  The next page is only
+         requested as the pages are consumed.  Default: 10.
+        :param ordered: Boolean.  Whether to yield the objects in
+         collection order, or page by page as soon as each page arrives.
+         Default: True.
+
+        Usage:
+
+        .. code-block:: python
+
+            for user in api.users.iterate_parallel(page_size=100,
+                                                   ordered=False):
+                print(user['username'])
+
+        """
+        if params is None:
+            params = {}
+        params = dict(params)
+        if page_size is not None:
+            params['limit'] = page_size
+
+        seen = set()
+        collection_name = self._meta.collection_name
+
+        def unique(response):
+            for obj in response.data[collection_name]:
+                uri = None
+                if isinstance(obj, dict):
+                    uri = obj.get('resource_uri')
+                elif isinstance(obj, record.Record):
+                    uri = obj._get('resource_uri')
+                if uri:
+                    if uri in seen:
+                        continue
+                    seen.add(uri)
+                yield obj
+
+        def fetch(offset):
+            return self.get(params=dict(params, limit=limit, offset=offset))
+
+        response = self.get(params=params)
+        response_meta = response.data.get('meta', {})
+        limit = response_meta.get('limit')
+        total = response_meta.get('total_count')
+        for obj in unique(response):
+            yield obj
+
+        if response_meta.get('next') and limit and total is not None:
+            start = int(response_meta.get('offset') or 0) + int(limit)
+            offsets = list(range(start, int(total), int(limit)))
+            results = _imap_concurrent(fetch, offsets, concurrency, ordered)
+            try:
+                for index, result in results:
+                    if isinstance(result, Exception):
+                        raise result
+                    if index == len(offsets) - 1:
+                        response = result
+                    for obj in unique(result):
+                        yield obj
+            finally:
+                results.close()
+
+        # anything added to the collection after the first request
+        next_uri = response.data.get('meta', {}).get('next')
+        while next_uri:
+            response = self.get(params=self._get_next_params(next_uri))
+            for obj in unique(response):
+                yield obj
+            if not response.data[collection_name]:
+                break
+            next_uri = response.data.get('meta', {}).get('next')
+
+    def columns(self, params=None, fields=None, page_size=None,
+                max_items=None, output='dict'):
+        """
+        Fetch the collection (like self.iterate()) into columns rather than
+        a list of objects.  Every page is added to one preallocated buffer
+        per field (see drest.columnar.ColumnBuilder), sized by
+        'meta.total_count' of the first page, with types from the resource
+        schema.
+
+        :param params: Additional request parameters to pass along.
+        :param fields: A list of the fields to collect.  Default: every
+         field of the resource schema.
+        :param page_size: The number of objects per page (the 'limit'
+         parameter).  Default: the API's default limit.
+        :param max_items: Stop after this many objects.  Default: None
+         (the complete collection).
+        :param output: One of 'dict' (a dictionary of array.array/list
+         columns), 'numpy' (a dictionary of numpy arrays) or 'structured'
+         (a numpy structured array).  The last two require numpy.
+         Default: 'dict'.
+
+        Usage:
+
+        .. code-block:: python
+
+            users = api.users.columns(fields=['id', 'is_active'],
+                                      page_size=1000, output='numpy')
+            print(users['is_active'].sum())
+
+        """
+        if output not in ['dict', 'numpy', 'structured']:
+            raise exc.dRestResourceError("Unknown columns output '%s'" % output)
+
+        builder = None
+        for response in self._iterate_pages(params, page_size, max_items):
+            if builder is None:
+                capacity = response.data.get('meta', {}).get('total_count')
+                if capacity is None or (max_items is not None and
+                                        max_items < capacity):
+                    capacity = max_items or 1024
+                builder = columnar.ColumnBuilder(self.schema, fields,
+                                                 capacity or 1,
+                                                 numpy=output != 'dict')
+            for obj in response.data[self._meta.collection_name]:
+                if max_items is not None and len(builder) >= max_items:
+                    break
+                builder.append(obj)
+
+        if output == 'structured':
+            return builder.to_structured()
+        return builder.to_dict()
+
+    def all(self, params=None, page_size=None, max_items=None):
+        """
+        Returns a list of every object of the collection.  See
+        self.iterate().
+
+        """
+        return list(self.iterate(params, page_size=page_size,
+                                 max_items=max_items))
 
     def get_by_uri(self, resource_uri, params=None):
         """
@@ -30,14 +30,120 @@ class IResponse(interface.Interface):
     headers = interface.Attribute('The headers returned by the request.')
     
 class ResponseHandler(meta.MetaMixin):
+    """
+    The response object returned by requests.
+
+    Required Arguments:
+
+        status
+            The response status (i.e. HTTP code).
+
+        data
+            The response data.  If deserializer is given, the raw content
+            to pass to it.
+
+        headers
+            The response headers.
+
+    Optional Arguments:
+
+        deserializer
+            A function called with the raw content on first access of
+            self.data.  Until then the raw content is kept in self.raw, and
+            callers that never access self.data never pay for parsing it.
+            Default: None (data is used as is).
+
+        release_raw
+            Boolean.  Whether or not to drop the raw content (self.raw) once
+            it was deserialized.  Default: True.
+
+    """
     class Meta:
         pass
     
     status = None
-    data = None
     headers = None
+    raw = None
     
-    def __init__(self, status, data, headers):
+    def __init__(self, status, data, headers, deserializer=None,
+                 release_raw=True):
         self.status = int(status)
-        self.data = data
         self.headers = headers
+        self._deserializer = deserializer
+        self._release_raw = release_raw
+        if deserializer is None:
+            self._data = data
+        else:
+            self._data = None
+            self.raw = data
+
+    @property
+    def data(self):
+        """The (deserialized) data returned by the request."""
+        deserializer = self._deserializer
+        if deserializer is not None:
+            raw = self.raw
+            if raw is None:
+                # released by a concurrent access, which set _data first
+                return self._data
+            data = deserializer(raw)
+            self._data = data
+            self._deserializer = None
+            if self._release_raw:
+                self.raw = None
+            return data
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._deserializer = None
+        self._data = value
+
+    def transform(self, func):
+        """
+        Replace the data with func(data).  If the data was not deserialized
+        yet, func is applied (once) when it is.
+
+        """
+        deserializer = self._deserializer
+        if deserializer is None:
+            self._data = func(self._data)
+        else:
+            self._deserializer = lambda raw: func(deserializer(raw))
+
+class StreamingResponseHandler(ResponseHandler):
+    """
+    The response object returned by
+    :mod:`drest.request.StreamingRequestHandler`.  The body is not read
+    up front: 'data' is a file-like object (a
+    drest.transport.StreamingBody) that can be read() or iterated in
+    chunks.  Close the response (or use it as a context manager) to return
+    the connection to the pool.
+
+    Usage:
+
+    .. code-block:: python
+
+        with api.make_request('GET', '/export/') as response:
+            with open('export.json', 'wb') as f:
+                for chunk in response.iter_content(65536):
+                    f.write(chunk)
+
+    """
+    def read(self, amt=None):
+        """Read and return up to amt bytes of the body (all if None)."""
+        return self.data.read(amt)
+
+    def iter_content(self, chunk_size=65536):
+        """Iterate over the body in chunks of (at most) chunk_size bytes."""
+        return self.data.iter_content(chunk_size)
+
+    def close(self):
+        """Release the underlying connection."""
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
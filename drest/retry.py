@@ -0,0 +1,201 @@
+"""dRest retry handlers."""
+
+import time
+import random
+import threading
+from email.utils import parsedate_tz, mktime_tz
+
+from . import interface, meta
+
+def validate(obj):
+    """Validates a handler implementation against the IRetry interface."""
+    members = [
+        'get_delay',
+        ]
+    interface.validate(IRetry, obj, members)
+
+class IRetry(interface.Interface):
+    """
+    This class defines the Retry Handler Interface.  Classes that
+    implement this handler must provide the methods and attributes defined
+    below.
+
+    All implementations must provide sane 'default' functionality when
+    instantiated with no arguments.  Meaning, it can and should accept
+    optional parameters that alter how it functions, but can not require
+    any parameters.
+
+    Implementations do *not* subclass from interfaces.
+
+    """
+
+    def get_delay(method, attempt, headers, res_headers=None, error=None):
+        """
+        Called after every attempt of a request.  Returns the number of
+        seconds to wait before trying again, or None to not retry.
+
+        Required Arguments:
+
+            method
+                The HTTP method of the request.
+
+            attempt
+                The number of the attempt that just finished (starting at 1).
+
+            headers
+                The headers of the request.
+
+        Optional Arguments:
+
+            res_headers
+                The response headers (including 'status'), if a response was
+                received.
+
+            error
+                The dRestAPIError raised by the transport, if no response
+                was received.
+
+        """
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header value (either delta seconds or an HTTP date)
+    and return the number of seconds to wait, or None if it is invalid.
+
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, mktime_tz(parsed) - time.time())
+
+class RetryHandler(meta.MetaMixin):
+    """
+    This handler implements the IRetry interface with capped exponential
+    backoff and full jitter, i.e. the delay before attempt N+1 is a random
+    value between 0 and min(backoff_max, backoff_factor * 2 ** (N - 1)).
+
+    Optional Arguments / Meta:
+
+        max_attempts
+            The maximum number of attempts (including the first) of a
+            request.  Default: 3.
+
+        backoff_factor
+            Seconds.  The base of the exponential backoff.  Default: 0.5.
+
+        backoff_max
+            Seconds.  The maximum backoff before jitter.  Default: 30.
+
+        retry_statuses
+            A list of response status codes that are retried.
+            Default: [429, 502, 503, 504].
+
+        retry_methods
+            A list of (idempotent) methods that are retried.  Requests of
+            other methods are only retried if they carry an Idempotency-Key
+            header.  Default: ['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'].
+
+        respect_retry_after
+            Boolean.  Whether or not to wait for the time given by a
+            Retry-After response header instead of the backoff.
+            Default: True.
+
+        max_retry_after
+            Seconds.  A Retry-After longer than this is not waited for, and
+            the response is returned as is.  Default: 120.
+
+        budget_ratio
+            The retry budget shared by all requests of the handler: every
+            first attempt earns budget_ratio retries, every retry spends
+            one.  Prevents retry storms when an upstream is down.
+            Default: 0.2.
+
+        budget_burst
+            The maximum (and initial) number of retries held by the budget.
+            Default: 10.
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.retry import RetryHandler
+
+        api = drest.API('http://localhost:8000/api/v1/',
+                        retry_handler=RetryHandler,
+                        max_attempts=5)
+
+    """
+    class Meta:
+        max_attempts = 3
+        backoff_factor = 0.5
+        backoff_max = 30
+        retry_statuses = [429, 502, 503, 504]
+        retry_methods = ['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE']
+        respect_retry_after = True
+        max_retry_after = 120
+        budget_ratio = 0.2
+        budget_burst = 10
+
+    def __init__(self, **kw):
+        super(RetryHandler, self).__init__(**kw)
+        self._budget = float(self._meta.budget_burst)
+        self._lock = threading.Lock()
+
+    def _is_idempotent(self, method, headers):
+        if method in self._meta.retry_methods:
+            return True
+        for key in headers:
+            if key.lower() == 'idempotency-key':
+                return True
+        return False
+
+    def _withdraw(self):
+        with self._lock:
+            if self._budget < 1:
+                return False
+            self._budget -= 1
+            return True
+
+    def _deposit(self):
+        with self._lock:
+            self._budget = min(float(self._meta.budget_burst),
+                               self._budget + self._meta.budget_ratio)
+
+    def get_backoff(self, attempt):
+        """Returns the (jittered) backoff after attempt number 'attempt'."""
+        ceiling = min(self._meta.backoff_max,
+                      self._meta.backoff_factor * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def get_delay(self, method, attempt, headers, res_headers=None,
+                  error=None):
+        if attempt == 1:
+            self._deposit()
+
+        if res_headers is not None:
+            status = int(res_headers['status'])
+            if status not in self._meta.retry_statuses:
+                return None
+
+        if attempt >= self._meta.max_attempts:
+            return None
+        if not self._is_idempotent(method, headers):
+            return None
+
+        delay = None
+        if res_headers is not None and self._meta.respect_retry_after:
+            delay = parse_retry_after(res_headers.get('retry-after'))
+            if delay is not None and delay > self._meta.max_retry_after:
+                return None
+        if delay is None:
+            delay = self.get_backoff(attempt)
+
+        if not self._withdraw():
+            return None
+        return delay
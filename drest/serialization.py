@@ -1,4 +1,12 @@
 
+import re
+import codecs
+
+try:
+    import json # pragma: no cover
+except ImportError as e: # pragma: no cover
+    import simplejson as json # pragma: no cover
+
 from . import interface, exc, meta
 
 def validate(obj):
@@ -25,6 +33,14 @@ class ISerialization(interface.Interface):
             
     """
 
+    content_type = None
+    """
+    The media type of the serialized data (i.e. 'application/json'), used
+    to match the Content-Type of responses when negotiating formats (see
+    RequestHandler Meta.accept_serialization_handlers).
+
+    """
+
     def get_headers():
         """
         Return a dictionary of additional headers to include in requests.
@@ -62,11 +78,28 @@ class SerializationHandler(meta.MetaMixin):
     Generic Serialization Handler.  Should be used to subclass from.
             
     """
+    content_type = None
+    content_types = []
+
     def __init__(self, **kw):
         super(SerializationHandler, self).__init__(**kw)
         
     def get_headers(self):
-        return {}
+        if self.content_type is None:
+            return {}
+        return {'Content-Type' : self.content_type}
+
+    def accepts(self, content_type):
+        """
+        Returns whether content of the media type content_type can be
+        deserialized by this handler.
+
+        """
+        if content_type is None:
+            return False
+        content_type = content_type.split(';', 1)[0].strip().lower()
+        return content_type == self.content_type or \
+               content_type in self.content_types
         
     def deserialize(self, serialized_string):
         raise NotImplementedError
@@ -75,36 +108,306 @@ class SerializationHandler(meta.MetaMixin):
         raise NotImplementedError
         
 
+JSON_BACKENDS = ['orjson', 'ujson', 'simplejson', 'json']
+"""The json backends in order of preference."""
+
+def get_json_backend(name=None):
+    """
+    Import and return a tuple of (name, module) of the json backend 'name',
+    or of the first available one of JSON_BACKENDS if name is None.
+
+    """
+    if name is not None:
+        if name not in JSON_BACKENDS:
+            raise exc.dRestAPIError("Unknown json backend '%s'" % name)
+        return (name, __import__(name))
+
+    for name in JSON_BACKENDS:
+        try:
+            return (name, __import__(name))
+        except ImportError:
+            pass
+
 class JsonSerializationHandler(SerializationHandler):
     """
-    This handler implements the ISerialization interface using the standard 
-    json library.
-    
+    This handler implements the ISerialization interface using the fastest
+    available json library (see JSON_BACKENDS).  orjson and ujson parse
+    content from bytes directly, and anything they reject is handed to the
+    standard json library so that results (and errors) are the same
+    whatever the backend.  They are only used to deserialize: request
+    bodies are serialized with the standard json library, as their output
+    differs from it (i.e. NaN and Infinity written as null, datetime and
+    UUID values accepted).
+
+    Optional Arguments / Meta:
+
+        json_backend
+            The name of the json library to use (one of JSON_BACKENDS).
+            Default: None (the first one available).
+
     """
+    content_type = 'application/json'
+
+    class Meta:
+        json_backend = None
+
     def __init__(self, **kw):
-        try:
-            import json # pragma: no cover
-        except ImportError as e: # pragma: no cover
-            import simplejson as json # pragma: no cover
-            
-        self.backend = json
         super(JsonSerializationHandler, self).__init__(**kw)
-        
+        self.backend_name, self.backend = \
+            get_json_backend(self._meta.json_backend)
+
+        # orjson and ujson parse bytes natively, the others decode them
+        # to str internally (slower than decoding up front)
+        self._fast_loads = None
+        self._loads = self.backend.loads
+        self._dumps = self.backend.dumps
+        if self.backend_name in ('orjson', 'ujson'):
+            self._fast_loads = self.backend.loads
+            self._loads = json.loads
+            self._dumps = json.dumps
+
     def deserialize(self, serialized_string):
+        # anything a fast backend rejects is handed to the standard library,
+        # which either accepts it (i.e. NaN, big integers) or produces the
+        # usual error message
+        if self._fast_loads is not None:
+            try:
+                return self._fast_loads(serialized_string)
+            except ValueError:
+                pass
+
         try:
             # Fix for Python3
             if type(serialized_string) == bytes:
                 serialized_string = serialized_string.decode('utf-8')
-        
-            return self.backend.loads(serialized_string)
+
+            return self._loads(serialized_string)
         except ValueError as e:
             return dict(error=e.args[0])
 
     def serialize(self, dict_obj):
-        return self.backend.dumps(dict_obj)
+        return self._dumps(dict_obj)
+
+    def deserialize_stream(self, fileobj, collection_name='objects',
+                           item_factory=None):
+        """
+        Incrementally deserialize a collection document read from fileobj.
+        Returns a JsonCollectionStream.
+
+        """
+        return JsonCollectionStream(fileobj, collection_name,
+                                    item_factory=item_factory)
                 
     def get_headers(self):
         headers = {
-            'Content-Type' : 'application/json',
+            'Content-Type' : self.content_type,
             }
         return headers
+
+class MsgPackSerializationHandler(SerializationHandler):
+    """
+    This handler implements the ISerialization interface using
+    `MessagePack <http://msgpack.org>`_.  Requires the msgpack library.
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.serialization import MsgPackSerializationHandler
+
+        # send and receive MessagePack
+        api = drest.API('http://localhost:8000/api/v1/',
+                        serialization_handler=MsgPackSerializationHandler,
+                        serialize=True)
+
+    """
+    content_type = 'application/x-msgpack'
+    content_types = ['application/msgpack', 'application/vnd.msgpack']
+
+    def __init__(self, **kw):
+        import msgpack
+        self.backend = msgpack
+        super(MsgPackSerializationHandler, self).__init__(**kw)
+
+    def deserialize(self, serialized_string):
+        try:
+            return self.backend.unpackb(serialized_string, raw=False)
+        except ValueError as e:
+            return dict(error=str(e))
+
+    def serialize(self, dict_obj):
+        return self.backend.packb(dict_obj, use_bin_type=True)
+
+class CBORSerializationHandler(SerializationHandler):
+    """
+    This handler implements the ISerialization interface using
+    `CBOR <http://cbor.io>`_ (RFC 8949).  Requires the cbor2 library.
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.serialization import CBORSerializationHandler
+
+        api = drest.API('http://localhost:8000/api/v1/',
+                        serialization_handler=CBORSerializationHandler,
+                        serialize=True)
+
+    """
+    content_type = 'application/cbor'
+
+    def __init__(self, **kw):
+        import cbor2
+        self.backend = cbor2
+        super(CBORSerializationHandler, self).__init__(**kw)
+
+    def deserialize(self, serialized_string):
+        try:
+            return self.backend.loads(serialized_string)
+        except (ValueError, self.backend.CBORDecodeError) as e:
+            return dict(error=str(e))
+
+    def serialize(self, dict_obj):
+        return self.backend.dumps(dict_obj)
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class JsonCollectionStream(object):
+    """
+    Incrementally parses a JSON document of the form
+    {"meta": {...}, "objects": [...]} (i.e. a TastyPie collection) as it is
+    read from a file-like object, yielding the items of the collection one
+    at a time.  Only the current item (and one chunk) is held in memory.
+
+    Every other top level key is available in self.data (a dictionary)
+    once it has been read, and the 'meta' block as self.meta.  TastyPie
+    sends 'meta' first, so it is available as soon as the first item is.
+
+    Required Arguments:
+
+        fileobj
+            A file-like object with a read(size) method returning bytes
+            (i.e. a drest.response.StreamingResponseHandler).
+
+    Optional Arguments:
+
+        collection_name
+            The top level key of the collection.  Default: objects.
+
+        chunk_size
+            The number of bytes to read at a time.  Default: 65536.
+
+        item_factory
+            A function called with every item of the collection, whose
+            return value is yielded in place of the item.  Default: None.
+
+    Usage:
+
+    .. code-block:: python
+
+        with JsonCollectionStream(open('users.json', 'rb')) as collection:
+            for obj in collection:
+                print(obj['username'])
+            print(collection.meta['total_count'])
+
+    """
+    def __init__(self, fileobj, collection_name='objects', chunk_size=65536,
+                 item_factory=None):
+        self.fileobj = fileobj
+        self.collection_name = collection_name
+        self.chunk_size = chunk_size
+        self.item_factory = item_factory
+        self.data = {}
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            raise ValueError("Unexpected end of JSON collection")
+        data = self.fileobj.read(self.chunk_size)
+        if not data:
+            self._eof = True
+            self._buf += self._decoder.decode(b'', final=True)
+        else:
+            self._buf += self._decoder.decode(data)
+        if self._pos > self.chunk_size:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+
+    def _next_char(self):
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            self._fill()
+
+    def _expect(self, chars):
+        char = self._next_char()
+        if char not in chars:
+            raise ValueError("Expecting one of %r at position %s, got %r" % \
+                             (chars, self._pos, char))
+        self._pos += 1
+        return char
+
+    def _value(self):
+        self._next_char()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if self._eof:
+                    raise
+                self._fill()
+                continue
+            # a number (or literal) at the end of the buffer may continue in
+            # the next chunk
+            if end == len(self._buf) and not self._eof:
+                self._fill()
+                continue
+            self._pos = end
+            return value
+
+    def __iter__(self):
+        self._expect('{')
+        if self._next_char() == '}':
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == self.collection_name:
+                self._expect('[')
+                if self._next_char() == ']':
+                    self._pos += 1
+                else:
+                    while True:
+                        if self.item_factory is None:
+                            yield self._value()
+                        else:
+                            yield self.item_factory(self._value())
+                        if self._expect(',]') == ']':
+                            break
+            else:
+                self.data[key] = self._value()
+            if self._expect(',}') == '}':
+                break
+
+    @property
+    def meta(self):
+        """The 'meta' block of the document (None until it was read)."""
+        return self.data.get('meta')
+
+    def close(self):
+        """Close the underlying file-like object."""
+        if hasattr(self.fileobj, 'close'):
+            self.fileobj.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
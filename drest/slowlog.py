@@ -0,0 +1,355 @@
+"""dRest slow request log."""
+
+import re
+import sys
+import json
+import time
+import heapq
+import itertools
+import threading
+
+if sys.version_info[0] < 3:
+    from urlparse import urlsplit # pragma: no cover
+else:
+    from urllib.parse import urlsplit # pragma: no cover
+
+from . import exc, clock
+
+PHASES = ('serialize', 'connect', 'ttfb', 'transfer', 'http', 'deserialize')
+"""The phases recorded per request (see drest.hooks.RequestContext)."""
+
+_ID_SEGMENT = re.compile(
+    r'^(\d+|[0-9a-fA-F]{16,}|'
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+    r'[0-9a-fA-F]{12})$')
+
+def get_url_template(url, max_length=200):
+    """
+    Returns the path of url with id-like segments (numbers, uuids and long
+    hex strings) replaced by '{id}', and without the query string, i.e.
+    'http://localhost:8000/api/v1/users/42/?a=b' -> '/api/v1/users/{id}/'.
+    The result is cut off at max_length characters.
+
+    """
+    path = urlsplit(url).path
+    segments = ['{id}' if _ID_SEGMENT.match(s) else s \
+                for s in path.split('/')]
+    return '/'.join(segments)[:max_length]
+
+class SlowRequest(object):
+    """
+    A recorded request.  Attributes: time (epoch seconds), method, url (the
+    url template), resource, status (None if no response was received),
+    request_size, response_size, duration (seconds), phases (a tuple of
+    seconds or None if not measured, in the order of drest.slowlog.PHASES)
+    and reason ('threshold' or 'top').
+
+    """
+    __slots__ = ('time', 'method', 'url', 'resource', 'status',
+                 'request_size', 'response_size', 'duration', 'phases',
+                 'reason')
+
+    def __init__(self, time, method, url, resource, status, request_size,
+                 response_size, duration, phases, reason):
+        self.time = time
+        self.method = method
+        self.url = url
+        self.resource = resource
+        self.status = status
+        self.request_size = request_size
+        self.response_size = response_size
+        self.duration = duration
+        self.phases = phases
+        self.reason = reason
+
+    def to_dict(self):
+        """
+        Returns the record as a (JSON serializable) dictionary.  Its
+        'phases' only hold the phases that were measured.
+
+        """
+        data = dict([(name, getattr(self, name)) for name in self.__slots__])
+        data['phases'] = dict([(name, value) for name, value \
+                               in zip(PHASES, self.phases) \
+                               if value is not None])
+        return data
+
+    def __repr__(self):
+        return '<SlowRequest %s %s %.3fs>' % (self.method, self.url,
+                                              self.duration)
+
+class SlowRequestLog(object):
+    """
+    Records requests that took longer than threshold, or that are among
+    the top_n slowest of the current window, in a ring buffer of capacity
+    records.  The buffer is allocated up front and urls are stored as
+    templates cut off at max_url_length, so the log uses a fixed amount of
+    memory no matter how many requests are recorded (the oldest records are
+    overwritten).  A single log can be shared by any number of threads and
+    API/RequestHandler objects.
+
+    Requests are timed from the moment they are made until the response
+    object is complete (or the request failed).  Records carry the phases
+    in drest.slowlog.PHASES that were measured, which depends on the
+    request handler:
+
+        * 'connect', 'ttfb' and 'transfer' are only measured with
+          Meta.transport=drest.transport.ConnectionPool (or with
+          drest.aio.AsyncRequestHandler).  The default httplib2 transport
+          only reports 'http', the whole exchange.
+
+        * 'deserialize' is only measured with eager deserialization, as a
+          response deserialized lazily (Meta.lazy_deserialize) is recorded
+          before its data is parsed.
+
+    For the full breakdown use:
+
+    .. code-block:: python
+
+        api = drest.API('http://localhost:8000/api/v1/',
+                        slow_request_log=slow, transport=ConnectionPool(),
+                        lazy_deserialize=False)
+
+    Optional Arguments:
+
+        threshold
+            Seconds.  Requests taking longer are always recorded.
+            Default: 1.0.
+
+        top_n
+            The number of slowest requests per window that are recorded
+            even if they are below threshold.  They are added to the log
+            when their window closes (on the first record() or query()
+            after it), once the slowest are known.  Requests recorded for
+            threshold count towards the top_n, but are not recorded twice.
+            Default: 0 (disabled).
+
+        window
+            The length of a top_n window in seconds.  Default: 60.
+
+        capacity
+            The number of records kept.  Default: 1000.
+
+        max_url_length
+            The maximum length of the stored url templates.  Default: 200.
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.slowlog import SlowRequestLog
+
+        slow = SlowRequestLog(threshold=0.5, top_n=5)
+        api = drest.API('http://localhost:8000/api/v1/',
+                        slow_request_log=slow)
+        ...
+        for record in slow.query(resource='users', min_duration=2):
+            print(record.url, record.duration, record.to_dict()['phases'])
+
+        slow.dump(open('slow.jsonl', 'w'))
+
+    """
+    def __init__(self, threshold=1.0, top_n=0, window=60, capacity=1000,
+                 max_url_length=200):
+        if capacity < 1:
+            raise exc.dRestAPIError("capacity must be at least 1")
+        self.threshold = threshold
+        self.top_n = top_n
+        self.window = window
+        self.capacity = capacity
+        self.max_url_length = max_url_length
+        self._buffer = [None] * capacity
+        self._next = 0
+        self._count = 0
+        # min heap of the (duration, sequence, entry) of the top_n slowest
+        # requests of the current window, entry is None for the requests
+        # already recorded for threshold
+        self._top = []
+        self._sequence = itertools.count()
+        self._window_start = clock.now()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            self._close_window(clock.now())
+            return min(self._count, self.capacity)
+
+    def _append(self, entry):
+        # called with the lock held
+        self._buffer[self._next] = entry
+        self._next = (self._next + 1) % self.capacity
+        self._count += 1
+
+    def _close_window(self, now):
+        # called with the lock held, records the top_n slowest requests of
+        # the window (in the order they were made) once it is over
+        if now - self._window_start < self.window:
+            return
+        for duration, sequence, entry in sorted(self._top,
+                                                key=lambda item: item[1]):
+            if entry is not None:
+                self._append(entry)
+        self._top = []
+        self._window_start = now
+
+    def _is_top(self, duration):
+        # called with the lock held
+        return self.top_n and (len(self._top) < self.top_n or \
+                               duration > self._top[0][0])
+
+    def record(self, method, url, duration, resource=None, status=None,
+               request_size=0, response_size=0, phases=None):
+        """
+        Record a request if it is slow (see the class documentation).
+        Returns the SlowRequest, or None if it was not recorded.  A
+        SlowRequest with reason 'top' is only added to the log when its
+        window closes, and only if it is still among the top_n slowest.
+
+        Required Arguments:
+
+            method
+                The HTTP method.
+
+            url
+                The url of the request (stored as a template, see
+                get_url_template()).
+
+            duration
+                Seconds.
+
+        Optional Arguments:
+
+            resource
+                The resource name.
+
+            status
+                The response status.
+
+            request_size, response_size
+                In bytes.
+
+            phases
+                A dictionary of phase name -> seconds (see PHASES).
+
+        """
+        slow = self.threshold is not None and duration >= self.threshold
+        with self._lock:
+            self._close_window(clock.now())
+            if not slow and not self._is_top(duration):
+                return None
+
+        phases = phases or {}
+        entry = SlowRequest(time.time(), method,
+                            get_url_template(url, self.max_url_length),
+                            resource, status, request_size, response_size,
+                            duration, tuple([phases.get(p) for p in PHASES]),
+                            'threshold' if slow else 'top')
+        with self._lock:
+            if slow:
+                self._append(entry)
+            if self._is_top(duration):
+                item = (duration, next(self._sequence),
+                        None if slow else entry)
+                if len(self._top) < self.top_n:
+                    heapq.heappush(self._top, item)
+                else:
+                    heapq.heapreplace(self._top, item)
+        return entry
+
+    def query(self, min_duration=None, resource=None, method=None,
+              since=None, limit=None):
+        """
+        Returns the recorded requests matching all of the given criteria,
+        newest first.
+
+        Optional Arguments:
+
+            min_duration
+                Seconds.
+
+            resource
+                The resource name.
+
+            method
+                The HTTP method.
+
+            since
+                Epoch seconds.
+
+            limit
+                The maximum number of records returned.
+
+        """
+        with self._lock:
+            self._close_window(clock.now())
+            size = min(self._count, self.capacity)
+            entries = [self._buffer[(self._next - i - 1) % self.capacity] \
+                       for i in range(size)]
+        result = []
+        for entry in entries:
+            if (min_duration is not None and entry.duration < min_duration) \
+               or (resource is not None and entry.resource != resource) \
+               or (method is not None and entry.method != method) \
+               or (since is not None and entry.time < since):
+                continue
+            result.append(entry)
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def dump(self, stream=None):
+        """
+        Returns every record as a list of dictionaries (newest first), or
+        writes them to stream as lines of JSON if given.
+
+        """
+        records = [entry.to_dict() for entry in self.query()]
+        if stream is None:
+            return records
+        for record in records:
+            stream.write('%s\n' % json.dumps(record, sort_keys=True))
+
+    def clear(self):
+        """Drop all records."""
+        with self._lock:
+            self._buffer = [None] * self.capacity
+            self._next = 0
+            self._count = 0
+            self._top = []
+
+    def instrument(self, request_handler):
+        """
+        Record the slow requests of request_handler (called by request
+        handlers that have Meta.slow_request_log set).  Uses the lifecycle
+        hooks of the request handler.
+
+        Required Arguments:
+
+            request_handler
+                The (instantiated) request handler.
+
+        """
+        def record(context, status):
+            content = context.content
+            if hasattr(content, 'read'):
+                response_size = int((context.res_headers or {}).get(
+                    'content-length', 0))
+            else:
+                response_size = len(content or '')
+            self.record(context.method, context.url,
+                        clock.now() - context.timings['start'],
+                        request_handler.get_resource_name(context.url),
+                        status, len(context.payload or ''), response_size,
+                        context.phases)
+
+        def post_request(context):
+            record(context, context.response.status)
+
+        def on_error(context):
+            response = getattr(context.error, 'response', None)
+            record(context, response.status if response is not None \
+                            else None)
+
+        request_handler.add_hook('post_request', post_request)
+        request_handler.add_hook('on_error', on_error)
@@ -0,0 +1,538 @@
+"""dRest request tracing with W3C Trace Context propagation."""
+
+import re
+import sys
+import json
+import time
+import random
+import threading
+from collections import deque
+
+try:
+    import contextvars
+except ImportError: # pragma: no cover
+    contextvars = None # pragma: no cover
+
+from . import interface, clock
+
+def validate(obj):
+    """Validates an exporter implementation against the IExporter
+    interface."""
+    members = [
+        'export',
+        ]
+    interface.validate(IExporter, obj, members)
+
+class IExporter(interface.Interface):
+    """
+    This class defines the Span Exporter Interface.  An exporter is an
+    *instantiated* object passed to drest.tracing.Tracer that ships
+    finished spans somewhere (a collector, a log, memory).  Exporters must
+    be safe to call from multiple threads.
+
+    Implementations do *not* subclass from interfaces.
+
+    """
+
+    def export(spans):
+        """
+        Called with a list of finished, sampled drest.tracing.Span objects.
+
+        """
+
+_TRACEPARENT = re.compile(
+    r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?$')
+
+def parse_traceparent(value, tracestate=None):
+    """
+    Parse a W3C traceparent header value and return a (remote) SpanContext,
+    or None if it is invalid.
+
+    Required Arguments:
+
+        value
+            The traceparent header value.
+
+    Optional Arguments:
+
+        tracestate
+            The tracestate header value, carried along as is.
+
+    """
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags, rest = match.groups()
+    if version == 'ff' or (version == '00' and rest) or \
+       trace_id == '0' * 32 or span_id == '0' * 16:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1),
+                       tracestate, remote=True)
+
+_random = random.Random()
+
+def _new_id(bits):
+    while True:
+        value = _random.getrandbits(bits)
+        if value:
+            return '%0*x' % (bits // 4, value)
+
+class SpanContext(object):
+    """
+    The identity of a span, as propagated to other services.
+
+    Required Arguments:
+
+        trace_id
+            32 hex characters.
+
+        span_id
+            16 hex characters.
+
+    Optional Arguments:
+
+        sampled
+            Boolean.  Default: True.
+
+        tracestate
+            The vendor specific tracestate header value.  Default: None.
+
+        remote
+            Boolean.  Whether the context was received from another service.
+            Default: False.
+
+    """
+    def __init__(self, trace_id, span_id, sampled=True, tracestate=None,
+                 remote=False):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+        self.tracestate = tracestate
+        self.remote = remote
+
+    @property
+    def traceparent(self):
+        """The W3C traceparent header value."""
+        return '00-%s-%s-%s' % (self.trace_id, self.span_id,
+                                '01' if self.sampled else '00')
+
+    def __repr__(self):
+        return '<SpanContext %s>' % self.traceparent
+
+class Span(object):
+    """
+    A timed operation of a trace, created by Tracer.start_span().  Times
+    are epoch seconds.  Call end() (or use Tracer.span() as a context
+    manager) to finish it and hand it to the exporter.
+
+    """
+    def __init__(self, tracer, name, context, parent_id=None,
+                 attributes=None, start_time=None):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_time = start_time if start_time is not None \
+                          else time.time()
+        self.end_time = None
+        self.error = None
+
+    @property
+    def trace_id(self):
+        return self.context.trace_id
+
+    @property
+    def span_id(self):
+        return self.context.span_id
+
+    @property
+    def sampled(self):
+        return self.context.sampled
+
+    @property
+    def duration(self):
+        """Seconds, or None while the span has not ended."""
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self, end_time=None, error=None):
+        """
+        Finish the span (only the first call counts).
+
+        Optional Arguments:
+
+            end_time
+                Epoch seconds.  Default: now.
+
+            error
+                An exception (or message) the operation failed with.
+
+        """
+        if self.end_time is not None:
+            return
+        self.end_time = end_time if end_time is not None else time.time()
+        if error is not None:
+            self.error = str(error) or error.__class__.__name__
+        self.tracer._finish(self)
+
+    def to_dict(self):
+        """Returns the span as a (JSON serializable) dictionary."""
+        return dict(
+            name=self.name,
+            trace_id=self.trace_id,
+            span_id=self.span_id,
+            parent_id=self.parent_id,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            attributes=self.attributes,
+            error=self.error,
+            )
+
+    def __repr__(self):
+        return '<Span %s %s>' % (self.name, self.span_id)
+
+class InMemoryExporter(object):
+    """
+    Keeps the most recent max_spans spans in memory (self.spans), i.e. for
+    tests or a debug page.
+
+    Optional Arguments:
+
+        max_spans
+            Default: 10000.
+
+    """
+    def __init__(self, max_spans=10000):
+        self._spans = deque(maxlen=max_spans)
+
+    @property
+    def spans(self):
+        return list(self._spans)
+
+    def export(self, spans):
+        self._spans.extend(spans)
+
+    def clear(self):
+        self._spans.clear()
+
+class StreamExporter(object):
+    """
+    Writes every span as a line of JSON to a file-like object.
+
+    Optional Arguments:
+
+        stream
+            Default: sys.stderr.
+
+    """
+    def __init__(self, stream=None):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        stream = self.stream or sys.stderr
+        lines = ''.join(['%s\n' % json.dumps(s.to_dict(), sort_keys=True) \
+                         for s in spans])
+        with self._lock:
+            stream.write(lines)
+
+if contextvars is not None:
+    _current_span = contextvars.ContextVar('drest_current_span',
+                                           default=None)
+
+    def _get_current():
+        return _current_span.get()
+
+    def _set_current(span):
+        return _current_span.set(span)
+
+    def _reset_current(token):
+        _current_span.reset(token)
+
+else: # pragma: no cover
+    _local = threading.local()
+
+    def _get_current():
+        return getattr(_local, 'span', None)
+
+    def _set_current(span):
+        token = _get_current()
+        _local.span = span
+        return token
+
+    def _reset_current(token):
+        _local.span = token
+
+class _ActiveSpan(object):
+    def __init__(self, span):
+        self.span = span
+        self._token = None
+
+    def __enter__(self):
+        self._token = _set_current(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, tb):
+        _reset_current(self._token)
+        self.span.end(error=exc_value)
+
+class Tracer(object):
+    """
+    Creates spans, samples traces and hands finished spans to an exporter.
+    A single tracer can be shared by any number of threads and
+    API/RequestHandler objects.
+
+    A request handler that has a tracer set as Meta.tracer creates a span
+    per request ('HTTP GET', etc), with 'serialize', 'transport' (per
+    attempt) and 'deserialize' child spans, and sends the traceparent (and
+    tracestate) headers with every request.  With Meta.lazy_deserialize the
+    content is deserialized on first access of response.data, after the
+    request span ended: the request span then has the
+    'drest.lazy_deserialize' attribute, and the 'deserialize' span (if the
+    data is accessed at all) is a sibling of it, with the
+    'drest.request_span_id' attribute.  Requests made while a span is
+    current (see self.span()) are part of its trace.  Requests made outside
+    of any trace start a new one, which is sampled with sample_rate: for
+    traces that are not sampled no spans are created and no headers are
+    sent at all.
+
+    Optional Arguments:
+
+        exporter
+            An *instantiated* exporter implementing the IExporter interface.
+            Default: a new drest.tracing.InMemoryExporter.
+
+        sample_rate
+            The probability (0.0 - 1.0) that a new trace is sampled.  Traces
+            continued from a parent follow its sampled flag.  Default: 1.0.
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.tracing import Tracer, StreamExporter
+
+        tracer = Tracer(exporter=StreamExporter(), sample_rate=0.1)
+        api = drest.API('http://localhost:8000/api/v1/', tracer=tracer)
+        api.add_resource('users')
+
+        # continue the trace of an incoming request
+        parent = tracer.extract(incoming_request.headers)
+        with tracer.span('handle-request', parent=parent):
+            api.users.get(1)
+
+    """
+    def __init__(self, exporter=None, sample_rate=1.0):
+        if exporter is None:
+            exporter = InMemoryExporter()
+        validate(exporter)
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def _sample(self):
+        if self.sample_rate >= 1:
+            return True
+        return _random.random() < self.sample_rate
+
+    def current_span(self):
+        """Returns the current span (of this thread/task), or None."""
+        return _get_current()
+
+    def start_span(self, name, parent=None, attributes=None,
+                   start_time=None, sampled=None):
+        """
+        Start and return a new Span.
+
+        Required Arguments:
+
+            name
+                The name of the operation.
+
+        Optional Arguments:
+
+            parent
+                The parent Span or SpanContext.  Default: the current span.
+
+            attributes
+                Dictionary of attributes of the span.
+
+            start_time
+                Epoch seconds.  Default: now.
+
+            sampled
+                Boolean.  The sampling decision of a new trace.  Default:
+                None (sample with self.sample_rate).
+
+        """
+        if parent is None:
+            parent = _get_current()
+        if isinstance(parent, Span):
+            parent = parent.context
+
+        if parent is not None:
+            context = SpanContext(parent.trace_id, _new_id(64),
+                                  parent.sampled, parent.tracestate)
+            parent_id = parent.span_id
+        else:
+            if sampled is None:
+                sampled = self._sample()
+            context = SpanContext(_new_id(128), _new_id(64), sampled)
+            parent_id = None
+        return Span(self, name, context, parent_id, attributes, start_time)
+
+    def span(self, name, parent=None, attributes=None):
+        """
+        Returns a context manager that starts a span, makes it the current
+        span while the block runs, and ends it (recording any exception).
+
+        .. code-block:: python
+
+            with tracer.span('sync-users') as span:
+                span.set_attribute('count', len(users))
+
+        """
+        return _ActiveSpan(self.start_span(name, parent, attributes))
+
+    def extract(self, headers):
+        """
+        Returns the SpanContext of the traceparent/tracestate headers of an
+        incoming request (a dictionary), or None.
+
+        """
+        values = dict([(k.lower(), v) for k, v in headers.items()])
+        return parse_traceparent(values.get('traceparent'),
+                                 values.get('tracestate'))
+
+    def inject(self, span, headers):
+        """
+        Add the traceparent (and tracestate) headers of span (a Span or
+        SpanContext) to headers (a dictionary).
+
+        """
+        context = getattr(span, 'context', span)
+        headers['traceparent'] = context.traceparent
+        if context.tracestate:
+            headers['tracestate'] = context.tracestate
+
+    def _finish(self, span):
+        if span.sampled:
+            self.exporter.export([span])
+
+    def instrument(self, request_handler):
+        """
+        Trace every request made by request_handler (called by request
+        handlers that have Meta.tracer set).  Uses the lifecycle hooks of
+        the request handler.
+
+        Required Arguments:
+
+            request_handler
+                The (instantiated) request handler.
+
+        """
+        def to_epoch(timestamp):
+            # context timings are monotonic
+            return time.time() - (clock.now() - timestamp)
+
+        def pre_request(context):
+            parent = _get_current()
+            if parent is None and not self._sample():
+                return
+            span = self.start_span('HTTP %s' % context.method, parent,
+                                   sampled=True)
+            span.set_attribute('http.method', context.method)
+            context.spans['request'] = span
+            if span.sampled:
+                context.spans['serialize'] = self.start_span('serialize',
+                                                             span)
+
+        def post_serialize(context):
+            span = context.spans.get('request')
+            if span is None:
+                return
+            span.set_attribute('http.url', context.url)
+            resource = request_handler.get_resource_name(context.url)
+            if resource is not None:
+                span.set_attribute('drest.resource', resource)
+            if 'serialize' in context.spans:
+                context.spans['serialize'].end()
+
+        def pre_send(context):
+            span = context.spans.get('request')
+            if span is None:
+                return
+            previous = context.spans.get('transport')
+            if previous is not None:
+                # an attempt that failed without a response
+                previous.end()
+            if span.sampled:
+                span = self.start_span('transport', span)
+                span.set_attribute('attempt', context.attempt)
+                context.spans['transport'] = span
+            self.inject(span, context.headers)
+
+        def post_receive(context):
+            span = context.spans.get('transport')
+            if span is not None:
+                span.set_attribute('http.status_code',
+                                   int(context.res_headers['status']))
+                span.end()
+
+        def post_deserialize(context):
+            span = context.spans.get('request')
+            if span is None or not span.sampled:
+                return
+            timings = context.timings
+            start_time = to_epoch(timings['deserialize_start'])
+            if span.end_time is None:
+                child = self.start_span('deserialize', span,
+                                        start_time=start_time)
+            else:
+                # lazily deserialized after the request span ended: a
+                # sibling of the request span (in the same trace), so that
+                # every child lies within its parent
+                child = Span(self, 'deserialize',
+                             SpanContext(span.trace_id, _new_id(64),
+                                         span.sampled,
+                                         span.context.tracestate),
+                             span.parent_id,
+                             {'drest.request_span_id': span.span_id},
+                             start_time)
+            child.end(to_epoch(timings['deserialized']))
+
+        def post_request(context):
+            span = context.spans.get('request')
+            if span is not None:
+                span.set_attribute('http.status_code',
+                                   context.response.status)
+                if getattr(context.response, '_deserializer', None) \
+                   is not None:
+                    span.set_attribute('drest.lazy_deserialize', True)
+                span.end()
+
+        def on_error(context):
+            transport = context.spans.get('transport')
+            if transport is not None:
+                transport.end(error=context.error)
+            span = context.spans.get('request')
+            if span is not None:
+                response = getattr(context.error, 'response', None)
+                if response is not None:
+                    span.set_attribute('http.status_code', response.status)
+                span.end(error=context.error)
+
+        request_handler.add_hook('pre_request', pre_request)
+        request_handler.add_hook('post_serialize', post_serialize)
+        request_handler.add_hook('pre_send', pre_send)
+        request_handler.add_hook('post_receive', post_receive)
+        request_handler.add_hook('post_deserialize', post_deserialize)
+        request_handler.add_hook('post_request', post_request)
+        request_handler.add_hook('on_error', on_error)
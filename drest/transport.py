@@ -0,0 +1,436 @@
+"""dRest transport handlers (the objects that actually speak HTTP)."""
+
+import sys
+import time
+import socket
+import threading
+
+if sys.version_info[0] < 3:
+    import httplib # pragma: no cover
+    from urlparse import urlsplit # pragma: no cover
+
+else:
+    from http import client as httplib # pragma: no cover
+    from urllib.parse import urlsplit # pragma: no cover
+
+from . import exc, clock, interface
+
+def validate(obj):
+    """Validates a handler implementation against the ITransport interface."""
+    members = [
+        'request',
+        ]
+    interface.validate(ITransport, obj, members)
+
+class ITransport(interface.Interface):
+    """
+    This class defines the Transport Interface.  A transport is an
+    *instantiated* object passed to a request handler as Meta.transport in
+    place of the default (per handler) httplib2.Http() object.  Transports
+    must be safe to share between threads and request handlers.
+
+    Implementations do *not* subclass from interfaces.
+
+    """
+
+    def request(uri, method='GET', body=None, headers=None, timeout=None):
+        """
+        Make an HTTP request.
+
+        Required Arguments:
+
+            uri
+                The full url of the request.
+
+        Optional Arguments:
+
+            method
+                The HTTP method of the request.
+
+            body
+                The (encoded) request body.
+
+            headers
+                Dictionary of headers of the request.
+
+            timeout
+                Socket timeout in seconds.
+
+        Returns: tuple of (headers, content), where headers is a dictionary
+        with lowercase keys and a 'status' key (same as httplib2).
+
+        """
+
+class _HostPool(object):
+    """The connections of a single (scheme, host, port)."""
+    def __init__(self):
+        self.lock = threading.Condition(threading.Lock())
+        self.idle = []
+        self.total = 0
+
+class ConnectionPool(object):
+    """
+    A thread safe, keep-alive connection pool implementing the ITransport
+    interface on top of the standard library httplib.  A single pool can be
+    shared by any number of threads and API/RequestHandler objects.
+
+    Optional Arguments:
+
+        max_connections
+            The maximum number of open connections per host.  Default: 10.
+
+        idle_timeout
+            Seconds after which an idle connection is closed rather than
+            reused.  Default: 60.
+
+        block
+            Boolean.  Whether a checkout waits for a free connection when
+            the host is at max_connections.  If False, dRestAPIError is
+            raised instead.  Default: True.
+
+        checkout_timeout
+            The maximum seconds to wait for a free connection when block is
+            True.  Default: None (wait forever).
+
+        timeout
+            Default socket timeout in seconds.  Default: None.
+
+        ignore_ssl_validation
+            Boolean.  Whether or not to ignore ssl validation errors.
+            Default: False
+
+    Usage:
+
+    .. code-block:: python
+
+        import drest
+        from drest.transport import ConnectionPool
+
+        pool = ConnectionPool(max_connections=20)
+        api1 = drest.API('http://localhost:8000/api/v1/', transport=pool)
+        api2 = drest.API('http://localhost:8001/api/v1/', transport=pool)
+
+        # tune the pool size with
+        pool.stats()
+
+    """
+    def __init__(self, max_connections=10, idle_timeout=60, block=True,
+                 checkout_timeout=None, timeout=None,
+                 ignore_ssl_validation=False):
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.block = block
+        self.checkout_timeout = checkout_timeout
+        self.timeout = timeout
+        self.ignore_ssl_validation = ignore_ssl_validation
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._stats = dict(reused=0, missed=0, waited=0, expired=0)
+
+    def _get_host_pool(self, key):
+        with self._lock:
+            if key not in self._hosts:
+                self._hosts[key] = _HostPool()
+            return self._hosts[key]
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _new_connection(self, key, timeout):
+        scheme, host, port = key
+        if scheme == 'https':
+            import ssl
+            if self.ignore_ssl_validation:
+                context = ssl._create_unverified_context()
+            else:
+                context = ssl.create_default_context()
+            return httplib.HTTPSConnection(host, port, timeout=timeout,
+                                           context=context)
+        return httplib.HTTPConnection(host, port, timeout=timeout)
+
+    def checkout(self, key, timeout=None):
+        """
+        Check out a connection for key (a tuple of (scheme, host, port)).
+        Returns a tuple of (connection, reused).
+
+        """
+        host_pool = self._get_host_pool(key)
+        deadline = None
+        if self.checkout_timeout is not None:
+            deadline = time.time() + self.checkout_timeout
+
+        with host_pool.lock:
+            while True:
+                now = time.time()
+                while host_pool.idle:
+                    conn, last_used = host_pool.idle.pop()
+                    if now - last_used > self.idle_timeout:
+                        conn.close()
+                        host_pool.total -= 1
+                        self._count('expired')
+                        continue
+                    self._count('reused')
+                    return (conn, True)
+
+                if host_pool.total < self.max_connections:
+                    host_pool.total += 1
+                    self._count('missed')
+                    break
+
+                if not self.block:
+                    raise exc.dRestAPIError(
+                        "Connection pool for %s:%s is exhausted" % key[1:])
+
+                self._count('waited')
+                if deadline is None:
+                    host_pool.lock.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise exc.dRestAPIError(
+                            "Timed out waiting for a connection to %s:%s" % \
+                            key[1:])
+                    host_pool.lock.wait(remaining)
+
+        try:
+            conn = self._new_connection(key, timeout)
+        except Exception:
+            # give the slot reserved above back
+            with host_pool.lock:
+                host_pool.total -= 1
+                host_pool.lock.notify()
+            raise
+        return (conn, False)
+
+    def checkin(self, key, conn, reuse=True):
+        """
+        Return a checked out connection to the pool.  If reuse is False the
+        connection is closed instead.
+
+        """
+        host_pool = self._get_host_pool(key)
+        with host_pool.lock:
+            if reuse:
+                host_pool.idle.append((conn, time.time()))
+            else:
+                conn.close()
+                host_pool.total -= 1
+            host_pool.lock.notify()
+
+    def _send(self, key, target, method, body, headers, timeout,
+              stream=False, timings=None):
+        conn, reused = self.checkout(key, timeout)
+        try:
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            else:
+                conn.timeout = timeout
+                if timings is not None:
+                    conn.connect()
+            if timings is not None:
+                timings['connected'] = clock.now()
+            conn.request(method, target, body, headers)
+            res = conn.getresponse()
+            if timings is not None:
+                timings['first_byte'] = clock.now()
+            if not stream:
+                content = res.read()
+        except (socket.error, httplib.HTTPException) as e:
+            self.checkin(key, conn, reuse=False)
+            if not reused or isinstance(e, socket.timeout):
+                raise
+            # the kept-alive connection went stale, try once more on a
+            # fresh one
+            return self._send(key, target, method, body, headers, timeout,
+                              stream, timings)
+        except Exception:
+            self.checkin(key, conn, reuse=False)
+            raise
+
+        res_headers = {}
+        for name, value in res.getheaders():
+            name = name.lower()
+            if name in res_headers:
+                res_headers[name] = '%s, %s' % (res_headers[name], value)
+            else:
+                res_headers[name] = value
+        res_headers['status'] = str(res.status)
+
+        if stream:
+            return (res_headers, StreamingBody(self, key, conn, res))
+
+        self.checkin(key, conn, reuse=not res.will_close)
+        return (res_headers, content)
+
+    def _parse_uri(self, uri):
+        parts = urlsplit(uri)
+        scheme = parts.scheme or 'http'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        target = parts.path or '/'
+        if parts.query:
+            target = '%s?%s' % (target, parts.query)
+        return (key, target)
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                timeout=None, timings=None):
+        """
+        Make an HTTP request over a pooled connection.  See
+        ITransport.request().  If timings (a dictionary) is given, the
+        monotonic timestamps of when the connection was established
+        ('connected') and when the status line was received ('first_byte')
+        are recorded in it.
+
+        """
+        return self._request(uri, method, body, headers, timeout, False,
+                             timings)
+
+    def stream(self, uri, method='GET', body=None, headers=None,
+               timeout=None, timings=None):
+        """
+        The same as request(), however the returned content is a
+        StreamingBody that reads the response body from the connection on
+        demand.  The connection is returned to the pool once the body is
+        read completely or closed.
+
+        """
+        return self._request(uri, method, body, headers, timeout, True,
+                             timings)
+
+    def _request(self, uri, method, body, headers, timeout, stream,
+                 timings=None):
+        if headers is None:
+            headers = {}
+        if timeout is None:
+            timeout = self.timeout
+
+        key, target = self._parse_uri(uri)
+        try:
+            return self._send(key, target, method, body or None, headers,
+                              timeout, stream, timings)
+        except socket.gaierror as e:
+            raise exc.dRestAPIError(
+                "Unable to find the server at %s" % key[1])
+        except httplib.HTTPException as e:
+            # i.e. the server closed a fresh connection without responding
+            raise exc.dRestAPIError(
+                "%s: %s" % (e.__class__.__name__, e))
+
+    def stats(self):
+        """
+        Returns a dictionary of pool counters:
+
+            reused
+                Checkouts served by an idle keep-alive connection.
+
+            missed
+                Checkouts that had to open a new connection.
+
+            waited
+                Times a checkout had to wait for a free connection.
+
+            expired
+                Idle connections closed due to idle_timeout.
+
+            open
+                Currently open connections (idle and checked out).
+
+            idle
+                Currently idle connections.
+
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            hosts = list(self._hosts.values())
+        stats['open'] = sum([h.total for h in hosts])
+        stats['idle'] = sum([len(h.idle) for h in hosts])
+        return stats
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            hosts = list(self._hosts.values())
+        for host_pool in hosts:
+            with host_pool.lock:
+                while host_pool.idle:
+                    conn, last_used = host_pool.idle.pop()
+                    conn.close()
+                    host_pool.total -= 1
+                host_pool.lock.notify_all()
+
+class StreamingBody(object):
+    """
+    A file-like object wrapping the body of a streamed response.  It can be
+    read() like a file or iterated in chunks, and returns its connection to
+    the pool when the body is exhausted or close() is called.  Closing
+    before the body was read completely closes the connection instead of
+    reusing it.
+
+    Usage:
+
+    .. code-block:: python
+
+        headers, body = pool.stream('http://localhost:8000/export/')
+        with body:
+            for chunk in body.iter_content(65536):
+                out_file.write(chunk)
+
+    """
+    def __init__(self, pool, key, conn, res):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._res = res
+
+    @property
+    def closed(self):
+        return self._conn is None
+
+    def read(self, amt=None):
+        """
+        Read and return up to amt bytes (everything that is left if amt is
+        None).
+
+        """
+        if self._conn is None:
+            return b''
+        try:
+            if amt is None:
+                data = self._res.read()
+            else:
+                data = self._res.read(amt)
+        except Exception:
+            self._release(False)
+            raise
+        if not data or self._res.isclosed():
+            self._release(not self._res.will_close)
+        return data
+
+    def iter_content(self, chunk_size=65536):
+        """Iterate over the body in chunks of (at most) chunk_size bytes."""
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def __iter__(self):
+        return self.iter_content()
+
+    def _release(self, reuse):
+        if self._conn is not None:
+            conn = self._conn
+            self._conn = None
+            self._pool.checkin(self._key, conn, reuse=reuse)
+
+    def close(self):
+        """Return the connection to the pool (closing it if unread)."""
+        if self._conn is not None:
+            self._release(self._res.isclosed() and not self._res.will_close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
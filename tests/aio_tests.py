@@ -0,0 +1,241 @@
+"""Tests for drest.aio."""
+
+import asyncio
+import unittest
+from nose.tools import eq_, ok_, raises
+
+import drest
+from drest.aio import AsyncAPI, AsyncRequestHandler, AsyncRESTResourceHandler
+from drest.aio import AsyncConnectionPool
+from drest.testing import MOCKAPI
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+class AsyncTestCase(unittest.TestCase):
+    def test_make_request(self):
+        async def go():
+            req = AsyncRequestHandler()
+            response = await req.make_request('GET', '%s/users/1/' % MOCKAPI)
+            await req.close()
+            return response
+        response = run(go())
+        eq_(response.status, 200)
+        eq_(response.data['username'], 'admin')
+
+    def test_extra_url_params(self):
+        async def go():
+            req = AsyncRequestHandler()
+            req.add_url_param('username__icontains', 'ad')
+            response = await req.make_request('GET', '%s/users/' % MOCKAPI)
+            await req.close()
+            return response
+        response = run(go())
+        eq_(response.data['objects'][0]['username'], 'admin')
+
+    def test_transport(self):
+        pool = AsyncConnectionPool(max_connections=1)
+        async def go():
+            apis = [AsyncAPI(MOCKAPI, transport=pool) for i in range(2)]
+            responses = []
+            for api in apis:
+                responses.append(await api.make_request('GET', '/users/1/'))
+                await api.close()
+            # one connection, reused by the second api and left open
+            idle = sum([len(conns) for conns in pool._idle.values()])
+            pool.close()
+            return (apis, responses, idle)
+        apis, responses, idle = run(go())
+        eq_([r.status for r in responses], [200, 200])
+        ok_(apis[0].request._get_pool() is pool)
+        eq_(apis[0].request._pool, None)
+        eq_(idle, 1)
+
+    @raises(drest.exc.dRestAPIError)
+    def test_blocking_transport(self):
+        AsyncAPI(MOCKAPI, transport=drest.transport.ConnectionPool())
+
+    def test_prepared_request(self):
+        async def go():
+            api = AsyncAPI(MOCKAPI)
+            prepared = api.prepare('GET', '/users/1/')
+            responses = [await prepared.execute() for i in range(2)]
+            await api.close()
+            return responses
+        responses = run(go())
+        eq_([r.data['username'] for r in responses], ['admin', 'admin'])
+
+    def test_digest_auth(self):
+        async def go():
+            api = AsyncAPI(MOCKAPI, auth_handler=drest.auth.DigestAuthHandler)
+            api.add_resource('users_via_digest_auth')
+            api.auth('john.doe', 'JOHN_DOE_API_KEY')
+            responses = [await api.users_via_digest_auth.get() \
+                         for i in range(2)]
+            await api.close()
+            return (api, responses)
+        api, responses = run(go())
+        eq_(responses[1].data['objects'][0]['username'], 'admin')
+        eq_(list(api.request._auth._nonces.values())[0].count, 2)
+
+    def test_concurrent_get(self):
+        async def go():
+            async with AsyncAPI(MOCKAPI, max_connections=4) as api:
+                api.add_resource('users')
+                return await asyncio.gather(
+                    *[api.users.get(1 + (i % 2)) for i in range(20)]
+                    )
+        responses = run(go())
+        eq_(len(responses), 20)
+        eq_(responses[0].data['username'], 'admin')
+        eq_(responses[1].data['username'], 'john.doe')
+
+    def test_coalesce_requests(self):
+        async def go():
+            async with AsyncAPI(MOCKAPI, coalesce_requests=True) as api:
+                api.add_resource('users')
+                calls = []
+                make_request = api.request._make_request
+                async def counting_make_request(*args, **kw):
+                    calls.append(args[0])
+                    return await make_request(*args, **kw)
+                api.request._make_request = counting_make_request
+                responses = await asyncio.gather(
+                    *[api.users.get(1) for i in range(10)]
+                    )
+                return (api, calls, responses)
+        api, calls, responses = run(go())
+        eq_(len(calls), 1)
+        ok_(all([r is responses[0] for r in responses]))
+        eq_(responses[0].data['username'], 'admin')
+        eq_(api.request._async_flights, {})
+
+    def test_rate_limit(self):
+        async def go():
+            limiter = drest.ratelimit.RateLimitHandler
+            async with AsyncAPI(MOCKAPI, rate_limit_handler=limiter,
+                                rate=20, burst=1) as api:
+                api.add_resource('users')
+                started = asyncio.get_event_loop().time()
+                responses = await asyncio.gather(
+                    *[api.users.get(1) for i in range(3)]
+                    )
+                return (responses, asyncio.get_event_loop().time() - started)
+        responses, elapsed = run(go())
+        eq_([r.status for r in responses], [200, 200, 200])
+        ok_(elapsed >= 0.1)
+
+    def test_hooks(self):
+        async def go():
+            contexts = []
+            async with AsyncAPI(MOCKAPI) as api:
+                api.request.add_hook('post_receive', contexts.append)
+                await api.make_request('GET', '/users/1/')
+            return contexts
+        contexts = run(go())
+        phases = contexts[0].phases
+        for name in ['connect', 'ttfb', 'transfer', 'http']:
+            ok_(phases[name] >= 0, name)
+
+    def test_resource_handler(self):
+        async def go():
+            async with AsyncAPI(MOCKAPI) as api:
+                api.add_resource('users')
+                return api.users
+        ok_(isinstance(run(go()), AsyncRESTResourceHandler))
+
+    def test_get_many(self):
+        async def go():
+            async with AsyncAPI(MOCKAPI) as api:
+                api.add_resource('users')
+                return await api.users.get_many([2, 100123123, 1],
+                                                concurrency=2)
+        responses = run(go())
+        eq_(responses[0].data['username'], 'john.doe')
+        ok_(isinstance(responses[1], drest.exc.dRestRequestError))
+        eq_(responses[2].data['username'], 'admin')
+
+    @raises(drest.exc.dRestRequestError)
+    def test_get_one_bad(self):
+        async def go():
+            async with AsyncAPI(MOCKAPI) as api:
+                api.add_resource('users', path='/bogus_path/')
+                await api.users.get(1)
+        try:
+            run(go())
+        except drest.exc.dRestRequestError as e:
+            eq_(e.msg, 'Received HTTP Code 404 - Not Found (resource: users, id: 1)')
+            raise
+
+    def test_post_put_delete(self):
+        async def go():
+            class MyAPI(AsyncAPI):
+                class Meta:
+                    serialize = True
+            async with MyAPI(MOCKAPI) as api:
+                api.add_resource('projects')
+                response = await api.projects.post(dict(label='Async Project'))
+                eq_(response.status, 201)
+                pk = response.headers['location'].rstrip('/').split('/')[-1]
+                response = await api.projects.put(pk, dict(label='Async 2'))
+                response = await api.projects.get(pk)
+                eq_(response.data['label'], 'Async 2')
+                response = await api.projects.delete(pk)
+                eq_(response.status, 204)
+        run(go())
+
+    @raises(drest.exc.dRestAPIError)
+    def test_socket_timeout(self):
+        async def go():
+            req = AsyncRequestHandler(timeout=1)
+            await req.make_request(
+                'GET',
+                'http://localhost:8000/fake_long_request/',
+                params=dict(seconds=10),
+                )
+        try:
+            run(go())
+        except drest.exc.dRestAPIError as e:
+            ok_(e.__repr__().find('timed out') >= 0)
+            raise
+
+    @raises(drest.exc.dRestAPIError)
+    def test_server_not_found_error(self):
+        async def go():
+            req = AsyncRequestHandler()
+            await req.make_request('GET', 'http://bogus.example.com/api/')
+        try:
+            run(go())
+        except drest.exc.dRestAPIError as e:
+            ok_(e.__repr__().find('Unable to find the server') >= 0)
+            raise
+
+    @raises(drest.exc.dRestAPIError)
+    def test_bad_chunk_size(self):
+        async def handle(reader, writer):
+            await reader.readuntil(b'\r\n\r\n')
+            writer.write(b'HTTP/1.1 200 OK\r\n'
+                         b'Transfer-Encoding: chunked\r\n\r\n'
+                         b'zz\r\nbogus\r\n0\r\n\r\n')
+            await writer.drain()
+            writer.close()
+
+        async def go():
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            req = AsyncRequestHandler()
+            try:
+                await req.make_request('GET', 'http://127.0.0.1:%d/' % port)
+            finally:
+                await req.close()
+                server.close()
+                await server.wait_closed()
+        try:
+            run(go())
+        except drest.exc.dRestAPIError as e:
+            ok_(e.__repr__().find('Invalid chunk size') >= 0)
+            raise
@@ -0,0 +1,113 @@
+"""Tests for drest.auth."""
+
+import unittest
+import mock
+from nose.tools import eq_, ok_, raises
+
+import drest
+from drest.auth import BasicAuthHandler, DigestAuthHandler
+from drest.auth import parse_digest_challenge
+from drest.testing import MOCKAPI
+
+CHALLENGE = 'Digest nonce="abc", realm="django-tastypie", opaque="x", ' \
+            'algorithm="MD5", qop="auth", stale="false"'
+
+def get_api(auth_handler, password='password'):
+    api = drest.api.TastyPieAPI(MOCKAPI, auth_mech='basic',
+                                auth_handler=auth_handler)
+    api.auth(user='john.doe', password=password)
+    api.request._send = mock.Mock(wraps=api.request._send)
+    return api
+
+class AuthTestCase(unittest.TestCase):
+    def test_parse_digest_challenge(self):
+        challenge = parse_digest_challenge(CHALLENGE)
+        eq_(challenge['nonce'], 'abc')
+        eq_(challenge['qop'], 'auth')
+        eq_(challenge['stale'], 'false')
+
+        challenge = parse_digest_challenge(
+            'Basic realm="x", Digest realm="y", nonce="n", qop=auth')
+        eq_(challenge, dict(realm='y', nonce='n', qop='auth'))
+        eq_(parse_digest_challenge('Basic realm="x"'), None)
+        eq_(parse_digest_challenge(None), None)
+
+    def test_basic_preemptive(self):
+        api = get_api(BasicAuthHandler)
+        response = api.users_via_basic_auth.get()
+        eq_(response.data['objects'][0]['username'], 'admin')
+        eq_(api.request._send.call_count, 1)
+
+        # the default (httplib2) waits for the challenge first
+        api = get_api(None)
+        api.users_via_basic_auth.get()
+        eq_(api.request._send.call_count, 1)
+        headers = api.request._send.call_args[0][4]
+        ok_('Authorization' not in headers)
+
+    def test_digest_nonce_reuse(self):
+        api = get_api(DigestAuthHandler, 'JOHN_DOE_API_KEY')
+        response = api.users_via_digest_auth.get()
+        eq_(response.data['objects'][0]['username'], 'admin')
+        eq_(api.request._send.call_count, 2)
+
+        for i in range(3):
+            api.users_via_digest_auth.get()
+        eq_(api.request._send.call_count, 5)
+        nonces = list(api.request._auth._nonces.values())
+        eq_(nonces[0].count, 4)
+
+    @raises(drest.exc.dRestRequestError)
+    def test_digest_bad_credentials(self):
+        api = get_api(DigestAuthHandler, 'bogus')
+        try:
+            api.users_via_digest_auth.get()
+        except drest.exc.dRestRequestError as e:
+            eq_(e.response.status, 401)
+            eq_(api.request._send.call_count, 2)
+            raise
+
+    def test_digest_challenge(self):
+        url = 'http://localhost:8000/api/v0/users/?limit=1'
+        auth = DigestAuthHandler()
+        eq_(auth.get_authorization('GET', url), None)
+        auth.set_credentials('john.doe', 'password')
+        eq_(auth.get_authorization('GET', url), None)
+
+        ok_(auth.handle_challenge('GET', url,
+                                  {'www-authenticate': CHALLENGE}))
+        header = auth.get_authorization('GET', url)
+        ok_(header.startswith('Digest username="john.doe"'))
+        ok_('uri="/api/v0/users/?limit=1"' in header)
+        ok_('nc=00000001' in header)
+        ok_('nc=00000002' in auth.get_authorization('GET', url))
+
+        # the same nonce rejected again: wrong credentials
+        ok_(not auth.handle_challenge('GET', url,
+                                      {'www-authenticate': CHALLENGE}))
+        stale = CHALLENGE.replace('stale="false"', 'stale="true"')
+        ok_(auth.handle_challenge('GET', url, {'www-authenticate': stale}))
+        ok_('nc=00000001' in auth.get_authorization('GET', url))
+
+        # other hosts have their own nonce
+        eq_(auth.get_authorization('GET', 'http://example.com/'), None)
+        ok_(not auth.handle_challenge('GET', url, {}))
+
+    def test_digest_sha256_sess(self):
+        auth = DigestAuthHandler()
+        auth.set_credentials('john.doe', 'password')
+        url = 'http://localhost:8000/'
+        challenge = 'Digest realm="r", nonce="n", algorithm=SHA-256-sess'
+        auth.handle_challenge('GET', url, {'www-authenticate': challenge})
+        header = auth.get_authorization('GET', url)
+        ok_('algorithm=SHA-256-sess' in header)
+        ok_('qop' not in header)
+        eq_(len(header.split('response="')[1].split('"')[0]), 64)
+
+    def test_streaming_shares_auth(self):
+        api = drest.api.TastyPieAPI(MOCKAPI, auth_mech='basic',
+                                    auth_handler=DigestAuthHandler)
+        api.auth(user='john.doe', password='JOHN_DOE_API_KEY')
+        api.users_via_digest_auth.get()
+        with api.users_via_digest_auth.stream() as users:
+            eq_(next(iter(users))['username'], 'admin')
@@ -0,0 +1,76 @@
+"""Tests for drest.cache."""
+
+import unittest
+from random import random
+from nose.tools import eq_, ok_, raises
+
+import drest
+from drest.cache import LRUCacheHandler
+from drest.testing import MOCKAPI
+
+class CacheTestCase(unittest.TestCase):
+    @raises(NotImplementedError)
+    def test_cache_handler(self):
+        drest.cache.CacheHandler().get(('key', None))
+
+    def test_lru_max_entries(self):
+        c = LRUCacheHandler(max_entries=2)
+        c.set(('a', None), 'A', 1)
+        c.set(('b', None), 'B', 1)
+        c.get(('a', None))
+        c.set(('c', None), 'C', 1)
+        eq_(c.get(('b', None)), None)
+        eq_(c.get(('a', None)), 'A')
+        eq_(c.get(('c', None)), 'C')
+        eq_(len(c), 2)
+
+    def test_lru_max_bytes(self):
+        c = LRUCacheHandler(max_bytes=10)
+        c.set(('a', None), 'A', 6)
+        c.set(('b', None), 'B', 6)
+        eq_(c.get(('a', None)), None)
+        eq_(c.size, 6)
+        c.set(('c', None), 'C', 11)
+        eq_(c.get(('c', None)), None)
+        eq_(c.size, 6)
+
+    def test_invalidate(self):
+        c = LRUCacheHandler()
+        base = 'http://localhost/api/projects'
+        for url in ['%s/' % base, '%s/?label=x' % base, '%s/1/' % base,
+                    '%s/2/' % base, 'http://localhost/api/users/']:
+            c.set((url, None), url, 1)
+        c.invalidate('%s/1/' % base)
+        eq_(c.get(('%s/' % base, None)), None)
+        eq_(c.get(('%s/?label=x' % base, None)), None)
+        eq_(c.get(('%s/1/' % base, None)), None)
+        eq_(c.get(('%s/2/' % base, None)), '%s/2/' % base)
+        eq_(c.get(('http://localhost/api/users/', None)),
+            'http://localhost/api/users/')
+        c.clear()
+        eq_(len(c), 0)
+
+    def test_not_modified(self):
+        req = drest.request.RequestHandler(cache_handler=LRUCacheHandler)
+        response1 = req.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(response1.status, 200)
+        ok_('etag' in response1.headers)
+        response2 = req.make_request('GET', '%s/users/1/' % MOCKAPI)
+        ok_(response2 is response1)
+        eq_(response2.data['username'], 'admin')
+
+    def test_invalidate_on_put(self):
+        api = drest.api.TastyPieAPI(MOCKAPI, cache_handler=LRUCacheHandler)
+        api.auth(user='john.doe', api_key='JOHNDOE_API_KEY')
+        response1 = api.projects.get(1)
+        response2 = api.projects.get(1)
+        ok_(response2 is response1)
+
+        rand_label = "Test Project %s" % random()
+        api.projects.put(1, dict(label=rand_label))
+        key = ('%s/projects/1/' % MOCKAPI, 'ApiKey john.doe:JOHNDOE_API_KEY')
+        eq_(api.request._cache.get(key), None)
+
+        response3 = api.projects.get(1)
+        ok_(response3 is not response1)
+        eq_(response3.data['label'], rand_label)
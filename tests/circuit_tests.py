@@ -0,0 +1,138 @@
+"""Tests for drest.circuit."""
+
+import unittest
+import mock
+from nose.tools import eq_, ok_, raises
+
+import drest
+from drest.circuit import CircuitBreakerHandler, CLOSED, OPEN, HALF_OPEN
+from drest.testing import MOCKAPI
+
+class CircuitTestCase(unittest.TestCase):
+    def test_open_on_failure_rate(self):
+        changes = []
+        breaker = CircuitBreakerHandler(minimum_calls=4, window_size=4,
+                                        state_change_hooks=[
+                                            lambda *a: changes.append(a)])
+        for failed in [False, True, False]:
+            breaker.before_request('host')
+            breaker.after_request('host', failed, 0.1)
+        eq_(breaker.get_state('host'), CLOSED)
+        breaker.before_request('host')
+        breaker.after_request('host', True, 0.1)
+        eq_(breaker.get_state('host'), OPEN)
+        eq_(changes, [('host', CLOSED, OPEN)])
+
+    def test_open_on_slow_calls(self):
+        breaker = CircuitBreakerHandler(minimum_calls=2,
+                                        slow_call_duration=1,
+                                        slow_call_rate_threshold=0.5)
+        breaker.after_request('host', False, 0.1)
+        breaker.after_request('host', False, 2)
+        eq_(breaker.get_state('host'), OPEN)
+
+    @raises(drest.exc.dRestCircuitOpenError)
+    def test_fail_fast(self):
+        breaker = CircuitBreakerHandler(minimum_calls=1)
+        breaker.after_request('host', True, 0.1)
+        try:
+            breaker.before_request('host')
+        except drest.exc.dRestCircuitOpenError as e:
+            eq_(e.key, 'host')
+            ok_(0 < e.retry_after <= 30)
+            raise
+
+    def test_half_open(self):
+        changes = []
+        breaker = CircuitBreakerHandler(minimum_calls=1, open_timeout=0)
+        breaker.add_hook(lambda *a: changes.append(a))
+        breaker.after_request('host', True, 0.1)
+        breaker.before_request('host')
+        eq_(breaker.get_state('host'), HALF_OPEN)
+        try:
+            breaker.before_request('host')
+            ok_(False, 'only one probe should be let through')
+        except drest.exc.dRestCircuitOpenError as e:
+            pass
+        breaker.after_request('host', False, 0.1)
+        eq_(breaker.get_state('host'), CLOSED)
+
+        breaker.after_request('host', True, 0.1)
+        breaker.before_request('host')
+        breaker.after_request('host', True, 0.1)
+        eq_(breaker.get_state('host'), OPEN)
+        eq_([c[2] for c in changes], [OPEN, HALF_OPEN, CLOSED, OPEN,
+                                      HALF_OPEN, OPEN])
+
+    @raises(drest.exc.dRestInterfaceError)
+    def test_validate(self):
+        class MyBreaker(object):
+            def get_key(self, host, resource=None):
+                return host
+            def before_request(self, key):
+                pass
+            def after_request(self, key, failed, duration):
+                pass
+            def release(self, key):
+                pass
+        drest.request.RequestHandler(circuit_breaker_handler=MyBreaker)
+
+    def test_request_handler(self):
+        request = drest.request.RequestHandler(
+            circuit_breaker_handler=CircuitBreakerHandler,
+            minimum_calls=2)
+        request._get_http = mock.Mock()
+        request._get_http().request.return_value = ({'status': '503'}, '')
+        for i in range(2):
+            eq_(request.make_request('GET', '%s/users/' % MOCKAPI).status,
+                503)
+        eq_(request._breaker.get_state('localhost:8000'), OPEN)
+        try:
+            request.make_request('GET', '%s/users/' % MOCKAPI)
+            ok_(False, 'circuit should be open')
+        except drest.exc.dRestCircuitOpenError as e:
+            eq_(request._get_http().request.call_count, 2)
+
+    def test_probe_released(self):
+        request = drest.request.RequestHandler(
+            circuit_breaker_handler=CircuitBreakerHandler,
+            minimum_calls=1, open_timeout=0)
+        request._get_http = mock.Mock()
+        request._get_http().request.side_effect = ValueError('boom')
+        breaker = request._breaker
+        breaker.after_request('localhost:8000', True, 0.1)
+        eq_(breaker.get_state('localhost:8000'), OPEN)
+
+        # probes ending with unexpected exceptions do not hold the circuit
+        # half-open
+        for i in range(3):
+            try:
+                request.make_request('GET', '%s/users/' % MOCKAPI)
+                ok_(False, 'request should fail')
+            except ValueError as e:
+                pass
+        eq_(breaker.get_state('localhost:8000'), HALF_OPEN)
+        eq_(request._get_http().request.call_count, 3)
+
+        request._get_http().request.side_effect = None
+        request._get_http().request.return_value = ({'status': '200'}, '')
+        eq_(request.make_request('GET', '%s/users/' % MOCKAPI).status, 200)
+        eq_(breaker.get_state('localhost:8000'), CLOSED)
+
+    def test_key_by_resource(self):
+        api = drest.API(MOCKAPI, circuit_breaker_handler=CircuitBreakerHandler,
+                        key_by='resource', minimum_calls=1)
+        api.add_resource('users')
+        api.add_resource('projects')
+        eq_(api.request.get_resource_name('%s/users/1/?a=b' % MOCKAPI),
+            'users')
+        eq_(api.request.get_resource_name('%s/bogus/' % MOCKAPI), None)
+        try:
+            api.make_request('GET', '/users/100123123/')
+        except drest.exc.dRestRequestError as e:
+            pass
+        api.request._breaker.after_request('users', True, 0.1)
+        eq_(api.request._breaker.get_state('users'), OPEN)
+        eq_(api.request._breaker.get_state('projects'), CLOSED)
+        response = api.projects.get(1)
+        eq_(response.status, 200)
@@ -0,0 +1,111 @@
+"""Tests for drest.columnar."""
+
+import array
+import unittest
+from nose.tools import eq_, ok_
+
+from drest.columnar import ColumnBuilder
+from drest.record import make_record_class
+
+SCHEMA = {
+    'fields': {
+        'id': {'type': 'integer', 'nullable': False},
+        'label': {'type': 'string', 'nullable': False},
+        'price': {'type': 'decimal', 'nullable': False},
+        'active': {'type': 'boolean', 'nullable': True},
+        'created': {'type': 'datetime', 'nullable': False},
+        },
+    }
+
+def get_rows(count):
+    return [dict(id=i, label='row %s' % i, price='%s.50' % i,
+                 active=i % 2 == 0, created='2013-11-12T10:00:%02d' % i) \
+            for i in range(count)]
+
+class ColumnarTestCase(unittest.TestCase):
+    def test_dict(self):
+        builder = ColumnBuilder(SCHEMA, capacity=2)
+        for row in get_rows(5):
+            builder.append(row)
+        eq_(len(builder), 5)
+        eq_(builder.capacity, 8)
+
+        columns = builder.to_dict()
+        eq_(sorted(columns.keys()),
+            ['active', 'created', 'id', 'label', 'price'])
+        ok_(isinstance(columns['id'], array.array))
+        eq_(list(columns['id']), [0, 1, 2, 3, 4])
+        eq_(list(columns['price']), [0.5, 1.5, 2.5, 3.5, 4.5])
+        eq_(columns['label'][4], 'row 4')
+        eq_(columns['active'], [True, False, True, False, True])
+
+    def test_promote(self):
+        builder = ColumnBuilder(SCHEMA, ['id', 'price'])
+        builder.append(dict(id=1, price='1.5'))
+        builder.append(dict(id=None, price='n/a'))
+        columns = builder.to_dict()
+        eq_(columns['id'], [1, None])
+        eq_(columns['price'], [1.5, 'n/a'])
+
+    def test_promote_converted(self):
+        builder = ColumnBuilder(SCHEMA, ['price'])
+        for price in ['1.5', None, '2.5']:
+            builder.append(dict(price=price))
+        eq_(builder.to_dict()['price'], [1.5, None, 2.5])
+
+    def test_records(self):
+        Row = make_record_class('Row', SCHEMA)
+        builder = ColumnBuilder(SCHEMA, ['id'])
+        builder.append(Row._from_dict(dict(id=3)))
+        eq_(list(builder.to_dict()['id']), [3])
+
+    def test_numpy(self):
+        builder = ColumnBuilder(SCHEMA, capacity=3, numpy=True)
+        for row in get_rows(5):
+            builder.append(row)
+        builder.append(dict(id=None, active=None))
+
+        columns = builder.to_dict()
+        eq_(len(columns['id']), 6)
+        eq_(columns['id'].dtype.kind, 'O')
+        eq_(columns['price'].dtype.name, 'float64')
+        eq_(columns['price'][1], 1.5)
+        eq_(columns['active'][5], None)
+        eq_(str(columns['created'][2]), '2013-11-12T10:00:02.000000')
+
+        arr = builder.to_structured()
+        eq_(arr.shape, (6,))
+        eq_(arr['label'][0], 'row 0')
+
+    def test_numpy_timezones(self):
+        builder = ColumnBuilder(SCHEMA, ['created'], numpy=True)
+        for created in ['2013-11-12T10:00:00+02:00',
+                        '2013-11-12T10:00:00.5Z',
+                        '2013-11-12T10:00:00-0130',
+                        '2013-11-12T10:00:00',
+                        None]:
+            builder.append(dict(created=created))
+        created = builder.to_dict()['created']
+        eq_(created.dtype.name, 'datetime64[us]')
+        eq_([str(c) for c in created],
+            ['2013-11-12T08:00:00.000000', '2013-11-12T10:00:00.500000',
+             '2013-11-12T11:30:00.000000', '2013-11-12T10:00:00.000000',
+             'NaT'])
+
+    def test_numpy_boolean_none(self):
+        schema = dict(fields=dict(active=dict(type='boolean',
+                                              nullable=False)))
+        builder = ColumnBuilder(schema, numpy=True)
+        for active in [True, None, False]:
+            builder.append(dict(active=active))
+        active = builder.to_dict()['active']
+        eq_(active.dtype.kind, 'O')
+        eq_(list(active), [True, None, False])
+
+    def test_structured(self):
+        builder = ColumnBuilder(SCHEMA, ['id', 'label'])
+        for row in get_rows(3):
+            builder.append(row)
+        arr = builder.to_structured()
+        eq_(arr.dtype.names, ('id', 'label'))
+        eq_(list(arr['id']), [0, 1, 2])
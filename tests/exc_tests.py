@@ -59,4 +59,28 @@ class ExceptionTestCase(unittest.TestCase):
             e.__repr__()
             eq_(e.msg, 'Error Msg')
             eq_(e.__str__(), str(e.msg))
-            raise
\ No newline at end of file
+            raise
+
+    @raises(drest.exc.dRestCircuitOpenError)
+    def test_circuit_open_error(self):
+        try:
+            raise drest.exc.dRestCircuitOpenError('Error Msg', 'host', 10)
+        except drest.exc.dRestCircuitOpenError as e:
+            e.__repr__()
+            eq_(e.msg, 'Error Msg')
+            eq_(e.key, 'host')
+            eq_(e.retry_after, 10)
+            eq_(e.__str__(), str(e.msg))
+            raise
+
+    @raises(drest.exc.dRestRateLimitError)
+    def test_rate_limit_error(self):
+        try:
+            raise drest.exc.dRestRateLimitError('Error Msg', 'host', 10)
+        except drest.exc.dRestRateLimitError as e:
+            e.__repr__()
+            eq_(e.msg, 'Error Msg')
+            eq_(e.key, 'host')
+            eq_(e.retry_after, 10)
+            eq_(e.__str__(), str(e.msg))
+            raise
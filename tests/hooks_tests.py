@@ -0,0 +1,128 @@
+"""Tests for drest.hooks."""
+
+import unittest
+import mock
+from nose.tools import eq_, ok_, raises
+
+import drest
+from drest.hooks import HOOKS, RequestContext
+from drest.testing import MOCKAPI
+
+class HooksTestCase(unittest.TestCase):
+    def _recorder(self, request):
+        calls = []
+        for name in HOOKS:
+            request.add_hook(name, lambda c, name=name: calls.append(name))
+        return calls
+
+    def test_lazy_deserialize(self):
+        request = drest.request.RequestHandler(lazy_deserialize=True)
+        calls = self._recorder(request)
+        response = request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(calls, ['pre_request', 'post_serialize', 'pre_send',
+                    'post_receive', 'post_request'])
+        eq_(response.data['username'], 'admin')
+        eq_(calls[-1], 'post_deserialize')
+
+    def test_lifecycle(self):
+        request = drest.request.RequestHandler()
+        calls = self._recorder(request)
+        contexts = []
+        request.add_hook('post_receive', contexts.append)
+        response = request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(calls, HOOKS[:-1])
+
+        context = contexts[0]
+        ok_(context.response is response)
+        eq_(context.attempt, 1)
+        eq_(context.res_headers['status'], '200')
+        phases = context.phases
+        for name in ['serialize', 'http', 'deserialize', 'total']:
+            ok_(phases[name] >= 0, name)
+        # httplib2 does not report these
+        eq_(phases['connect'], None)
+        eq_(phases['ttfb'], None)
+
+    def test_transport_timings(self):
+        pool = drest.transport.ConnectionPool()
+        contexts = []
+        request = drest.request.RequestHandler(
+            transport=pool, lazy_deserialize=False,
+            hooks=dict(post_deserialize=[contexts.append]))
+        request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        phases = contexts[0].phases
+        for name in ['serialize', 'connect', 'ttfb', 'transfer', 'http',
+                     'deserialize']:
+            ok_(phases[name] >= 0, name)
+        ok_(phases['http'] >= phases['ttfb'])
+        pool.close()
+
+    def test_pre_hooks_modify_request(self):
+        def pre_request(context):
+            context.url = '%s/users/2/' % MOCKAPI
+        def pre_send(context):
+            context.headers['X-Test'] = 'yes'
+        request = drest.request.RequestHandler(
+            hooks=dict(pre_request=[pre_request], pre_send=[pre_send]))
+        request._get_http = mock.Mock()
+        request._get_http().request.return_value = ({'status': '200'},
+                                                    '{}')
+        request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        args, kw = request._get_http().request.call_args
+        eq_(args[0], '%s/users/2/' % MOCKAPI)
+        eq_(kw['headers']['X-Test'], 'yes')
+
+    def test_on_error(self):
+        api = drest.API(MOCKAPI)
+        errors = []
+        api.request.add_hook('on_error', errors.append)
+        try:
+            api.make_request('GET', '/users/100123123/')
+        except drest.exc.dRestRequestError as e:
+            pass
+        eq_(len(errors), 1)
+        eq_(errors[0].error.response.status, 404)
+
+    def test_prepared_request(self):
+        calls = []
+        api = drest.API(MOCKAPI)
+        api.request.add_hook('pre_send', calls.append)
+        prepared = api.prepare('GET', '/users/1/')
+        prepared.execute()
+        prepared.execute()
+        eq_(len(calls), 2)
+        ok_('start' in calls[1].timings)
+
+    def test_prepared_request_changed(self):
+        def pre_request(context):
+            if context.params.get('id') == 2:
+                context.url = context.url.replace('/1/', '/2/')
+            context.headers['X-Hook'] = 'yes'
+        seen = []
+        api = drest.API(MOCKAPI)
+        api.request.add_hook('pre_request', pre_request)
+        api.request.add_hook('pre_send', seen.append)
+        prepared = api.prepare('GET', '/users/1/', params=dict(id=2))
+        response = prepared.execute()
+        eq_(response.data['id'], 2)
+        ok_(seen[0].url.find('/users/2/') >= 0)
+        eq_(seen[0].headers['X-Hook'], 'yes')
+
+        # the prepared request itself is left alone
+        ok_(prepared.url.find('/users/1/') >= 0)
+        ok_('X-Hook' not in prepared.headers)
+
+    def test_no_hooks(self):
+        request = drest.request.RequestHandler()
+        eq_(request._new_context('GET', MOCKAPI, {}, {}), None)
+
+    @raises(drest.exc.dRestAPIError)
+    def test_unknown_hook(self):
+        request = drest.request.RequestHandler()
+        request.add_hook('bogus', lambda context: None)
+
+    def test_context(self):
+        context = RequestContext('GET', MOCKAPI)
+        eq_(context.phases['http'], None)
+        eq_(context.phases['total'], 0)
+        eq_(repr(context), '<RequestContext GET %s>' % MOCKAPI)
@@ -0,0 +1,100 @@
+"""Tests for drest.log."""
+
+import logging
+import unittest
+import mock
+from nose.tools import eq_, ok_
+
+import drest
+from drest import log
+from drest.testing import MOCKAPI
+
+class _Records(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+class LogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.handler = _Records()
+        self.level = log.LOG.level
+        self.debug_level = log.DEBUG_LOG.level
+        log.LOG.addHandler(self.handler)
+        log.LOG.setLevel(logging.DEBUG)
+
+    def tearDown(self):
+        log.LOG.removeHandler(self.handler)
+        log.LOG.setLevel(self.level)
+        log.DEBUG_LOG.setLevel(self.debug_level)
+
+    def test_truncate(self):
+        eq_(log.truncate('abc', 10), 'abc')
+        eq_(log.truncate('abcdef', 3), 'abc... (6 bytes)')
+        eq_(log.truncate(b'abcdef', 3), 'abc... (6 bytes)')
+        eq_(log.truncate(b'abc'), 'abc')
+        eq_(log.truncate(None), '')
+
+    def test_redact_headers(self):
+        headers = {'authorization': 'ApiKey john.doe:secret', 'Accept': 'x'}
+        eq_(log.redact_headers(headers, ['Authorization']),
+            {'authorization': '<redacted>', 'Accept': 'x'})
+        eq_(headers['authorization'], 'ApiKey john.doe:secret')
+
+    def test_enable_debug(self):
+        count = len(log.LOG.handlers)
+        log.enable_debug()
+        eq_(len(log.LOG.handlers), count)
+        eq_(log.LOG.level, logging.DEBUG)
+        ok_(log.DEBUG_LOG.isEnabledFor(logging.DEBUG))
+
+    def test_debug_per_handler(self):
+        log.LOG.setLevel(logging.INFO)
+        with mock.patch.dict('os.environ', {'DREST_DEBUG': '0'}):
+            quiet = drest.request.RequestHandler()
+            verbose = drest.request.RequestHandler(debug=True)
+        eq_(log.LOG.level, logging.INFO)
+        quiet.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(self.handler.records, [])
+        verbose.make_request('GET', '%s/users/1/' % MOCKAPI)
+        records = [r for r in self.handler.records \
+                   if getattr(r, 'drest_event', None) == 'request']
+        eq_(len(records), 1)
+        eq_(records[0].name, 'drest.debug')
+
+    def test_request_log(self):
+        request = drest.request.RequestHandler(serialize=True,
+                                               debug_max_payload=10)
+        request.add_header('Authorization', 'ApiKey john.doe:secret')
+        try:
+            request.make_request('POST', '%s/users/' % MOCKAPI,
+                                 dict(username='a' * 100))
+        except drest.exc.dRestRequestError as e:
+            pass
+        records = [r for r in self.handler.records \
+                   if getattr(r, 'drest_event', None) == 'request']
+        eq_(len(records), 1)
+        record = records[0]
+        eq_(record.drest_method, 'POST')
+        eq_(record.drest_headers['Authorization'], '<redacted>')
+        ok_(record.drest_params.endswith('bytes)'))
+        message = record.getMessage()
+        ok_(message.find('secret') < 0)
+        ok_(message.find('url=%s/users/' % MOCKAPI) >= 0)
+
+    def test_sampling(self):
+        request = drest.request.RequestHandler(debug_sample_rate=0)
+        request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_([r for r in self.handler.records \
+             if getattr(r, 'drest_event', None) == 'request'], [])
+
+    def test_disabled(self):
+        request = drest.request.RequestHandler()
+        log.LOG.setLevel(logging.INFO)
+        log.DEBUG_LOG.setLevel(logging.INFO)
+        with mock.patch('drest.log.truncate') as truncate:
+            request.make_request('GET', '%s/users/1/' % MOCKAPI)
+            eq_(truncate.call_count, 0)
+        eq_(self.handler.records, [])
@@ -1,6 +1,6 @@
 """Tests for drest.meta."""
 
-from nose.tools import eq_
+from nose.tools import eq_, ok_
 import drest
     
 class Test(drest.meta.MetaMixin):
@@ -12,4 +12,40 @@ class Test(drest.meta.MetaMixin):
         
 def test_meta():
     test = Test(some_param='some_value')
-    eq_(test._meta.some_param, 'some_value')
\ No newline at end of file
+    eq_(test._meta.some_param, 'some_value')
+
+class SubTest(Test):
+    class Meta:
+        other_param = [1]
+
+def test_meta_class_cache():
+    test = SubTest(some_param='some_value', bogus='x')
+    eq_(test._meta.some_param, 'some_value')
+    eq_(test._meta.other_param, [1])
+    ok_(not hasattr(test._meta, 'bogus'))
+
+    # overrides do not leak into the cached defaults
+    eq_(SubTest()._meta.some_param, None)
+    eq_(drest.meta.get_class_meta(SubTest),
+        dict(some_param=None, other_param=[1]))
+    ok_(drest.meta.get_class_meta(SubTest) is \
+        drest.meta.get_class_meta(SubTest))
+    eq_(drest.meta.get_class_meta(Test), dict(some_param=None))
+
+def test_clear_meta_cache():
+    eq_(SubTest()._meta.some_param, None)
+    Test.Meta.some_param = 'changed'
+    try:
+        # cached
+        eq_(SubTest()._meta.some_param, None)
+        drest.meta.clear_meta_cache(Test)
+        eq_(SubTest()._meta.some_param, 'changed')
+        eq_(Test()._meta.some_param, 'changed')
+    finally:
+        Test.Meta.some_param = None
+        drest.meta.clear_meta_cache()
+    eq_(SubTest()._meta.some_param, None)
+
+def test_meta_repr():
+    eq_(repr(SubTest(some_param=2)._meta),
+        '<Meta other_param=[1] some_param=2>')
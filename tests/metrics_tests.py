@@ -0,0 +1,147 @@
+"""Tests for drest.metrics."""
+
+import threading
+import unittest
+from nose.tools import eq_, ok_, raises
+
+import drest
+from drest.metrics import MetricsRegistry
+from drest.testing import MOCKAPI
+
+class MetricsTestCase(unittest.TestCase):
+    def test_counter_and_histogram(self):
+        metrics = MetricsRegistry()
+        metrics.register_counter('jobs_total', 'Jobs done.', ('queue',))
+        metrics.register_histogram('job_seconds', 'Job duration.',
+                                   ('queue',), buckets=[1, 0.1])
+        metrics.inc('jobs_total', ('default',))
+        metrics.inc('jobs_total', ('default',), 2)
+        for value in [0.05, 0.5, 5]:
+            metrics.observe('job_seconds', ('default',), value)
+
+        snapshot = metrics.snapshot()
+        eq_(snapshot['jobs_total'],
+            [dict(labels=dict(queue='default'), value=3)])
+        sample = snapshot['job_seconds'][0]
+        eq_(sample['buckets'], [[0.1, 1], [1, 2], [float('inf'), 3]])
+        eq_(sample['sum'], 5.55)
+        eq_(sample['count'], 3)
+        eq_(snapshot['drest_requests_total'], [])
+
+        text = metrics.render()
+        ok_('# TYPE jobs_total counter\n' in text)
+        ok_('jobs_total{queue="default"} 3\n' in text)
+        ok_('job_seconds_bucket{queue="default",le="0.1"} 1\n' in text)
+        ok_('job_seconds_bucket{queue="default",le="+Inf"} 3\n' in text)
+        ok_('job_seconds_count{queue="default"} 3\n' in text)
+
+        metrics.reset()
+        eq_(metrics.snapshot()['jobs_total'], [])
+
+    def test_threads(self):
+        metrics = MetricsRegistry()
+        metrics.register_counter('hits_total', 'Hits.')
+        def hit():
+            for i in range(1000):
+                metrics.inc('hits_total')
+        threads = [threading.Thread(target=hit) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        hit()
+        eq_(metrics.snapshot()['hits_total'][0]['value'], 5000)
+        # the shards of finished threads were merged
+        eq_(len(metrics._shards), 1)
+        eq_(metrics.snapshot()['hits_total'][0]['value'], 5000)
+
+    def test_reset_while_writing(self):
+        metrics = MetricsRegistry()
+        metrics.register_counter('hits_total', 'Hits.')
+        started = threading.Event()
+        resume = threading.Event()
+        shards = []
+
+        def hit():
+            metrics.inc('hits_total')
+            shards.append(metrics._get_shard())
+            started.set()
+            resume.wait()
+            # what a write racing with reset() looks like
+            shards[0][('hits_total', ())] += 10
+            metrics.inc('hits_total')
+
+        thread = threading.Thread(target=hit)
+        thread.start()
+        started.wait()
+        metrics.reset()
+        resume.set()
+        thread.join()
+        # the stale write went to the dropped shard
+        eq_(metrics.snapshot()['hits_total'][0]['value'], 1)
+
+    def test_escape_labels(self):
+        metrics = MetricsRegistry()
+        metrics.register_counter('x_total', 'X.', ('name',))
+        metrics.inc('x_total', ('a "b"\\\n',))
+        ok_('x_total{name="a \\"b\\"\\\\\\n"} 1' in metrics.render())
+
+    @raises(drest.exc.dRestAPIError)
+    def test_unknown_metric(self):
+        MetricsRegistry().inc('bogus')
+
+    def test_request_metrics(self):
+        metrics = MetricsRegistry()
+        api = drest.API(MOCKAPI, metrics_registry=metrics)
+        api.add_resource('users')
+        api.users.get(1)
+        try:
+            api.users.post(dict(username='x'))
+        except drest.exc.dRestRequestError as e:
+            pass
+        try:
+            api.users.get(100123123)
+        except drest.exc.dRestRequestError as e:
+            pass
+        try:
+            drest.API('http://bogusurl.localhost/',
+                      metrics_registry=metrics).make_request('GET', '/')
+        except drest.exc.dRestAPIError as e:
+            pass
+
+        snapshot = metrics.snapshot()
+        requests = dict([((s['labels']['method'], s['labels']['status']),
+                          s['value']) \
+                         for s in snapshot['drest_requests_total']])
+        eq_(requests[('GET', '200')], 1)
+        eq_(requests[('GET', '404')], 1)
+        eq_(requests[('POST', '405')], 1)
+        eq_(snapshot['drest_requests_total'][0]['labels']['resource'],
+            'users')
+        eq_(snapshot['drest_requests_total'][0]['labels']['api'],
+            'localhost:8000')
+
+        errors = [(s['labels']['api'], s['labels']['status']) \
+                  for s in snapshot['drest_request_errors_total']]
+        ok_(('localhost:8000', '404') in errors)
+        ok_(('bogusurl.localhost', 'dRestAPIError') in errors)
+
+        durations = snapshot['drest_request_duration_seconds']
+        eq_(sum([s['count'] for s in durations]), 3)
+        sizes = [s for s in snapshot['drest_response_size_bytes'] \
+                 if s['labels']['method'] == 'GET']
+        ok_(sizes[0]['sum'] > 0)
+        posts = [s for s in snapshot['drest_request_size_bytes'] \
+                 if s['labels']['method'] == 'POST']
+        ok_(posts[0]['sum'] > 0)
+        ok_('drest_request_duration_seconds_bucket{api="localhost:8000",'
+            'resource="users",method="GET",le="+Inf"} 2' in metrics.render())
+
+    def test_api_name(self):
+        metrics = MetricsRegistry()
+        api = drest.API(MOCKAPI, metrics_registry=metrics,
+                        metrics_api_name='mock')
+        api.make_request('GET', '/users/1/')
+        sample = metrics.snapshot()['drest_requests_total'][0]
+        eq_(sample['labels'], dict(api='mock', resource='', method='GET',
+                                   status='200'))
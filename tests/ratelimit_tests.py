@@ -0,0 +1,119 @@
+"""Tests for drest.ratelimit."""
+
+import time
+import unittest
+import mock
+from nose.tools import eq_, ok_, raises
+
+import drest
+from drest.ratelimit import RateLimitHandler
+from drest.testing import MOCKAPI
+
+class RateLimitTestCase(unittest.TestCase):
+    def test_token_bucket(self):
+        limiter = RateLimitHandler(rate=10, burst=2)
+        eq_(limiter.acquire('host'), 0)
+        eq_(limiter.acquire('host'), 0)
+        wait = limiter.acquire('host')
+        ok_(0.05 < wait <= 0.1)
+        # slots are reserved, the next caller queues up behind
+        ok_(0.15 < limiter.acquire('host') <= 0.2)
+        eq_(limiter.acquire('other'), 0)
+
+    def test_no_rate(self):
+        limiter = RateLimitHandler()
+        for i in range(100):
+            eq_(limiter.acquire('host'), 0)
+
+    @raises(drest.exc.dRestRateLimitError)
+    def test_fail_fast(self):
+        limiter = RateLimitHandler(rate=1, block=False)
+        limiter.acquire('host')
+        try:
+            limiter.acquire('host')
+        except drest.exc.dRestRateLimitError as e:
+            eq_(e.key, 'host')
+            ok_(0 < e.retry_after <= 1)
+            raise
+
+    @raises(drest.exc.dRestRateLimitError)
+    def test_max_wait(self):
+        limiter = RateLimitHandler(rate=1, max_wait=0.5)
+        limiter.acquire('host')
+        limiter.acquire('host')
+
+    def test_retry_after(self):
+        limiter = RateLimitHandler()
+        limiter.update('host', 200, {'retry-after': '10'})
+        eq_(limiter.get_wait('host'), 0)
+        limiter.update('host', 429, {'retry-after': '10'})
+        ok_(9 < limiter.acquire('host') <= 10)
+
+    def test_remaining_and_reset(self):
+        limiter = RateLimitHandler(block=False)
+        limiter.update('host', 200, {'x-ratelimit-remaining': '2',
+                                     'x-ratelimit-reset': '60'})
+        eq_(limiter.acquire('host'), 0)
+        eq_(limiter.acquire('host'), 0)
+        ok_(59 < limiter.get_wait('host') <= 60)
+
+        # a stale response of a request in flight does not add quota
+        limiter.update('host', 200, {'x-ratelimit-remaining': '1',
+                                     'x-ratelimit-reset': '60'})
+        ok_(limiter.get_wait('host') > 0)
+
+        # reset as epoch seconds, starting a new window
+        limiter.update('host', 200, {
+            'x-ratelimit-remaining': '5',
+            'x-ratelimit-reset': str(int(time.time() + 120)),
+            })
+        eq_(limiter.acquire('host'), 0)
+
+        # the quota is forgotten after the reset
+        limiter.update('other', 200, {'x-ratelimit-remaining': '0',
+                                      'x-ratelimit-reset': '0'})
+        eq_(limiter.acquire('other'), 0)
+
+    def test_honor_headers_disabled(self):
+        limiter = RateLimitHandler(honor_headers=False)
+        limiter.update('host', 429, {'retry-after': '10'})
+        eq_(limiter.acquire('host'), 0)
+
+    def test_resource_rates(self):
+        limiter = RateLimitHandler(rate=100, resource_rates=dict(users=1))
+        eq_(limiter.get_key('localhost:8000', 'users'), 'users')
+        eq_(limiter.get_key('localhost:8000', 'projects'), 'localhost:8000')
+        eq_(limiter.get_key('localhost:8000'), 'localhost:8000')
+        limiter.acquire('users')
+        ok_(limiter.acquire('users') > 0.9)
+        limiter.acquire('localhost:8000')
+        eq_(limiter.acquire('localhost:8000'), 0)
+
+        limiter = RateLimitHandler(key_by='resource')
+        eq_(limiter.get_key('localhost:8000', 'projects'), 'projects')
+
+    def test_request_handler(self):
+        request = drest.request.RequestHandler(
+            rate_limit_handler=RateLimitHandler, block=False)
+        request._get_http = mock.Mock()
+        request._get_http().request.return_value = (
+            {'status': '429', 'retry-after': '30'}, '')
+        try:
+            request.make_request('GET', '%s/users/' % MOCKAPI)
+        except drest.exc.dRestRequestError as e:
+            eq_(e.response.status, 429)
+        try:
+            request.make_request('GET', '%s/users/' % MOCKAPI)
+            ok_(False, 'request should be rate limited')
+        except drest.exc.dRestRateLimitError as e:
+            eq_(e.key, 'localhost:8000')
+            eq_(request._get_http().request.call_count, 1)
+
+    def test_request_handler_waits(self):
+        api = drest.API(MOCKAPI, rate_limit_handler=RateLimitHandler,
+                        resource_rates=dict(users=20), burst=1)
+        api.add_resource('users')
+        started = time.time()
+        for i in range(3):
+            eq_(api.users.get(1).status, 200)
+        ok_(time.time() - started >= 0.1)
@@ -0,0 +1,70 @@
+"""Tests for drest.record."""
+
+import sys
+import unittest
+from nose.tools import eq_, ok_, raises
+
+from drest.record import Record, make_record_class, to_records
+
+SCHEMA = {
+    'fields': {
+        'id': {'type': 'integer'},
+        'username': {'type': 'string'},
+        'resource_uri': {'type': 'string'},
+        'is-active': {'type': 'boolean'},
+        '_secret': {'type': 'string'},
+        'class': {'type': 'string'},
+        },
+    }
+
+class RecordTestCase(unittest.TestCase):
+    def test_make_record_class(self):
+        User = make_record_class('User', SCHEMA)
+        ok_(issubclass(User, Record))
+        eq_(User._fields, ('id', 'resource_uri', 'username'))
+        eq_(User._field_types['id'], 'integer')
+        eq_(User.__slots__, User._fields)
+
+    def test_record(self):
+        User = make_record_class('User', SCHEMA['fields'])
+        data = dict(id=1, username='admin', nickname='root')
+        data['is-active'] = True
+        user = User._from_dict(data)
+        eq_(user.id, 1)
+        eq_(user['username'], 'admin')
+        eq_(user.resource_uri, None)
+        eq_(user.nickname, 'root')
+        eq_(user['is-active'], True)
+        eq_(user._get('bogus', 'default'), 'default')
+        ok_('nickname' in user)
+        ok_('bogus' not in user)
+        eq_(user, dict(data, resource_uri=None))
+        eq_(user, User(**dict(data, resource_uri=None)))
+        ok_(repr(user).startswith("User(id=1, "))
+        ok_(not hasattr(user, '__dict__'))
+
+        user = User._from_dict(dict(id=2))
+        eq_(user._extra, None)
+        eq_(user._asdict(), dict(id=2, username=None, resource_uri=None))
+
+    @raises(AttributeError)
+    def test_record_unknown_attribute(self):
+        User = make_record_class('User', SCHEMA)
+        User._from_dict(dict(id=1)).bogus
+
+    @raises(KeyError)
+    def test_record_unknown_key(self):
+        User = make_record_class('User', SCHEMA)
+        User._from_dict(dict(id=1))['bogus']
+
+    def test_record_size(self):
+        User = make_record_class('User', SCHEMA)
+        data = dict(id=1, username='admin', resource_uri='/api/v0/users/1/')
+        user = User._from_dict(data)
+        ok_(sys.getsizeof(user) < sys.getsizeof(data))
+
+    def test_to_records(self):
+        User = make_record_class('User', SCHEMA)
+        users = to_records(User, [dict(id=1), dict(id=2)])
+        eq_([u.id for u in users], [1, 2])
+        eq_(to_records(User, users)[0] is users[0], True)
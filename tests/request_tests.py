@@ -132,3 +132,160 @@ class RequestTestCase(unittest.TestCase):
         url = url + '?param1=value1'
         request._get_http()\
                .request.assert_called_with(url, 'GET', '', headers=headers)
+
+    def test_streaming_request_handler(self):
+        req = drest.request.StreamingRequestHandler()
+        response = req.make_request('GET', '%s/users/' % MOCKAPI)
+        ok_(isinstance(response, drest.response.StreamingResponseHandler))
+        eq_(response.status, 200)
+        with response:
+            content = b''.join(response.iter_content(16))
+        eq_(json.loads(content.decode('utf-8'))['objects'][0]['username'],
+            'admin')
+        ok_(response.data.closed)
+        eq_(req._pool.stats()['idle'], 1)
+
+        # the connection is reused once the body was read
+        response = req.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(json.loads(response.read().decode('utf-8'))['username'], 'admin')
+        eq_(req._pool.stats()['reused'], 1)
+
+    def test_streaming_close_unread(self):
+        req = drest.request.StreamingRequestHandler()
+        response = req.make_request('GET', '%s/users/' % MOCKAPI)
+        response.read(8)
+        response.close()
+        eq_(req._pool.stats()['open'], 0)
+
+    @raises(drest.exc.dRestRequestError)
+    def test_streaming_error(self):
+        req = drest.request.StreamingRequestHandler()
+        try:
+            req.make_request('GET', '%s/users/100123123/' % MOCKAPI)
+        except drest.exc.dRestRequestError as e:
+            eq_(e.response.status, 404)
+            eq_(req._pool.stats()['idle'], 1)
+            raise
+
+    def test_accept_serialization_handlers(self):
+        handlers = [
+            drest.serialization.MsgPackSerializationHandler,
+            drest.serialization.CBORSerializationHandler,
+            ]
+        req = drest.request.RequestHandler(
+            accept_serialization_handlers=handlers)
+        eq_(req._extra_headers['Accept'],
+            'application/x-msgpack, application/cbor;q=0.9, '
+            'application/json;q=0.8')
+        response = req.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(response.headers['content-type'], 'application/x-msgpack')
+        eq_(response.data['username'], 'admin')
+
+        req = drest.request.RequestHandler(
+            accept_serialization_handlers=list(reversed(handlers)))
+        response = req.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(response.headers['content-type'], 'application/cbor')
+        eq_(response.data['username'], 'admin')
+
+    def test_accept_serialization_fallback(self):
+        req = drest.request.RequestHandler(accept_serialization_handlers=[
+            drest.serialization.MsgPackSerializationHandler])
+        req._get_http = mock.Mock()
+        req._get_http().request.return_value = (
+            {'status': '200', 'content-type': 'application/json'},
+            '{"username": "admin"}')
+        response = req.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(response.data['username'], 'admin')
+
+    def test_accept_serialization_not_installed(self):
+        class Missing(drest.serialization.SerializationHandler):
+            content_type = 'application/x-missing'
+            def __init__(self, **kw):
+                raise ImportError('No module named missing')
+
+        req = drest.request.RequestHandler(
+            accept_serialization_handlers=[Missing])
+        eq_(req._accept_serialization, [])
+        ok_('Accept' not in req._extra_headers)
+
+    def test_prepared_request(self):
+        req = drest.request.RequestHandler()
+        req.add_url_param('username__icontains', 'ad')
+        prepared = req.prepare('GET', '%s/users/' % MOCKAPI,
+                               params=dict(limit=1),
+                               headers={'X-Test': 'yes'})
+        url = prepared.url
+        ok_(url.find('username__icontains=ad') >= 0)
+        eq_(prepared.headers['X-Test'], 'yes')
+        for i in range(2):
+            response = prepared.execute()
+            eq_(response.data['objects'][0]['username'], 'admin')
+            ok_(prepared.url is url)
+
+        # changing the handler invalidates the prepared request
+        req.add_header('X-Other', 'yes')
+        req.add_url_param('username__icontains', 'john')
+        response = prepared.execute()
+        eq_(response.data['objects'][0]['username'], 'john.doe')
+        eq_(prepared.headers['X-Other'], 'yes')
+
+    def test_prepared_request_cache(self):
+        req = drest.request.RequestHandler(
+            cache_handler=drest.cache.LRUCacheHandler)
+        prepared = req.prepare('GET', '%s/users/1/' % MOCKAPI)
+        first = prepared.execute()
+        eq_(prepared.execute() is first, True)
+        ok_('If-None-Match' not in prepared.headers)
+
+    def test_api_prepare(self):
+        api = drest.API(MOCKAPI)
+        prepared = api.prepare('GET', '/users/2/')
+        eq_(prepared.url, '%s/users/2/' % MOCKAPI.rstrip('/'))
+        eq_(prepared.execute().data['username'], 'john.doe')
+
+    def test_coalesce_requests(self):
+        import threading
+        import time
+        req = drest.request.RequestHandler(coalesce_requests=True)
+        make_request = req._make_request
+        calls = []
+        def slow_make_request(*args, **kw):
+            calls.append(args[0])
+            time.sleep(0.2)
+            return make_request(*args, **kw)
+        req._make_request = slow_make_request
+
+        results = []
+        def get(path):
+            try:
+                results.append(req.make_request('GET', MOCKAPI + path))
+            except drest.exc.dRestRequestError as e:
+                results.append(e)
+        threads = [threading.Thread(target=get, args=('/users/1/',)) \
+                   for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        eq_(len(calls), 1)
+        eq_(len(results), 5)
+        ok_(all([r is results[0] for r in results]))
+        eq_(results[0].data['username'], 'admin')
+        eq_(req._flights, {})
+
+        # errors are shared too
+        del results[:]
+        threads = [threading.Thread(target=get, args=('/bogus/',)) \
+                   for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        eq_(len(calls), 2)
+        ok_(isinstance(results[0], drest.exc.dRestRequestError))
+        ok_(all([r is results[0] for r in results]))
+
+        # requests that are not in flight are made again, as are non-GETs
+        req.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(len(calls), 3)
+        eq_(req._get_flight_key('POST', '%s/users/' % MOCKAPI, {}), None)
@@ -2,12 +2,16 @@
 
 import os
 import re
+import time
 import unittest
+import threading
 import copy
 from random import random
 from nose.tools import eq_, ok_, raises
 
 import drest
+from drest.circuit import CircuitBreakerHandler
+from drest.ratelimit import RateLimitHandler
 from drest.testing import MOCKAPI
 
 class ResourceTestCase(unittest.TestCase):
@@ -33,6 +37,33 @@ class ResourceTestCase(unittest.TestCase):
             eq_(e.msg, 'Received HTTP Code 404 - Not Found (resource: users, id: 1)')
             raise
 
+    def test_rest_get_many(self):
+        api = drest.api.API(MOCKAPI)
+        api.add_resource('users')
+        responses = api.users.get_many([2, 1, 100123123, 1], concurrency=2)
+        eq_(len(responses), 4)
+        eq_(responses[0].data['username'], 'john.doe')
+        eq_(responses[1].data['username'], 'admin')
+        eq_(responses[3].data['username'], 'admin')
+        ok_(isinstance(responses[2], drest.exc.dRestRequestError))
+        eq_(responses[2].msg, 'Received HTTP Code 404 - Not Found (resource: users, id: 100123123)')
+
+    def test_rest_post_many_and_delete_many(self):
+        api = drest.api.TastyPieAPI(MOCKAPI)
+        labels = ["Test Project %s" % random() for i in range(3)]
+        responses = api.projects.post_many([dict(label=l) for l in labels],
+                                           concurrency=3)
+        eq_([r.status for r in responses], [201, 201, 201])
+
+        ids = [r.headers['location'].rstrip('/').split('/')[-1] \
+               for r in responses]
+        responses = api.projects.get_many(ids)
+        eq_([r.data['label'] for r in responses], labels)
+
+        responses = api.projects.delete_many(ids + [100123123])
+        eq_([r.status for r in responses[:3]], [204, 204, 204])
+        ok_(isinstance(responses[3], drest.exc.dRestRequestError))
+
     def test_rest_post(self):
         api = drest.api.TastyPieAPI(MOCKAPI)
         api.auth(user='john.doe', api_key='JOHNDOE_API_KEY')
@@ -192,3 +223,166 @@ class ResourceTestCase(unittest.TestCase):
         
         res = 'NewProject2' not in labels
         ok_(res)
+
+    def test_tastypie_stream(self):
+        api = drest.api.TastyPieAPI(MOCKAPI)
+        with api.users.stream(params=dict(limit=0)) as users:
+            usernames = [u['username'] for u in users]
+            eq_(users.meta['total_count'], len(usernames))
+        eq_(usernames[0:2], ['admin', 'john.doe'])
+
+        # the streaming handler follows the api's auth headers
+        api.auth(user='john.doe', api_key='JOHN_DOE_API_KEY')
+        with api.users_via_apikey_auth.stream() as users:
+            eq_(next(iter(users))['username'], 'admin')
+
+    def test_tastypie_stream_shares_handlers(self):
+        api = drest.api.TastyPieAPI(MOCKAPI,
+                                    rate_limit_handler=RateLimitHandler,
+                                    rate=0.01, burst=2, block=False)
+        # the schema request takes the first token, this one the last
+        eq_(api.users.get(1).status, 200)
+        streaming = api.users._get_streaming_request()
+        ok_(streaming._limiter is api.request._limiter)
+        try:
+            with api.users.stream() as users:
+                list(users)
+            ok_(False, 'stream should be rate limited')
+        except drest.exc.dRestRateLimitError as e:
+            eq_(e.key, 'localhost:8000')
+
+        api = drest.api.TastyPieAPI(
+            MOCKAPI, circuit_breaker_handler=CircuitBreakerHandler,
+            minimum_calls=1)
+        api.request._breaker.after_request('localhost:8000', True, 0.1)
+        try:
+            with api.users.stream() as users:
+                list(users)
+            ok_(False, 'circuit should be open')
+        except drest.exc.dRestCircuitOpenError as e:
+            eq_(e.key, 'localhost:8000')
+
+    def test_tastypie_iterate(self):
+        api = drest.api.TastyPieAPI(MOCKAPI)
+        response = api.users.get(params=dict(limit=0))
+        expected = [u['username'] for u in response.data['objects']]
+
+        users = [u['username'] for u in api.users.iterate(page_size=7)]
+        eq_(users, expected)
+
+        users = api.users.all(page_size=7, max_items=10)
+        eq_([u['username'] for u in users], expected[0:10])
+
+        users = api.users.iterate(page_size=7, prefetch=False)
+        eq_([u['username'] for u in users], expected)
+        eq_(list(api.users.iterate(max_items=0)), [])
+
+    def test_tastypie_iterate_parallel(self):
+        api = drest.api.TastyPieAPI(MOCKAPI)
+        response = api.users.get(params=dict(limit=0))
+        expected = [u['username'] for u in response.data['objects']]
+
+        users = api.users.iterate_parallel(page_size=7, concurrency=3)
+        eq_([u['username'] for u in users], expected)
+
+        users = api.users.iterate_parallel(page_size=7, ordered=False)
+        eq_(sorted([u['username'] for u in users]), sorted(expected))
+
+    def test_imap_concurrent_bounded(self):
+        lock = threading.Lock()
+        counts = dict(started=0, consumed=0, outstanding=0)
+
+        def func(item):
+            with lock:
+                counts['started'] += 1
+                counts['outstanding'] = max(counts['outstanding'],
+                                            counts['started'] - \
+                                            counts['consumed'])
+            if item == 0:
+                # a slow early item holds back the ordered results
+                time.sleep(0.2)
+            return item
+
+        for ordered in [True, False]:
+            counts.update(started=0, consumed=0, outstanding=0)
+            results = drest.resource._imap_concurrent(func, range(30), 3,
+                                                      ordered)
+            indexes = []
+            for index, result in results:
+                time.sleep(0.01)
+                with lock:
+                    counts['consumed'] += 1
+                indexes.append(index)
+            ok_(counts['outstanding'] <= 3)
+            eq_(sorted(indexes), list(range(30)))
+            if ordered:
+                eq_(indexes, list(range(30)))
+
+    def test_tastypie_iterate_parallel_grows(self):
+        api = drest.api.TastyPieAPI(MOCKAPI)
+        label = "Test Project %s" % random()
+        response = api.projects.get(params=dict(limit=1))
+        count = response.data['meta']['total_count']
+        projects = api.projects.iterate_parallel(page_size=1)
+        labels = [next(projects)['label']]
+        response = api.projects.post(dict(label=label))
+        try:
+            labels.extend([p['label'] for p in projects])
+        finally:
+            pk = response.headers['location'].rstrip('/').split('/')[-1]
+            api.projects.delete(pk)
+        ok_(label in labels)
+        eq_(len(labels), count + 1)
+        eq_(len(set(labels)), count + 1)
+
+    def test_tastypie_records(self):
+        api = drest.api.TastyPieAPI(MOCKAPI)
+        api.users._meta.records = True
+        response = api.users.get()
+        user = response.data['objects'][0]
+        ok_(isinstance(user, api.users.record_class))
+        eq_(user.username, 'admin')
+        eq_(api.users.record_class.__name__, 'UsersRecord')
+
+        # single objects are left alone
+        eq_(api.users.get(1).data['username'], 'admin')
+
+        usernames = [u.username for u in api.users.iterate(max_items=3)]
+        eq_(usernames[0:2], ['admin', 'john.doe'])
+        eq_(len(list(api.users.iterate_parallel(page_size=7))),
+            response.data['meta']['total_count'])
+        with api.users.stream() as users:
+            eq_(next(iter(users)).username, 'admin')
+
+    def test_tastypie_columns(self):
+        api = drest.api.TastyPieAPI(MOCKAPI)
+        response = api.users.get(params=dict(limit=0))
+        expected = [u['username'] for u in response.data['objects']]
+
+        users = api.users.columns(page_size=7)
+        eq_(users['username'], expected)
+        eq_(len(users['id']), len(expected))
+
+        users = api.users.columns(fields=['id', 'username'], max_items=10,
+                                  page_size=7, output='numpy')
+        eq_(list(users['username']), expected[0:10])
+        eq_(users['id'].dtype.name, 'int64')
+
+        users = api.users.columns(fields=['id'], output='structured')
+        eq_(users.dtype.names, ('id',))
+        eq_(len(users), len(expected))
+
+    @raises(drest.exc.dRestResourceError)
+    def test_tastypie_columns_bad_output(self):
+        api = drest.api.TastyPieAPI(MOCKAPI)
+        api.users.columns(output='bogus')
+
+    @raises(drest.exc.dRestRequestError)
+    def test_tastypie_stream_bad(self):
+        api = drest.api.TastyPieAPI(MOCKAPI)
+        api.add_resource('bogus', path='/bogus_path/')
+        try:
+            api.bogus.stream()
+        except drest.exc.dRestRequestError as e:
+            eq_(e.msg, 'Received HTTP Code 404 - Not Found (resource: bogus)')
+            raise
@@ -2,6 +2,7 @@
 
 import os
 import unittest
+import mock
 from nose.tools import ok_, eq_, raises
 
 import drest
@@ -21,4 +22,40 @@ class ResponseTestCase(unittest.TestCase):
         except drest.exc.dRestRequestError as e:
             eq_(e.response.status, 404)
             raise
-    
\ No newline at end of file
+    
+
+    def test_lazy_data(self):
+        deserializer = mock.Mock(return_value=dict(foo='bar'))
+        response = drest.response.ResponseHandler(200, b'raw', {},
+                                                  deserializer)
+        eq_(deserializer.call_count, 0)
+        eq_(response.raw, b'raw')
+        eq_(response.data, dict(foo='bar'))
+        eq_(response.data, dict(foo='bar'))
+        eq_(deserializer.call_count, 1)
+        eq_(response.raw, None)
+
+        response = drest.response.ResponseHandler(200, b'raw', {},
+                                                  deserializer,
+                                                  release_raw=False)
+        eq_(response.data, dict(foo='bar'))
+        eq_(response.raw, b'raw')
+
+        response.data = dict(foo='baz')
+        eq_(response.data, dict(foo='baz'))
+
+    def test_lazy_request(self):
+        req = drest.request.RequestHandler(lazy_deserialize=True)
+        with mock.patch.object(req._serialization, 'deserialize') as des:
+            des.return_value = dict(username='admin')
+            response = req.make_request('GET', '%s/users/1/' % MOCKAPI)
+            eq_(response.status, 200)
+            eq_(des.call_count, 0)
+            eq_(response.data['username'], 'admin')
+            eq_(des.call_count, 1)
+
+        req = drest.request.RequestHandler(lazy_deserialize=False)
+        response = req.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(response.raw, None)
+        eq_(response._deserializer, None)
+        eq_(response.data['username'], 'admin')
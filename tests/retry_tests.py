@@ -0,0 +1,93 @@
+"""Tests for drest.retry."""
+
+import socket
+import unittest
+import mock
+from nose.tools import eq_, ok_, raises
+
+import drest
+from drest.retry import RetryHandler, parse_retry_after
+from drest.testing import MOCKAPI
+
+def get_request_handler(side_effect, **kw):
+    kw.setdefault('backoff_factor', 0.001)
+    request = drest.request.RequestHandler(retry_handler=RetryHandler, **kw)
+    request._get_http = mock.Mock()
+    request._get_http().request.side_effect = side_effect
+    return request
+
+class RetryTestCase(unittest.TestCase):
+    def test_parse_retry_after(self):
+        eq_(parse_retry_after('3'), 3.0)
+        eq_(parse_retry_after(None), None)
+        eq_(parse_retry_after('bogus'), None)
+        eq_(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+    def test_backoff(self):
+        r = RetryHandler(backoff_factor=1, backoff_max=3)
+        for attempt in range(1, 6):
+            ok_(0 <= r.get_backoff(attempt) <= min(3, 2 ** (attempt - 1)))
+
+    def test_retry_status(self):
+        request = get_request_handler([
+            ({'status': '503'}, ''),
+            ({'status': '502'}, ''),
+            ({'status': '200'}, '{"username": "admin"}'),
+            ])
+        response = request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(response.status, 200)
+        eq_(response.data['username'], 'admin')
+        eq_(request._get_http().request.call_count, 3)
+
+    @raises(drest.exc.dRestRequestError)
+    def test_max_attempts(self):
+        request = get_request_handler([({'status': '500'}, '')] * 5,
+                                      retry_statuses=[500])
+        try:
+            request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        except drest.exc.dRestRequestError as e:
+            eq_(request._get_http().request.call_count, 3)
+            raise
+
+    def test_retry_socket_error(self):
+        request = get_request_handler([
+            socket.error('boom'),
+            socket.error('boom'),
+            ({'status': '200'}, '{}'),
+            ])
+        response = request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(response.status, 200)
+
+    def test_non_idempotent(self):
+        request = get_request_handler([({'status': '503'}, '')] * 3)
+        response = request.make_request('POST', '%s/projects/' % MOCKAPI)
+        eq_(request._get_http().request.call_count, 1)
+        eq_(response.status, 503)
+
+        request = get_request_handler([({'status': '503'}, '')] * 3)
+        response = request.make_request('POST', '%s/projects/' % MOCKAPI,
+                                         headers={'Idempotency-Key': 'abc'})
+        eq_(request._get_http().request.call_count, 3)
+
+    def test_retry_after(self):
+        request = get_request_handler([
+            ({'status': '429', 'retry-after': '0'}, ''),
+            ({'status': '200'}, '{}'),
+            ])
+        with mock.patch('time.sleep') as sleep:
+            request.make_request('GET', '%s/users/1/' % MOCKAPI)
+            sleep.assert_called_with(0.0)
+
+        request = get_request_handler([
+            ({'status': '503', 'retry-after': '3600'}, ''),
+            ({'status': '200'}, '{}'),
+            ])
+        response = request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(response.status, 503)
+
+    def test_budget(self):
+        request = get_request_handler([({'status': '503'}, '')] * 10,
+                                      budget_burst=1, budget_ratio=0)
+        request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        eq_(request._get_http().request.call_count, 3)
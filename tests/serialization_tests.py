@@ -1,6 +1,9 @@
 """Tests for drest.serialization."""
 
+import io
 import os
+import math
+import datetime
 import unittest
 
 try:
@@ -8,7 +11,7 @@ try:
 except ImportError as e:
     import simplejson as json
     
-from nose.tools import eq_, raises
+from nose.tools import eq_, ok_, raises
 import drest
 
 class SerializationTestCase(unittest.TestCase):
@@ -28,3 +31,86 @@ class SerializationTestCase(unittest.TestCase):
         s.get_headers()
         s.deserialize(json.dumps({}))
     
+
+    def test_json_collection_stream(self):
+        doc = dict(
+            meta=dict(limit=1234, total_count=300),
+            objects=[dict(id=i, label=u'é' * i) for i in range(300)],
+            extra=12345,
+            )
+        raw = json.dumps(doc).encode('utf-8')
+        for chunk_size in [1, 7, 65536]:
+            s = drest.serialization.JsonSerializationHandler()
+            with s.deserialize_stream(io.BytesIO(raw)) as collection:
+                collection.chunk_size = chunk_size
+                eq_(list(collection), doc['objects'])
+                eq_(collection.meta, doc['meta'])
+                eq_(collection.data['extra'], 12345)
+
+    def test_json_collection_stream_empty(self):
+        stream = drest.serialization.JsonCollectionStream
+        eq_(list(stream(io.BytesIO(b'{"objects": []}'))), [])
+        eq_(list(stream(io.BytesIO(b'{}'))), [])
+
+    @raises(ValueError)
+    def test_json_collection_stream_truncated(self):
+        stream = drest.serialization.JsonCollectionStream
+        list(stream(io.BytesIO(b'{"objects": [1, 2')))
+
+    def test_json_backends(self):
+        doc = dict(objects=[dict(id=2 ** 70, label=u'é', uri='/a/b/')],
+                   nan=float('inf'))
+        names = []
+        for name in drest.serialization.JSON_BACKENDS:
+            try:
+                __import__(name)
+            except ImportError:
+                continue
+            names.append(name)
+            s = drest.serialization.JsonSerializationHandler(json_backend=name)
+            eq_(s.backend_name, name)
+
+            serialized = s.serialize(doc)
+            eq_(json.loads(serialized), doc)
+            eq_(s.deserialize(serialized.encode('utf-8')), doc)
+            eq_(s.deserialize(u'{"a": "é"}'.encode('utf-8')), {'a': u'é'})
+            ok_(math.isnan(s.deserialize(b'{"a": NaN}')['a']))
+            eq_(s.deserialize(b'not json'),
+                dict(error='Expecting value: line 1 column 1 (char 0)'))
+
+        s = drest.serialization.JsonSerializationHandler()
+        eq_(s.backend_name, names[0])
+
+    def test_json_backends_serialize(self):
+        for name in drest.serialization.JSON_BACKENDS:
+            try:
+                __import__(name)
+            except ImportError:
+                continue
+            s = drest.serialization.JsonSerializationHandler(json_backend=name)
+            doc = dict(a=float('nan'), b=float('inf'), c=[1.5, u'é'])
+            eq_(s.serialize(doc), json.dumps(doc))
+            try:
+                s.serialize(dict(a=datetime.datetime(2020, 1, 1)))
+            except TypeError:
+                pass
+            else:
+                raise AssertionError("%s serialized a datetime" % name)
+
+    @raises(drest.exc.dRestAPIError)
+    def test_json_backend_unknown(self):
+        drest.serialization.JsonSerializationHandler(json_backend='bogus')
+
+    def test_binary_serialization(self):
+        doc = dict(objects=[dict(id=1, label=u'é', data=[1.5, None, True])])
+        for handler in [drest.serialization.MsgPackSerializationHandler,
+                        drest.serialization.CBORSerializationHandler]:
+            s = handler()
+            eq_(s.get_headers(), {'Content-Type': s.content_type})
+            eq_(s.deserialize(s.serialize(doc)), doc)
+            ok_(s.accepts('%s; charset=binary' % s.content_type.upper()))
+            ok_(not s.accepts('application/json'))
+            ok_('error' in s.deserialize(s.serialize(doc)[0:-3]))
+
+        s = drest.serialization.MsgPackSerializationHandler()
+        ok_(s.accepts('application/msgpack'))
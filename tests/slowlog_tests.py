@@ -0,0 +1,149 @@
+"""Tests for drest.slowlog."""
+
+import json
+import time
+import unittest
+from nose.tools import eq_, ok_, raises
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import drest
+from drest.slowlog import SlowRequestLog, PHASES, get_url_template
+from drest.transport import ConnectionPool
+from drest.testing import MOCKAPI
+
+class SlowLogTestCase(unittest.TestCase):
+    def test_get_url_template(self):
+        eq_(get_url_template('http://localhost:8000/api/v1/users/42/?a=b'),
+            '/api/v1/users/{id}/')
+        eq_(get_url_template(
+            '/projects/0b9a1c4e-7d2f-4c1e-9a6b-3f2e1d0c9b8a/v2/items/'),
+            '/projects/{id}/v2/items/')
+        eq_(get_url_template('/commits/0123456789abcdef0123/files'),
+            '/commits/{id}/files')
+        eq_(get_url_template('/users/' + 'x' * 300, max_length=10),
+            '/users/xxx')
+
+    def test_threshold(self):
+        slow = SlowRequestLog(threshold=1)
+        eq_(slow.record('GET', '/users/1/', 0.5), None)
+        entry = slow.record('GET', '/users/2/', 1.5, 'users', 200, 0, 42,
+                            dict(ttfb=1.2, transfer=0.3))
+        eq_(entry.reason, 'threshold')
+        eq_(entry.url, '/users/{id}/')
+        eq_(entry.phases[PHASES.index('ttfb')], 1.2)
+        eq_(entry.phases[PHASES.index('connect')], None)
+        eq_(len(slow), 1)
+
+    def test_top_n(self):
+        slow = SlowRequestLog(threshold=None, top_n=2, window=60)
+        eq_(slow.record('GET', '/a/', 0.3).reason, 'top')
+        eq_(slow.record('GET', '/b/', 0.1).reason, 'top')
+        eq_(slow.record('GET', '/c/', 0.05), None)
+        eq_(slow.record('GET', '/d/', 0.2).reason, 'top')
+        eq_(slow.record('GET', '/e/', 0.15), None)
+
+        # the slowest are recorded when the window closes
+        eq_(len(slow), 0)
+        slow._window_start -= 60
+        eq_([(r.url, r.reason) for r in slow.query()],
+            [('/d/', 'top'), ('/a/', 'top')])
+
+        # a new window starts over
+        eq_(slow.record('GET', '/f/', 0.01).reason, 'top')
+        slow._window_start -= 60
+        eq_(len(slow), 3)
+
+    def test_top_n_threshold(self):
+        slow = SlowRequestLog(threshold=1, top_n=1, window=60)
+        eq_(slow.record('GET', '/a/', 1.5).reason, 'threshold')
+        eq_(slow.record('GET', '/b/', 0.5), None)
+        slow._window_start -= 60
+        eq_([r.url for r in slow.query()], ['/a/'])
+
+    def test_ring_buffer(self):
+        slow = SlowRequestLog(threshold=0, capacity=3)
+        for i in range(5):
+            slow.record('GET', '/users/%d/' % i, i, 'users')
+        eq_(len(slow), 3)
+        eq_([r.duration for r in slow.query()], [4, 3, 2])
+        eq_(len(slow._buffer), 3)
+        slow.clear()
+        eq_(slow.query(), [])
+
+    @raises(drest.exc.dRestAPIError)
+    def test_bad_capacity(self):
+        SlowRequestLog(capacity=0)
+
+    def test_query(self):
+        slow = SlowRequestLog(threshold=0)
+        slow.record('GET', '/users/1/', 2, 'users')
+        slow.record('POST', '/users/', 1, 'users')
+        slow.record('GET', '/projects/1/', 3, 'projects')
+        eq_([r.url for r in slow.query(resource='users')],
+            ['/users/', '/users/{id}/'])
+        eq_([r.duration for r in slow.query(min_duration=2)], [3, 2])
+        eq_([r.method for r in slow.query(method='POST')], ['POST'])
+        eq_(len(slow.query(limit=2)), 2)
+        eq_(slow.query(since=time.time() + 60), [])
+
+    def test_dump(self):
+        slow = SlowRequestLog(threshold=0)
+        slow.record('GET', '/users/1/', 2, 'users', 200, 0, 10,
+                    dict(http=1.5))
+        records = slow.dump()
+        eq_(records[0]['url'], '/users/{id}/')
+        eq_(records[0]['phases'], dict(http=1.5))
+
+        stream = StringIO()
+        slow.dump(stream)
+        eq_(json.loads(stream.getvalue().strip()), records[0])
+
+    def test_request(self):
+        slow = SlowRequestLog(threshold=0)
+        api = drest.API(MOCKAPI, slow_request_log=slow,
+                        lazy_deserialize=False)
+        api.add_resource('users')
+        response = api.users.get(1)
+        entry = slow.query()[0]
+        eq_(entry.method, 'GET')
+        ok_(entry.url.endswith('/users/{id}/'))
+        eq_(entry.resource, 'users')
+        eq_(entry.status, 200)
+        ok_(entry.response_size > 0)
+        ok_(entry.duration >= entry.phases[PHASES.index('http')])
+        ok_(entry.phases[PHASES.index('deserialize')] is not None)
+
+    def test_request_phases(self):
+        slow = SlowRequestLog(threshold=0)
+        api = drest.API(MOCKAPI, slow_request_log=slow,
+                        transport=ConnectionPool(), lazy_deserialize=False)
+        api.make_request('GET', '/users/1/')
+        phases = slow.query()[0].to_dict()['phases']
+        eq_(sorted(phases.keys()), sorted(PHASES))
+
+        # the default transport only measures the whole exchange
+        slow.clear()
+        api = drest.API(MOCKAPI, slow_request_log=slow,
+                        lazy_deserialize=True)
+        api.make_request('GET', '/users/1/')
+        phases = slow.query()[0].to_dict()['phases']
+        eq_(sorted(phases.keys()), ['http', 'serialize'])
+
+    def test_request_error(self):
+        slow = SlowRequestLog(threshold=0)
+        api = drest.API(MOCKAPI, slow_request_log=slow)
+        try:
+            api.make_request('GET', '/users/100123123/')
+        except drest.exc.dRestRequestError as e:
+            pass
+        eq_(slow.query()[0].status, 404)
+
+    def test_fast_request(self):
+        slow = SlowRequestLog(threshold=60)
+        api = drest.API(MOCKAPI, slow_request_log=slow)
+        api.make_request('GET', '/users/1/')
+        eq_(len(slow), 0)
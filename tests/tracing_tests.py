@@ -0,0 +1,158 @@
+"""Tests for drest.tracing."""
+
+import unittest
+from nose.tools import eq_, ok_, raises
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+import drest
+from drest.tracing import Tracer, StreamExporter
+from drest.tracing import parse_traceparent
+from drest.testing import MOCKAPI
+
+TRACEPARENT = '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'
+
+class TracingTestCase(unittest.TestCase):
+    def test_parse_traceparent(self):
+        context = parse_traceparent(TRACEPARENT, 'congo=t61rcWkgMzE')
+        eq_(context.trace_id, '4bf92f3577b34da6a3ce929d0e0e4736')
+        eq_(context.span_id, '00f067aa0ba902b7')
+        eq_(context.sampled, True)
+        eq_(context.remote, True)
+        eq_(context.traceparent, TRACEPARENT)
+        eq_(context.tracestate, 'congo=t61rcWkgMzE')
+        eq_(parse_traceparent(TRACEPARENT[:-1] + '0').sampled, False)
+        for bogus in [None, '', 'bogus', 'ff' + TRACEPARENT[2:],
+                      TRACEPARENT + '-extra',
+                      '00-%s-00f067aa0ba902b7-01' % ('0' * 32)]:
+            eq_(parse_traceparent(bogus), None)
+        # future versions may append fields
+        ok_(parse_traceparent('01' + TRACEPARENT[2:] + '-extra') is not None)
+
+    def test_spans(self):
+        tracer = Tracer()
+        with tracer.span('parent') as parent:
+            ok_(tracer.current_span() is parent)
+            child = tracer.start_span('child')
+            child.end()
+        eq_(tracer.current_span(), None)
+        eq_(child.trace_id, parent.trace_id)
+        eq_(child.parent_id, parent.span_id)
+        eq_(parent.parent_id, None)
+        eq_([s.name for s in tracer.exporter.spans], ['child', 'parent'])
+        ok_(parent.duration >= child.duration)
+
+        try:
+            with tracer.span('failing'):
+                raise ValueError('boom')
+        except ValueError as e:
+            pass
+        eq_(tracer.exporter.spans[-1].error, 'boom')
+
+    def test_sampling(self):
+        tracer = Tracer(sample_rate=0)
+        tracer.start_span('dropped').end()
+        eq_(tracer.exporter.spans, [])
+        # continued traces follow the sampled flag of the parent
+        parent = tracer.extract({'Traceparent': TRACEPARENT})
+        span = tracer.start_span('kept', parent)
+        span.end()
+        eq_(span.trace_id, parent.trace_id)
+        eq_(tracer.exporter.spans, [span])
+
+    def test_stream_exporter(self):
+        stream = StringIO()
+        tracer = Tracer(exporter=StreamExporter(stream))
+        tracer.start_span('op', attributes=dict(a=1)).end()
+        ok_(stream.getvalue().find('"attributes": {"a": 1}') >= 0)
+
+    def test_request_spans(self):
+        tracer = Tracer()
+        api = drest.API(MOCKAPI, tracer=tracer, lazy_deserialize=False)
+        api.add_resource('users')
+        api.request.add_hook('pre_send', lambda c: headers.append(
+            dict(c.headers)))
+        headers = []
+        with tracer.span('job') as job:
+            api.users.get(1)
+
+        spans = dict([(s.name, s) for s in tracer.exporter.spans])
+        eq_(sorted(spans.keys()), ['HTTP GET', 'deserialize', 'job',
+                                   'serialize', 'transport'])
+        request = spans['HTTP GET']
+        eq_(request.parent_id, job.span_id)
+        eq_(request.attributes['drest.resource'], 'users')
+        eq_(request.attributes['http.status_code'], 200)
+        for name in ['serialize', 'transport', 'deserialize']:
+            eq_(spans[name].parent_id, request.span_id)
+            eq_(spans[name].trace_id, job.trace_id)
+        eq_(headers[0]['traceparent'], spans['transport'].context.traceparent)
+
+    def test_lazy_deserialize(self):
+        tracer = Tracer()
+        api = drest.API(MOCKAPI, tracer=tracer, lazy_deserialize=True)
+        with tracer.span('job') as job:
+            response = api.make_request('GET', '/users/1/')
+            eq_(response.data['username'], 'admin')
+
+        spans = dict([(s.name, s) for s in tracer.exporter.spans])
+        request = spans['HTTP GET']
+        eq_(request.attributes['drest.lazy_deserialize'], True)
+        eq_(spans['deserialize'].parent_id, job.span_id)
+        eq_(spans['deserialize'].attributes['drest.request_span_id'],
+            request.span_id)
+
+    def test_spans_within_parent(self):
+        for lazy in [False, True]:
+            tracer = Tracer()
+            api = drest.API(MOCKAPI, tracer=tracer, lazy_deserialize=lazy)
+            with tracer.span('job'):
+                api.make_request('GET', '/users/1/').data
+
+            spans = tracer.exporter.spans
+            by_id = dict([(s.span_id, s) for s in spans])
+            for span in spans:
+                if span.parent_id is None:
+                    continue
+                parent = by_id[span.parent_id]
+                # exported after their children, and enclosing them
+                ok_(spans.index(parent) > spans.index(span))
+                ok_(parent.start_time <= span.start_time)
+                ok_(span.end_time <= parent.end_time)
+
+    def test_request_error(self):
+        tracer = Tracer()
+        api = drest.API(MOCKAPI, tracer=tracer)
+        try:
+            api.make_request('GET', '/users/100123123/')
+        except drest.exc.dRestRequestError as e:
+            pass
+        request = [s for s in tracer.exporter.spans if s.name == 'HTTP GET']
+        eq_(request[0].attributes['http.status_code'], 404)
+        ok_(request[0].error.find('404') >= 0)
+
+    def test_not_sampled(self):
+        tracer = Tracer(sample_rate=0)
+        request = drest.request.RequestHandler(tracer=tracer)
+        headers = []
+        request.add_hook('pre_send', lambda c: headers.append(
+            dict(c.headers)))
+        request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        ok_('traceparent' not in headers[0])
+
+        # unsampled parents are still propagated
+        parent = parse_traceparent(TRACEPARENT[:-1] + '0', 'a=b')
+        with tracer.span('job', parent=parent):
+            request.make_request('GET', '%s/users/1/' % MOCKAPI)
+        ok_(headers[1]['traceparent'].startswith(
+            '00-4bf92f3577b34da6a3ce929d0e0e4736-'))
+        ok_(headers[1]['traceparent'].endswith('-00'))
+        eq_(headers[1]['tracestate'], 'a=b')
+        eq_(tracer.exporter.spans, [])
+
+    @raises(drest.exc.dRestInterfaceError)
+    def test_bad_exporter(self):
+        Tracer(exporter=object())
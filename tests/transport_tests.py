@@ -0,0 +1,161 @@
+"""Tests for drest.transport."""
+
+import socket
+import unittest
+import threading
+from nose.tools import eq_, ok_, raises
+
+import drest
+from drest.transport import ConnectionPool
+from drest.testing import MOCKAPI
+
+class TransportTestCase(unittest.TestCase):
+    def test_request(self):
+        pool = ConnectionPool()
+        headers, content = pool.request('%s/users/1/' % MOCKAPI)
+        eq_(headers['status'], '200')
+        ok_(content.find(b'admin') >= 0)
+
+    def test_keep_alive_reuse(self):
+        pool = ConnectionPool()
+        for i in range(3):
+            pool.request('%s/users/1/' % MOCKAPI)
+        stats = pool.stats()
+        eq_(stats['missed'], 1)
+        eq_(stats['reused'], 2)
+        eq_(stats['open'], 1)
+        eq_(stats['idle'], 1)
+        pool.close()
+        eq_(pool.stats()['open'], 0)
+
+    def test_idle_timeout(self):
+        pool = ConnectionPool(idle_timeout=-1)
+        pool.request('%s/users/1/' % MOCKAPI)
+        pool.request('%s/users/1/' % MOCKAPI)
+        eq_(pool.stats()['expired'], 1)
+        eq_(pool.stats()['reused'], 0)
+
+    @raises(drest.exc.dRestAPIError)
+    def test_non_blocking_checkout(self):
+        pool = ConnectionPool(max_connections=1, block=False)
+        key = ('http', 'localhost', 8000)
+        conn, reused = pool.checkout(key)
+        try:
+            pool.checkout(key)
+        finally:
+            pool.checkin(key, conn, reuse=False)
+
+    @raises(drest.exc.dRestAPIError)
+    def test_checkout_timeout(self):
+        pool = ConnectionPool(max_connections=1, checkout_timeout=0.1)
+        key = ('http', 'localhost', 8000)
+        conn, reused = pool.checkout(key)
+        try:
+            pool.checkout(key)
+        finally:
+            pool.checkin(key, conn, reuse=False)
+
+    def test_failed_connection_frees_slot(self):
+        pool = ConnectionPool(max_connections=1, block=False)
+        key = ('http', 'localhost', 8000)
+        new_connection = pool._new_connection
+
+        def failing(key, timeout):
+            raise ValueError('bad host')
+        pool._new_connection = failing
+        for i in range(2):
+            try:
+                pool.checkout(key)
+                ok_(False, 'checkout should fail')
+            except ValueError as e:
+                pass
+        eq_(pool.stats()['open'], 0)
+
+        pool._new_connection = new_connection
+        conn, reused = pool.checkout(key)
+        pool.checkin(key, conn)
+
+    def test_shared_between_threads(self):
+        pool = ConnectionPool(max_connections=2)
+        api = drest.API(MOCKAPI, transport=pool)
+        api.add_resource('users')
+        errors = []
+
+        def worker():
+            try:
+                for i in range(5):
+                    eq_(api.users.get(1).data['username'], 'admin')
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        eq_(errors, [])
+        ok_(pool.stats()['open'] <= 2)
+
+    def test_basic_auth(self):
+        api = drest.api.TastyPieAPI(MOCKAPI, auth_mech='basic',
+                                    transport=ConnectionPool())
+        api.auth(user='john.doe', password='password')
+        ok_(isinstance(api.request._basic_auth,
+                       drest.auth.BasicAuthHandler))
+        response = api.users_via_basic_auth.get()
+        eq_(response.data['objects'][0]['username'], 'admin')
+
+    @raises(drest.exc.dRestAPIError)
+    def test_server_not_found_error(self):
+        req = drest.request.RequestHandler(transport=ConnectionPool())
+        try:
+            req.make_request('GET', 'http://bogus.example.com/api/')
+        except drest.exc.dRestAPIError as e:
+            ok_(e.__repr__().find('Unable to find the server') >= 0)
+            raise
+
+    @raises(drest.exc.dRestAPIError)
+    def test_socket_timeout(self):
+        req = drest.request.RequestHandler(timeout=1,
+                                           transport=ConnectionPool())
+        try:
+            req.make_request(
+                'GET',
+                'http://localhost:8000/fake_long_request/',
+                params=dict(seconds=10),
+                )
+        except drest.exc.dRestAPIError as e:
+            ok_(e.__repr__().find('timed out') >= 0)
+            raise
+
+    def test_http_exception(self):
+        # a server that hangs up without responding
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('127.0.0.1', 0))
+        server.listen(5)
+        port = server.getsockname()[1]
+
+        def serve():
+            for i in range(2):
+                conn, addr = server.accept()
+                conn.recv(65536)
+                conn.close()
+
+        thread = threading.Thread(target=serve)
+        thread.daemon = True
+        thread.start()
+        try:
+            pool = ConnectionPool()
+            url = 'http://127.0.0.1:%d/' % port
+            req = drest.request.RequestHandler(transport=pool)
+            for make_request in [pool.request,
+                                 lambda url: req.make_request('GET', url)]:
+                try:
+                    make_request(url)
+                    ok_(False, 'request should fail')
+                except drest.exc.dRestAPIError as e:
+                    ok_(e.__repr__().find('RemoteDisconnected') >= 0)
+            eq_(pool.stats()['open'], 0)
+        finally:
+            thread.join(5)
+            server.close()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Compare the json backends of drest.serialization.JsonSerializationHandler
+on TastyPie style collection payloads.
+
+Usage: python utils/bench-json.py [num_objects] [iterations]
+
+"""
+
+import sys
+import timeit
+
+from drest.serialization import JSON_BACKENDS, JsonSerializationHandler
+
+def get_payload(num_objects):
+    objects = []
+    for i in range(num_objects):
+        objects.append({
+            'id': i,
+            'resource_uri': '/api/v0/users/%s/' % i,
+            'username': 'user%s' % i,
+            'email': 'user%s@example.com' % i,
+            'first_name': u'Jöhn',
+            'last_name': 'Doe',
+            'is_active': i % 7 != 0,
+            'is_staff': False,
+            'date_joined': '2013-11-12T10:%02d:00' % (i % 60),
+            'last_login': None,
+            'score': i * 1.5,
+            'groups': ['/api/v0/groups/1/', '/api/v0/groups/%s/' % (i % 5)],
+            })
+    return {
+        'meta': {
+            'limit': num_objects,
+            'next': None,
+            'offset': 0,
+            'previous': None,
+            'total_count': num_objects,
+            },
+        'objects': objects,
+        }
+
+def bench(func, iterations):
+    return min(timeit.repeat(func, number=iterations, repeat=3)) / iterations
+
+def main():
+    num_objects = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    payload = get_payload(num_objects)
+    stdlib = JsonSerializationHandler(json_backend='json')
+    content = stdlib.serialize(payload).encode('utf-8')
+
+    print("%s objects, %s bytes, best of 3 x %s iterations" % \
+          (num_objects, len(content), iterations))
+    print("%-12s %14s %14s" % ('backend', 'deserialize', 'serialize'))
+
+    # what JsonSerializationHandler did before backends were selectable
+    import json
+    def legacy():
+        return json.loads(content.decode('utf-8'))
+    print("%-12s %12.3fms %14s" % \
+          ('json (str)', bench(legacy, iterations) * 1000, '-'))
+
+    for name in JSON_BACKENDS:
+        try:
+            handler = JsonSerializationHandler(json_backend=name)
+        except ImportError:
+            print("%-12s %14s %14s" % (name, 'n/a', 'n/a'))
+            continue
+        assert handler.deserialize(content) == payload
+        loads = bench(lambda: handler.deserialize(content), iterations)
+        dumps = bench(lambda: handler.serialize(payload), iterations)
+        print("%-12s %12.3fms %12.3fms" % (name, loads * 1000, dumps * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Measure the cost of instantiating MetaMixin based handlers, comparing the
+per class cached Meta merge against merging the MRO on every instantiation
+(as MetaMixin did before).
+
+Usage: python utils/bench-meta.py [iterations]
+
+"""
+
+import sys
+import timeit
+
+from drest import meta, request, response
+
+def legacy_meta(obj, **kw):
+    metas = reversed([x.Meta for x in obj.__class__.mro() \
+                              if hasattr(x, "Meta")])
+    final_meta = {}
+    for m in metas:
+        final_meta.update(dict([x for x in list(m.__dict__.items()) \
+                                   if not x[0].startswith("_")]))
+    for key in list(final_meta.keys()):
+        if key in kw:
+            final_meta[key] = kw.pop(key)
+    return meta.Meta(**final_meta)
+
+def bench(func, iterations):
+    return min(timeit.repeat(func, number=iterations, repeat=3)) / iterations
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    req = request.TastyPieRequestHandler()
+    res = response.ResponseHandler(200, {}, {})
+    print("best of 3 x %s iterations" % iterations)
+    print("%-24s %12s %12s" % ('', 'legacy', 'cached'))
+    for label, obj, kw in [
+            ('ResponseHandler', res, {}),
+            ('TastyPieRequestHandler', req, dict(debug=False, timeout=10)),
+            ]:
+        legacy = bench(lambda: legacy_meta(obj, **kw), iterations)
+        cached = bench(lambda: meta.MetaMixin.__init__(obj, **kw),
+                       iterations)
+        print("%-24s %10.2fus %10.2fus" % \
+              (label, legacy * 1000000, cached * 1000000))
+
+    new_response = bench(lambda: response.ResponseHandler(200, {}, {}),
+                         iterations)
+    print("%-24s %23.2fus" % ('ResponseHandler()', new_response * 1000000))
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
 
+import json
+
 from django.contrib.auth.models import User
 
 from tastypie import fields
@@ -9,10 +11,35 @@ from tastypie.validation import FormValidation
 from tastypie.http import HttpUnauthorized
 from tastypie.resources import ModelResource, ALL
 from tastypie.api import Api
+from tastypie.serializers import Serializer
 from tastypie.utils import trailing_slash
 
 from mockapi.projects.models import Project
 
+class BinarySerializer(Serializer):
+    """Adds MessagePack and CBOR to the formats negotiated via Accept."""
+    formats = list(Serializer.formats) + ['msgpack', 'cbor']
+    content_types = dict(Serializer.content_types,
+                         msgpack='application/x-msgpack',
+                         cbor='application/cbor')
+
+    def to_msgpack(self, data, options=None):
+        import msgpack
+        simple = json.loads(self.to_json(data, options))
+        return msgpack.packb(simple, use_bin_type=True)
+
+    def from_msgpack(self, content):
+        import msgpack
+        return msgpack.unpackb(content, raw=False)
+
+    def to_cbor(self, data, options=None):
+        import cbor2
+        return cbor2.dumps(json.loads(self.to_json(data, options)))
+
+    def from_cbor(self, content):
+        import cbor2
+        return cbor2.loads(content)
+
 ### READ ONLY API V0
 
 class UserResource(ModelResource):    
@@ -23,6 +50,7 @@ class UserResource(ModelResource):
             'username': ALL,
             }
         allowed_methods = ['get']
+        serializer = BinarySerializer()
 
 class UserResourceViaApiKeyAuth(ModelResource):    
     class Meta:
@@ -33,6 +61,7 @@ class UserResourceViaApiKeyAuth(ModelResource):
             'label': ALL,
             }
         allowed_methods = ['get']
+        serializer = BinarySerializer()
         
 class UserResourceViaBasicAuth(ModelResource):    
     class Meta:
@@ -43,6 +72,7 @@ class UserResourceViaBasicAuth(ModelResource):
             'label': ALL,
             }
         allowed_methods = ['get']
+        serializer = BinarySerializer()
 
 class UserResourceViaDigestAuth(ModelResource):    
     class Meta:
@@ -53,6 +83,7 @@ class UserResourceViaDigestAuth(ModelResource):
             'label': ALL,
             }
         allowed_methods = ['get']
+        serializer = BinarySerializer()
         
 class ProjectResource(ModelResource):
     class Meta:
@@ -63,6 +94,7 @@ class ProjectResource(ModelResource):
             'label': ALL,
             }
         allowed_methods = ['get', 'put', 'post', 'delete', 'patch']
+        serializer = BinarySerializer()
         
 v0_api = Api(api_name='v0')
 v0_api.register(UserResource())
@@ -49,6 +49,9 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.messages.middleware.MessageMiddleware',
 )
 ROOT_URLCONF = 'mockapi.urls'
+
+# Send ETags (and honor If-None-Match) for drest.cache testing
+USE_ETAGS = True
 TEMPLATE_DIRS = ()
 FIXTURE_DIRS = (
     os.path.join(os.path.dirname(__file__), 'fixtures'),
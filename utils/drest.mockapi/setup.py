@@ -22,6 +22,8 @@ setup(name='drest.mockapi',
         "django",
         "django-tastypie",
         "python-digest",
+        "msgpack",
+        "cbor2",
         ],
     setup_requires=[
         ],